@@ -0,0 +1,93 @@
+"""
+Benchmark of the memory used by each XBlock instance.
+
+Compares blocks that keep their cached field values and dirty baselines in
+per-instance dicts, the way XBlocks used to, against XBlocks keeping them in
+fixed-size slot lists.
+
+Each block has its fields read, so that every field has a cached value, and
+half of them changed, so that they have dirty baselines.  The memory counted
+is that of the instance and the containers it owns, not of the field values.
+
+Run with::
+
+    python benchmarks/block_memory.py
+
+"""
+import sys
+
+from xblock.core import XBlock
+from xblock.field_data import DictFieldData
+from xblock.fields import Boolean, Float, Integer, List, ModelMetaclass, Scope, ScopeIds, String
+
+
+FIELD_NAMES = ('title', 'weight', 'attempts', 'graded', 'tags_list', 'display', 'due', 'answer', 'score', 'done')
+
+
+def add_fields(attrs):
+    """Add the benchmark fields to the class attributes `attrs`."""
+    attrs.update(
+        title=String(scope=Scope.settings),
+        weight=Float(scope=Scope.settings),
+        attempts=Integer(scope=Scope.user_state),
+        graded=Boolean(scope=Scope.settings),
+        tags_list=List(scope=Scope.settings),
+        display=String(scope=Scope.content),
+        due=String(scope=Scope.settings),
+        answer=String(scope=Scope.user_state),
+        score=Float(scope=Scope.user_state),
+        done=Boolean(scope=Scope.user_state),
+    )
+    return attrs
+
+
+class DictStorage(object):
+    """Storage for field values in dicts, as XBlocks used to have."""
+    def __init__(self, runtime, field_data, scope_ids):
+        self.runtime = runtime
+        self._field_data = field_data
+        self._field_data_cache = {}
+        self._dirty_fields = {}
+        self.scope_ids = scope_ids
+        self._parent_block = None
+        self._parent_block_id = None
+        self._child_blocks = None
+        self._child_block_ids = None
+
+
+DictBackedBlock = ModelMetaclass('DictBackedBlock', (DictStorage,), add_fields({}))   # pylint: disable=invalid-name
+SlotListBlock = type('SlotListBlock', (XBlock,), add_fields({}))   # pylint: disable=invalid-name
+
+
+def storage_size(block):
+    """Return the bytes used by `block` and the containers it keeps its fields in."""
+    size = sys.getsizeof(block)
+    if hasattr(block, '__dict__'):
+        size += sys.getsizeof(block.__dict__)
+    for attr in ('_field_data_cache', '_dirty_fields'):
+        if attr in getattr(block, '__dict__', {}):
+            size += sys.getsizeof(block.__dict__[attr])
+    for attr in ('_field_values', '_field_baselines'):
+        if hasattr(block, attr):
+            size += sys.getsizeof(getattr(block, attr))
+    return size
+
+
+def make_block(cls):
+    """Make a block of `cls`, read all of its fields, and change half of them."""
+    block = cls(None, DictFieldData({}), ScopeIds('user', 'benchmark', 'def', 'usage'))
+    for name in FIELD_NAMES:
+        getattr(block, name)
+    for name in FIELD_NAMES[::2]:
+        setattr(block, name, getattr(block, name))
+    return block
+
+
+def main():
+    """Print the memory used by a block of each kind."""
+    for label, cls in (('dicts', DictBackedBlock), ('slot lists', SlotListBlock)):
+        print "{:>10}: {} bytes per block".format(label, storage_size(make_block(cls)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark of parsing stored dates with `DateTime.from_json`.
+
+The corpus is made of the due and start dates of a course, most of them
+written by `DateTime.to_json`, with a few in other ISO-8601 shapes and a few
+that only dateutil can parse.  Each date is read many times, as it would be by
+rendering the blocks that use it for many users.  The corpus is parsed with
+dateutil, as `from_json` used to parse every date, then with the ISO-8601
+parser, and then with the ISO-8601 parser and a memo of parsed dates.
+
+Run with::
+
+    python benchmarks/datetime_parsing.py
+
+"""
+import datetime
+import random
+import timeit
+
+from xblock.fields import DateTime
+
+
+DISTINCT_DATES = 500
+READS = 20000
+
+
+def make_corpus():
+    """Return a list of date strings to parse, in the order they are read."""
+    rng = random.Random(0)
+    start = datetime.datetime(2014, 1, 1)
+    field = DateTime()
+    dates = []
+    for index in range(DISTINCT_DATES):
+        date = start + datetime.timedelta(minutes=rng.randrange(60 * 24 * 365))
+        if index % 50 == 0:
+            dates.append(date.strftime('%B %d, %Y'))
+        elif index % 10 == 0:
+            dates.append(date.strftime('%Y-%m-%dT%H:%M:%SZ'))
+        else:
+            dates.append(field.to_json(date))
+    return [rng.choice(dates) for _ in range(READS)]
+
+
+class DateutilDateTime(DateTime):
+    """A DateTime field that parses every date with dateutil."""
+    def _parse_iso(self, value):
+        return None
+
+
+def best_time(field, corpus):
+    """Return the best time in microseconds to parse one date of `corpus` with `field`."""
+    def parse_all():
+        """Parse every date in the corpus."""
+        for value in corpus:
+            field.from_json(value)
+    return min(timeit.repeat(parse_all, number=1, repeat=3)) / len(corpus) * 1e6
+
+
+def main():
+    """Print the time taken to parse a date each way."""
+    corpus = make_corpus()
+    for label, field in (
+            ('dateutil', DateutilDateTime()),
+            ('iso', DateTime()),
+            ('iso+memo', DateTime(memo_size=DISTINCT_DATES)),
+    ):
+        print "{:>8}: {:.1f}us per date".format(label, best_time(field, corpus))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Microbenchmark of resolving field names to KeyValueStore keys in KvsFieldData.
+
+Compares the key resolution that used to run on every get/set/has/default
+(field lookup, scope comparisons and a new Key per call) against the compiled
+key recipes and per-block key memo now used by `KvsFieldData._key`.
+
+Run with::
+
+    python benchmarks/kvs_keys.py
+
+"""
+import timeit
+
+from xblock.core import XBlock
+from xblock.fields import BlockScope, Scope, ScopeIds, String, UserScope
+from xblock.runtime import DictKeyValueStore, KeyValueStore, KvsFieldData
+
+
+class BenchmarkBlock(XBlock):
+    """A block with fields in the common scopes."""
+    content = String(scope=Scope.content)
+    settings = String(scope=Scope.settings)
+    user_state = String(scope=Scope.user_state)
+    preferences = String(scope=Scope.preferences)
+    user_info = String(scope=Scope.user_info)
+
+
+class LegacyKvsFieldData(KvsFieldData):
+    """KvsFieldData resolving keys the way it did before key recipes."""
+
+    def _key(self, block, name):
+        field = self._getfield(block, name)
+        if field.scope in (Scope.children, Scope.parent):
+            block_id = block.scope_ids.usage_id
+            user_id = None
+        else:
+            block_scope = field.scope.block
+
+            if block_scope == BlockScope.ALL:
+                block_id = None
+            elif block_scope == BlockScope.USAGE:
+                block_id = block.scope_ids.usage_id
+            elif block_scope == BlockScope.DEFINITION:
+                block_id = block.scope_ids.def_id
+            elif block_scope == BlockScope.TYPE:
+                block_id = block.scope_ids.block_type
+
+            if field.scope.user == UserScope.ONE:
+                user_id = block.scope_ids.user_id
+            else:
+                user_id = None
+
+        return KeyValueStore.Key(
+            scope=field.scope,
+            user_id=user_id,
+            block_scope_id=block_id,
+            field_name=name
+        )
+
+
+FIELD_NAMES = ('content', 'settings', 'user_state', 'preferences', 'user_info', 'parent')
+
+
+def make_block(field_data):
+    """Make a block reading from `field_data`."""
+    return BenchmarkBlock(None, field_data, ScopeIds('user', 'benchmark', 'def', 'usage'))
+
+
+def per_access(func, number):
+    """Return the best time in microseconds for one call of `func`."""
+    best = min(timeit.repeat(func, number=number, repeat=5))
+    return best / number / len(FIELD_NAMES) * 1e6
+
+
+def main():
+    """Print the per-access cost of each kind of key resolution."""
+    number = 20000
+    kvs = DictKeyValueStore()
+
+    for label, field_data in (('legacy', LegacyKvsFieldData(kvs)), ('compiled', KvsFieldData(kvs))):
+        block = make_block(field_data)
+
+        def resolve_keys(field_data=field_data, block=block):
+            """Resolve the key of every field."""
+            for name in FIELD_NAMES:
+                field_data._key(block, name)  # pylint: disable=protected-access
+
+        def check_fields(field_data=field_data, block=block):
+            """Ask the store whether every field is set."""
+            for name in FIELD_NAMES:
+                field_data.has(block, name)
+
+        print "{:>8}: _key {:.3f}us  has {:.3f}us".format(
+            label,
+            per_access(resolve_keys, number),
+            per_access(check_fields, number),
+        )
+
+
+if __name__ == '__main__':
+    main()
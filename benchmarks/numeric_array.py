@@ -0,0 +1,47 @@
+"""
+Benchmark of storing arrays of scores in `List` and `NumericArray` fields.
+
+Each array is written the way a JSON key-value store would write it, with
+`to_json` and `json.dumps`, and read back with `json.loads` and `from_json`.
+Prints the time taken for the round trip and the size of the stored text.
+
+Run with::
+
+    python benchmarks/numeric_array.py
+
+"""
+import json
+import random
+import timeit
+
+from xblock.fields import List, NumericArray
+
+
+SIZES = (100, 10000)
+
+
+def round_trip(field, value):
+    """Return a function writing `value` with `field` and reading it back."""
+    def run():
+        """Write and read the value."""
+        return field.from_json(json.loads(json.dumps(field.to_json(value))))
+    return run
+
+
+def main():
+    """Print the cost of storing arrays of scores in each kind of field."""
+    rng = random.Random(0)
+    for size in SIZES:
+        scores = [rng.random() * 100 for _ in range(size)]
+        for label, field in (('List', List()), ('NumericArray', NumericArray())):
+            value = field.from_json(scores)
+            run = round_trip(field, value)
+            number = max(1, 100000 // size)
+            best = min(timeit.repeat(run, number=number, repeat=3)) / number * 1e6
+            print "{:>6} scores, {:>12}: {:8.1f}us per round trip, {:7} bytes stored".format(
+                size, label, best, len(json.dumps(field.to_json(value)))
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Microbenchmark of reading and writing immutable scalar fields.
+
+Compares the generic `Field.__get__` and `Field.__set__` against the
+`__get__` and `__set__` that `scalar_field` specializes for the Integer,
+Float, Boolean and String field classes.
+
+Run with::
+
+    python benchmarks/scalar_fields.py
+
+"""
+import timeit
+
+from xblock.core import XBlock
+from xblock.field_data import DictFieldData
+from xblock.fields import Boolean, Field, Float, Integer, Scope, ScopeIds, String
+
+
+def generic(field_class):
+    """Return a subclass of `field_class` using the generic Field descriptors."""
+    return type('Generic' + field_class.__name__, (field_class,), {
+        '__get__': Field.__get__,
+        '__set__': Field.__set__,
+    })
+
+
+FIELD_CLASSES = (Integer, Float, Boolean, String)
+VALUES = {Integer: 5, Float: 2.5, Boolean: True, String: u'value'}
+
+
+def make_block(field_class):
+    """Make a block with a specialized and a generic field of `field_class`."""
+    block_class = type('BenchmarkBlock', (XBlock,), {
+        'fast': field_class(scope=Scope.settings),
+        'slow': generic(field_class)(scope=Scope.settings),
+    })
+    return block_class(None, DictFieldData({}), ScopeIds('user', 'benchmark', 'def', 'usage'))
+
+
+def per_call(func, number=200000):
+    """Return the best time in nanoseconds for one call of `func`."""
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e9
+
+
+def main():
+    """Print the cost of reading and writing each kind of field."""
+    for field_class in FIELD_CLASSES:
+        block = make_block(field_class)
+        value = VALUES[field_class]
+        block.fast = block.slow = value
+
+        print "{:>8}: get {:.0f}ns -> {:.0f}ns, set {:.0f}ns -> {:.0f}ns".format(
+            field_class.__name__,
+            per_call(lambda: block.slow),
+            per_call(lambda: block.fast),
+            per_call(lambda: setattr(block, 'slow', value)),
+            per_call(lambda: setattr(block, 'fast', value)),
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -15,5 +15,6 @@ setup(
         'webob',
         'pytz',
         'python-dateutil',
+        'six',
     ]
 )
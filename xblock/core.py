@@ -5,6 +5,7 @@ This code is in the Runtime layer, because it is authored once by edX
 and used by all runtimes.
 
 """
+import copy
 import functools
 import pkg_resources
 try:
@@ -14,13 +15,21 @@ except ImportError:
 from webob import Response
 
 from xblock.exceptions import XBlockSaveError, KeyValueMultiSaveError, JsonHandlerError, DisallowedFileError
-from xblock.fields import ChildrenModelMetaclass, ModelMetaclass, String, List, Scope, Reference
+from xblock.fields import (
+    AppendLog, ChildrenModelMetaclass, Counter, Dict, ModelMetaclass, NumericArray, String, List, Scope, Reference,
+    ShardedDict, ShardedField, TrackedDict, TrackedList, SlotMapping, NO_CACHE_VALUE, NOT_DIRTY, SHARD_SEPARATOR,
+)
 from xblock.plugin import Plugin
+from xblock.session import SaveSession
+from xblock.structure import BlockStructure
 
 
 # __all__ controls what classes end up in the docs.
 __all__ = ['XBlock']
 
+# Fields whose values are written to XML attributes as JSON, rather than as text
+_JSON_XML_FIELDS = (ShardedDict, AppendLog, NumericArray)
+
 
 class TagCombiningMetaclass(type):
     """
@@ -134,6 +143,22 @@ class XBlock(Plugin):
         func._is_xblock_handler = True      # pylint: disable=protected-access
         return func
 
+    @staticmethod
+    def prefetches(*fields):
+        """
+        A decorator for views and handlers, declaring the fields they read.
+
+        Each of `fields` is either the name of a field, or a :class:`.Scope`
+        standing for all of the block's fields in that scope.  The runtime
+        reads the stored values of those fields in one bulk call before it
+        invokes the view or handler, and :meth:`.Runtime.render_children`
+        reads them for all of the children it renders at once.
+        """
+        def _decorator(func):                               # pylint: disable=missing-docstring
+            func._prefetch_fields = getattr(func, '_prefetch_fields', ()) + fields  # pylint: disable=protected-access
+            return func
+        return _decorator
+
     @staticmethod
     def tag(tags):
         """Returns a function that adds the words in `tags` as class tags to this class."""
@@ -247,14 +272,44 @@ class XBlock(Plugin):
         super(XBlock, self).__init__()
         self.runtime = runtime
         self._field_data = field_data
-        self._field_data_cache = {}
-        self._dirty_fields = {}
+        # _field_slots is set on each class by ModelMetaclass
+        # pylint: disable=no-member
+        self._field_values = [NO_CACHE_VALUE] * len(self._field_slots)
+        self._field_baselines = [NOT_DIRTY] * len(self._field_slots)
+        # pylint: enable=no-member
         self.scope_ids = scope_ids
 
         # A cache of the parent block, retrieved from .parent
         self._parent_block = None
         self._parent_block_id = None
 
+        # A cache of the child blocks, retrieved from .children
+        self._child_blocks = None
+        self._child_block_ids = None
+
+        # The names of the fields read, while the runtime is recording them
+        self._field_reads = None
+
+    @property
+    def _field_data_cache(self):
+        """The values cached for this block's fields, as a dict of field names to values."""
+        return SlotMapping(self, '_field_values', NO_CACHE_VALUE)
+
+    @_field_data_cache.setter
+    def _field_data_cache(self, values):
+        """Replace the values cached for this block's fields with the dict `values`."""
+        SlotMapping(self, '_field_values', NO_CACHE_VALUE).replace(values)
+
+    @property
+    def _dirty_fields(self):
+        """The baselines of this block's dirty fields, as a dict of fields to baselines."""
+        return SlotMapping(self, '_field_baselines', NOT_DIRTY, by_field=True)
+
+    @_dirty_fields.setter
+    def _dirty_fields(self, baselines):
+        """Replace the baselines of this block's dirty fields with the dict `baselines`."""
+        SlotMapping(self, '_field_baselines', NOT_DIRTY, by_field=True).replace(baselines)
+
     def __repr__(self):
         # `XBlock` obtains the `fields` attribute from the `ModelMetaclass`.
         # Since this is not understood by static analysis, silence this error.
@@ -280,12 +335,19 @@ class XBlock(Plugin):
 
     def get_parent(self):
         """Return the parent block of this block, or None if there isn't one."""
-        if self._parent_block_id != self.parent:
-            if self.parent is not None:
-                self._parent_block = self.runtime.get_block(self.parent)
+        structure = getattr(self.runtime, 'block_structure', None)
+        parent_changed = self.fields['parent']._is_dirty(self)  # pylint: disable=protected-access, no-member
+        if isinstance(structure, BlockStructure) and self.scope_ids.usage_id in structure and not parent_changed:
+            # The runtime's index knows the saved parent without reading the parent field
+            parent_id = structure.parent(self.scope_ids.usage_id)
+        else:
+            parent_id = self.parent
+        if self._parent_block_id != parent_id:
+            if parent_id is not None:
+                self._parent_block = self.runtime.get_block(parent_id)
             else:
                 self._parent_block = None
-            self._parent_block_id = self.parent
+            self._parent_block_id = parent_id
         return self._parent_block
 
     def render(self, view, context=None):
@@ -297,43 +359,119 @@ class XBlock(Plugin):
         return self.runtime.handle(self, handler_name, request, suffix)
 
     def save(self):
-        """Save all dirty fields attached to this XBlock."""
+        """
+        Save all dirty fields attached to this XBlock.
+
+        While the runtime has a :class:`.SaveSession` open, the block is added
+        to the session, and its fields are saved when the session ends.
+        """
         if not self._dirty_fields:
             # nop if _dirty_fields attribute is empty
             return
+
+        session = getattr(self.runtime, 'active_session', None)
+        if isinstance(session, SaveSession):
+            session.add(self)
+            return
+
+        fields_to_save = self._get_fields_to_save()
         try:
-            fields_to_save = self._get_fields_to_save()
             # Throws KeyValueMultiSaveError if things go wrong
             self._field_data.set_many(self, fields_to_save)
-
         except KeyValueMultiSaveError as save_error:
-            saved_fields = [field for field in self._dirty_fields if field.name in save_error.saved_field_names]
-            for field in saved_fields:
-                # should only find one corresponding field
-                del self._dirty_fields[field]
-            raise XBlockSaveError(saved_fields, self._dirty_fields.keys())
+            raise self._save_failed(save_error.saved_field_names)
+
+        self._saved(fields_to_save)
+
+    def _saved(self, fields_to_save):
+        """
+        Record that the fields in `fields_to_save`, as returned by
+        `_get_fields_to_save`, have been saved.
+        """
+        self._update_block_structure(fields_to_save)
+        self._sharded_parts_saved(fields_to_save)
 
         # Remove all dirty fields, since the save was successful
         self._clear_dirty_fields()
 
+    def _update_block_structure(self, saved_field_names):
+        """
+        Record the newly saved children or parent of this block, if they are
+        in `saved_field_names`, in the runtime's block structure, if the
+        runtime keeps one.
+        """
+        structure_fields = [name for name in ('children', 'parent') if name in saved_field_names]
+        update_block_structure = getattr(self.runtime, 'update_block_structure', None)
+        if structure_fields and update_block_structure is not None:
+            update_block_structure(self, structure_fields)
+
+    def _save_failed(self, saved_field_names):
+        """
+        Record that only the fields in `saved_field_names` were saved, and
+        return the :class:`.XBlockSaveError` to raise.
+        """
+        self._update_block_structure(saved_field_names)
+        saved_sharded_fields = self._sharded_parts_saved(saved_field_names)
+        saved_fields = [
+            field for field in self._dirty_fields
+            if field.name in (saved_sharded_fields if isinstance(field, ShardedField) else saved_field_names)
+        ]
+        for field in saved_fields:
+            # should only find one corresponding field
+            del self._dirty_fields[field]
+        return XBlockSaveError(saved_fields, self._dirty_fields.keys())
+
+    def _sharded_parts_saved(self, saved_field_names):
+        """
+        Tell the values of the `ShardedField` fields with parts in
+        `saved_field_names` which of them were saved, and return the names of
+        those fields that have no changes left to save.
+        """
+        # pylint: disable=protected-access, no-member
+        saved = set()
+        for name in set(name.partition(SHARD_SEPARATOR)[0] for name in saved_field_names):
+            field = self.fields.get(name)
+            if isinstance(field, ShardedField):
+                value = field._get_cached_value(self)
+                value._saved(saved_field_names)
+                if not value._updates():
+                    saved.add(name)
+        return saved
+
     def _get_fields_to_save(self):
         """
         Create dictionary mapping between dirty fields and data cache values.
-        A `field` is an instance of `Field`.
+        A `field` is an instance of `Field`.  The values of `Dict` fields in
+        patch mode are :class:`~xblock.fields.DictPatch` values where
+        possible, and those of `Counter` fields are
+        :class:`~xblock.fields.CounterIncrement` values.
         """
         fields_to_save = {}
         for field in self._dirty_fields.keys():
             # If the field value isn't the same as the baseline we recorded
             # when it was read, then save it
             if field._is_dirty(self):  # pylint: disable=protected-access
-                fields_to_save[field.name] = field.to_json(self._field_data_cache[field.name])
+                value = field._get_cached_value(self)  # pylint: disable=protected-access
+                if isinstance(field, ShardedField):
+                    # Only the changed parts are written, each under its own name
+                    fields_to_save.update(value._updates())  # pylint: disable=protected-access
+                    continue
+                if isinstance(value, (TrackedList, TrackedDict)):
+                    # Don't hand the storage a container that refers back to this block
+                    value = copy.copy(value)
+                json_value = field.to_json(value)
+                if isinstance(field, Dict) and field.patch:
+                    json_value = field.to_json_patch(self._dirty_fields[field], json_value)
+                elif isinstance(field, Counter):
+                    json_value = field.to_json_increment(self._dirty_fields[field], json_value)
+                fields_to_save[field.name] = json_value
         return fields_to_save
 
     def _clear_dirty_fields(self):
         """
         Remove all dirty fields from an XBlock.
         """
-        self._dirty_fields.clear()
+        self._field_baselines[:] = [NOT_DIRTY] * len(self._field_baselines)
 
     @classmethod
     def parse_xml(cls, node, runtime, keys, id_generator):
@@ -362,6 +500,9 @@ class XBlock(Plugin):
         # Attributes become fields.
         for name, value in node.items():
             if name in block.fields:
+                field = block.fields[name]
+                if isinstance(field, _JSON_XML_FIELDS):
+                    value = field.from_json(json.loads(value))
                 setattr(block, name, value)
 
         # Text content becomes "content", if such a field exists.
@@ -387,7 +528,10 @@ class XBlock(Plugin):
             if field_name in ('children', 'parent', 'content'):
                 continue
             if field.is_set_on(self):
-                node.set(field_name, unicode(field.read_from(self)))
+                if isinstance(field, _JSON_XML_FIELDS):
+                    node.set(field_name, json.dumps(field.read_json(self)))
+                else:
+                    node.set(field_name, unicode(field.read_from(self)))
 
         # Add children for each of our children.
         if self.has_children:
@@ -36,6 +36,29 @@ class XBlockSaveError(Exception):
         self.dirty_fields = dirty_fields
 
 
+class XBlocksSaveError(XBlockSaveError):
+    """
+    Raised to indicate an error in saving several XBlocks together
+    """
+    def __init__(self, errors):
+        """
+        Create a new XBlocksSaveError
+
+        `errors` - a list of (block, XBlockSaveError) pairs, one for each
+        block that wasn't completely saved, describing which of its fields
+        were saved and which were left dirty
+
+        `saved_fields` and `dirty_fields` list the fields of all of those blocks.
+        """
+        XBlockSaveError.__init__(
+            self,
+            [field for _, error in errors for field in error.saved_fields],
+            [field for _, error in errors for field in error.dirty_fields],
+        )
+
+        self.errors = errors
+
+
 class KeyValueMultiSaveError(Exception):
     """
     Raised to indicated an error in saving multiple fields in a KeyValueStore
@@ -5,12 +5,88 @@ provide varied persistence backends while keeping the API used by the `XBlock`
 simple.
 """
 
+import atexit
 import copy
+import logging
+import sys
+import threading
+import time
+import weakref
 
 from abc import ABCMeta, abstractmethod
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 
-from xblock.exceptions import InvalidScopeError
+from xblock.exceptions import InvalidScopeError, KeyValueMultiSaveError
+from xblock.fields import (
+    BlockScope, CounterIncrement, DictPatch, Field, Scope, ShardedField, UserScope,
+    NO_CACHE_VALUE, NO_DEFAULT, NO_VALUE, SHARD_SEPARATOR,
+)
+from xblock.lru import LRUCache
+
+
+log = logging.getLogger(__name__)
+
+# The ScopeIds attribute that identifies the block part of a key for each BlockScope
+_BLOCK_SCOPE_ATTRS = {
+    BlockScope.ALL: None,
+    BlockScope.USAGE: 'usage_id',
+    BlockScope.DEFINITION: 'def_id',
+    BlockScope.TYPE: 'block_type',
+}
+
+# Cache of key recipes, a dict keyed by field name for each block class
+_KEY_RECIPES = weakref.WeakKeyDictionary()
+
+# Whether each FieldData class overrides the reads its single-call lookup skips
+_READS_OVERRIDDEN = weakref.WeakKeyDictionary()
+
+
+def field_key_recipe(field):
+    """
+    Return how to identify the storage of `field`, as described for
+    :func:`key_recipe`.
+    """
+    if field.scope in (Scope.children, Scope.parent):
+        block_attr = 'usage_id'
+        user_attr = None
+    else:
+        block_attr = _BLOCK_SCOPE_ATTRS[field.scope.block]
+        user_attr = 'user_id' if field.scope.user == UserScope.ONE else None
+    return (field.scope, user_attr, block_attr)
+
+
+def key_recipe(block_class, name):
+    """
+    Return how to identify the storage of the field `name` of `block_class`.
+
+    The recipe is a tuple of the field's scope, and the names of the
+    :class:`~xblock.fields.ScopeIds` attributes that identify the user and
+    the block the value belongs to (None when the value isn't specific to a
+    user or a block). Recipes are computed once per class and field name,
+    and are forgotten along with the class.
+    The parts of the value of a :class:`~xblock.fields.ShardedField`, named
+    with :data:`~xblock.fields.SHARD_SEPARATOR`, use the recipe of their field.
+
+    :raises KeyError: when `name` isn't a field of `block_class`
+    """
+    recipes = _KEY_RECIPES.get(block_class)
+    if recipes is None:
+        recipes = _KEY_RECIPES[block_class] = {}
+    try:
+        return recipes[name]
+    except KeyError:
+        pass
+
+    field = getattr(block_class, name, None)
+    if not isinstance(field, Field):
+        field_name, separator, _ = name.partition(SHARD_SEPARATOR)
+        if separator and isinstance(getattr(block_class, field_name, None), ShardedField):
+            # The parts of a ShardedField are stored like the field itself
+            return key_recipe(block_class, field_name)
+        raise KeyError(name)
+
+    recipe = recipes[name] = field_key_recipe(field)
+    return recipe
 
 
 class FieldData(object):
@@ -91,6 +167,80 @@ class FieldData(object):
         for key, value in update_dict.items():
             self.set(block, key, value)
 
+    def get_many(self, block, names):
+        """
+        Retrieve the values of many fields on an XBlock simultaneously.
+
+        Returns a map from each name in `names` that has a value to that value.
+        Names without a value are left out of the result. The default
+        implementation retrieves each field through `get`.
+
+        :param block: block to inspect
+        :type block: :class:`~xblock.core.XBlock`
+        :param names: field names to look up
+        :type names: iterable of `str`
+        """
+        values = {}
+        for name in names:
+            try:
+                values[name] = self.get(block, name)
+            except KeyError:
+                pass
+        return values
+
+    def get_many_for_blocks(self, blocks, names):
+        """
+        Retrieve the values of many fields on many XBlocks simultaneously.
+
+        Returns a list with an entry for each block in `blocks`, mapping each
+        name in `names` that is a field of the block and has a value to that
+        value.  The default implementation calls `get_many` for each block;
+        FieldData backed by a remote store will want to override it to make a
+        single call.
+
+        :param blocks: blocks to inspect
+        :type blocks: list of :class:`~xblock.core.XBlock`
+        :param names: field names to look up
+        :type names: iterable of `str`
+        """
+        names = list(names)
+        return [
+            self.get_many(block, [name for name in names if name in block.fields])
+            for block in blocks
+        ]
+
+    def set_many_for_blocks(self, blocks, updates):
+        """
+        Update many fields on many XBlocks simultaneously.
+
+        The default implementation calls `set_many` for each block; FieldData
+        backed by a remote store will want to override it to make a single
+        call.
+
+        If any of the fields aren't saved, raises
+        :class:`~xblock.exceptions.KeyValueMultiSaveError`, whose
+        `saved_field_names` is a list with an entry for each block in `blocks`,
+        listing the names of the fields that were saved on that block.
+
+        :param blocks: the blocks to update
+        :type blocks: list of :class:`~xblock.core.XBlock`
+        :param updates: a list with an entry for each block in `blocks`, mapping
+            the names of the fields to update on that block to their new values
+        :type updates: list of dict
+        """
+        saved_field_names = []
+        failed = False
+        for block, update_dict in zip(blocks, updates):
+            try:
+                self.set_many(block, update_dict)
+            except KeyValueMultiSaveError as save_error:
+                failed = True
+                saved_field_names.append(list(save_error.saved_field_names))
+            else:
+                saved_field_names.append(list(update_dict))
+        if failed:
+            raise KeyValueMultiSaveError(saved_field_names)
+
     def default(self, block, name):  # pylint: disable=unused-argument
         """
         Get the default value for this field which may depend on context or may just be the field's global
@@ -104,6 +254,50 @@ class FieldData(object):
         """
         raise KeyError(repr(name))
 
+    def lookup(self, block, name, with_default=True):
+        """
+        Retrieve the value for the field named `name` for the XBlock `block`, falling
+        back to its context default, without raising `KeyError`.
+
+        Returns the stored value if there is one. Otherwise, returns
+        :data:`~xblock.fields.NO_VALUE` if `with_default` is False, the value of
+        `default` if there is a context default, and :data:`~xblock.fields.NO_DEFAULT`
+        if there isn't. The default implementation combines `has`, `get` and
+        `default`; FieldData backed by a remote store will want to override it to
+        make a single call.
+
+        :param block: block to inspect
+        :type block: :class:`~xblock.core.XBlock`
+        :param name: field name to look up
+        :type name: str
+        :param with_default: whether to look up the context default when no value is stored
+        :type with_default: bool
+        """
+        if self.has(block, name):
+            return self.get(block, name)
+        if not with_default:
+            return NO_VALUE
+        try:
+            return self.default(block, name)
+        except KeyError:
+            return NO_DEFAULT
+
+    def _reads_overridden(self, base_class):
+        """
+        Return whether the class of this FieldData overrides the `has`, `get`
+        or `default` methods of `base_class`, in which case the single-call
+        `lookup` of `base_class` would skip them, and mustn't be used.
+        """
+        cls = type(self)
+        overrides = _READS_OVERRIDDEN.setdefault(cls, {})
+        overridden = overrides.get(base_class)
+        if overridden is None:
+            overridden = overrides[base_class] = any(
+                getattr(cls, name).__func__ is not getattr(base_class, name).__func__
+                for name in ('has', 'get', 'default')
+            )
+        return overridden
+
 
 class DictFieldData(FieldData):
     """
@@ -127,6 +321,22 @@ class DictFieldData(FieldData):
     def set_many(self, block, update_dict):
         self._data.update(copy.deepcopy(update_dict))
 
+    def get_many(self, block, names):
+        return copy.deepcopy(dict((name, self._data[name]) for name in names if name in self._data))
+
+    def lookup(self, block, name, with_default=True):
+        if self._reads_overridden(DictFieldData):
+            return super(DictFieldData, self).lookup(block, name, with_default)
+        value = self._data.get(name, NO_VALUE)
+        if value is not NO_VALUE:
+            return copy.deepcopy(value)
+        if not with_default:
+            return NO_VALUE
+        try:
+            return self.default(block, name)
+        except KeyError:
+            return NO_DEFAULT
+
 
 class SplitFieldData(FieldData):
     """
@@ -147,7 +357,11 @@ class SplitFieldData(FieldData):
 
     def _field_data(self, block, name):
         """Return the field data for the field `name` on the :class:`~xblock.core.XBlock` `block`"""
-        scope = block.fields[name].scope
+        try:
+            scope = key_recipe(block.__class__, name)[0]
+        except KeyError:
+            # A field hidden by an attribute that isn't a field is still one of the block's fields
+            scope = block.fields[name].scope
 
         if scope not in self._scope_mappings:
             raise InvalidScopeError(scope)
@@ -167,6 +381,68 @@ class SplitFieldData(FieldData):
         for field_data, update_dict in update_dicts.items():
             field_data.set_many(block, update_dict)
 
+    def get_many(self, block, names):
+        names_by_field_data = defaultdict(list)
+        for name in names:
+            names_by_field_data[self._field_data(block, name)].append(name)
+
+        values = {}
+        for field_data, field_data_names in names_by_field_data.items():
+            values.update(field_data.get_many(block, field_data_names))
+        return values
+
+    def set_many_for_blocks(self, blocks, updates):
+        updates_by_field_data = defaultdict(lambda: [{} for _ in blocks])
+        for index, (block, update_dict) in enumerate(zip(blocks, updates)):
+            for name, value in update_dict.iteritems():
+                updates_by_field_data[self._field_data(block, name)][index][name] = value
+
+        saved_field_names = [[] for _ in blocks]
+        failed = False
+        for field_data, field_data_updates in updates_by_field_data.items():
+            indices = [index for index, update_dict in enumerate(field_data_updates) if update_dict]
+            try:
+                field_data.set_many_for_blocks(
+                    [blocks[index] for index in indices],
+                    [field_data_updates[index] for index in indices],
+                )
+            except KeyValueMultiSaveError as save_error:
+                failed = True
+                for index, names in zip(indices, save_error.saved_field_names):
+                    saved_field_names[index].extend(names)
+            else:
+                for index in indices:
+                    saved_field_names[index].extend(field_data_updates[index])
+        if failed:
+            raise KeyValueMultiSaveError(saved_field_names)
+
+    def get_many_for_blocks(self, blocks, names):
+        names = list(names)
+        blocks_by_field_data = defaultdict(set)
+        names_by_field_data = defaultdict(set)
+        for index, block in enumerate(blocks):
+            for name in names:
+                if name in block.fields:
+                    field_data = self._field_data(block, name)
+                    blocks_by_field_data[field_data].add(index)
+                    names_by_field_data[field_data].add(name)
+
+        values = [{} for _ in blocks]
+        for field_data, indices in blocks_by_field_data.items():
+            indices = sorted(indices)
+            field_data_values = field_data.get_many_for_blocks(
+                [blocks[index] for index in indices],
+                names_by_field_data[field_data],
+            )
+            for index, block_values in zip(indices, field_data_values):
+                block = blocks[index]
+                # The same name may be stored elsewhere for blocks of other classes
+                values[index].update(
+                    (name, value) for name, value in block_values.iteritems()
+                    if self._field_data(block, name) is field_data
+                )
+        return values
+
     def delete(self, block, name):
         self._field_data(block, name).delete(block, name)
 
@@ -176,6 +452,11 @@ class SplitFieldData(FieldData):
     def default(self, block, name):
         return self._field_data(block, name).default(block, name)
 
+    def lookup(self, block, name, with_default=True):
+        if self._reads_overridden(SplitFieldData):
+            return super(SplitFieldData, self).lookup(block, name, with_default)
+        return self._field_data(block, name).lookup(block, name, with_default)
+
 
 class ReadOnlyFieldData(FieldData):
     """
@@ -197,5 +478,793 @@ class ReadOnlyFieldData(FieldData):
     def has(self, block, name):
         return self._source.has(block, name)
 
+    def get_many(self, block, names):
+        return self._source.get_many(block, names)
+
+    def get_many_for_blocks(self, blocks, names):
+        return self._source.get_many_for_blocks(blocks, names)
+
+    def set_many_for_blocks(self, blocks, updates):
+        for block, update_dict in zip(blocks, updates):
+            for name in update_dict:
+                raise InvalidScopeError("{block}.{name} is read-only, cannot set".format(block=block, name=name))
+
+    def default(self, block, name):
+        return self._source.default(block, name)
+
+    def lookup(self, block, name, with_default=True):
+        if self._reads_overridden(ReadOnlyFieldData):
+            return super(ReadOnlyFieldData, self).lookup(block, name, with_default)
+        return self._source.lookup(block, name, with_default)
+
+
+# Values that can be handed out from a cache without copying them first
+_IMMUTABLE_TYPES = (basestring, int, long, float, type(None))
+
+
+def _copy_value(value):
+    """Return a copy of `value` that can be mutated without changing the original."""
+    if isinstance(value, _IMMUTABLE_TYPES):
+        return value
+    return copy.deepcopy(value)
+
+
+class CachingFieldData(FieldData):
+    """
+    A FieldData that wraps another FieldData and remembers what it has read.
+
+    Stored values, whether fields have stored values, and context defaults are
+    cached per scope, user, block and field name, so blocks that share storage
+    (such as the content of blocks with the same definition) share entries.
+    `set`, `set_many` and `delete` invalidate the values they change.
+
+    The cache doesn't see writes made around it, so it is meant to live for a
+    single request. It holds at most `maxsize` values and `maxsize` defaults,
+    evicting the least recently used, and counts its `hits` and `misses`.
+    """
+    def __init__(self, source, maxsize=10000):
+        """
+        :param source: the FieldData to read through to
+        :type source: :class:`~xblock.field_data.FieldData`
+        :param maxsize: the number of values (and of defaults) to keep, or None for no limit
+        :type maxsize: int
+        """
+        self._source = source
+        self._values = LRUCache(maxsize)
+        self._defaults = LRUCache(maxsize)
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return "<{0.__class__.__name__} {0._source!r}>".format(self)
+
+    def _cache_key(self, block, name):
+        """
+        Return the key that the field `name` of `block` is cached under, or None
+        if `name` isn't a field of `block`.
+        """
+        try:
+            scope, user_attr, block_attr = key_recipe(block.__class__, name)
+        except KeyError:
+            return None
+        scope_ids = block.scope_ids
+        return (
+            scope,
+            getattr(scope_ids, user_attr) if user_attr is not None else None,
+            getattr(scope_ids, block_attr) if block_attr is not None else None,
+            name,
+        )
+
+    def _stored_value(self, block, name, cache_key):
+        """Return the stored value of the field `name`, or NO_VALUE if it has none."""
+        value = self._values.get(cache_key, NO_CACHE_VALUE)
+        if value is NO_CACHE_VALUE:
+            self.misses += 1
+            value = self._values[cache_key] = self._source.lookup(block, name, False)
+        else:
+            self.hits += 1
+        return value
+
+    def _default_value(self, block, name, cache_key):
+        """Return the context default of the field `name`, or NO_DEFAULT if it has none."""
+        value = self._defaults.get(cache_key, NO_CACHE_VALUE)
+        if value is NO_CACHE_VALUE:
+            self.misses += 1
+            try:
+                value = self._source.default(block, name)
+            except KeyError:
+                value = NO_DEFAULT
+            self._defaults[cache_key] = value
+        else:
+            self.hits += 1
+        return value
+
+    def get(self, block, name):
+        cache_key = self._cache_key(block, name)
+        if cache_key is None:
+            return self._source.get(block, name)
+        value = self._stored_value(block, name, cache_key)
+        if value is NO_VALUE:
+            raise KeyError(repr(name))
+        return _copy_value(value)
+
+    def has(self, block, name):
+        cache_key = self._cache_key(block, name)
+        if cache_key is None:
+            return self._source.has(block, name)
+        return self._stored_value(block, name, cache_key) is not NO_VALUE
+
+    def default(self, block, name):
+        cache_key = self._cache_key(block, name)
+        if cache_key is None:
+            return self._source.default(block, name)
+        value = self._default_value(block, name, cache_key)
+        if value is NO_DEFAULT:
+            raise KeyError(repr(name))
+        return _copy_value(value)
+
+    def lookup(self, block, name, with_default=True):
+        if self._reads_overridden(CachingFieldData):
+            return super(CachingFieldData, self).lookup(block, name, with_default)
+        cache_key = self._cache_key(block, name)
+        if cache_key is None:
+            return self._source.lookup(block, name, with_default)
+        value = self._stored_value(block, name, cache_key)
+        if value is NO_VALUE:
+            if not with_default:
+                return NO_VALUE
+            value = self._default_value(block, name, cache_key)
+            if value is NO_DEFAULT:
+                return NO_DEFAULT
+        return _copy_value(value)
+
+    def get_many(self, block, names):
+        values = {}
+        uncached = {}
+        for name in names:
+            cache_key = self._cache_key(block, name)
+            value = NO_CACHE_VALUE if cache_key is None else self._values.get(cache_key, NO_CACHE_VALUE)
+            if value is NO_CACHE_VALUE:
+                uncached[name] = cache_key
+            else:
+                self.hits += 1
+                if value is not NO_VALUE:
+                    values[name] = _copy_value(value)
+
+        if uncached:
+            self.misses += len(uncached)
+            loaded = self._source.get_many(block, uncached.keys())
+            for name, cache_key in uncached.items():
+                value = loaded.get(name, NO_VALUE)
+                if cache_key is not None:
+                    self._values[cache_key] = value
+                if value is not NO_VALUE:
+                    values[name] = _copy_value(value)
+        return values
+
+    def get_many_for_blocks(self, blocks, names):
+        names = list(names)
+        values = [{} for _ in blocks]
+        uncached = []
+        uncached_names = set()
+        for index, block in enumerate(blocks):
+            block_uncached = {}
+            for name in names:
+                if name not in block.fields:
+                    continue
+                cache_key = self._cache_key(block, name)
+                value = NO_CACHE_VALUE if cache_key is None else self._values.get(cache_key, NO_CACHE_VALUE)
+                if value is NO_CACHE_VALUE:
+                    block_uncached[name] = cache_key
+                else:
+                    self.hits += 1
+                    if value is not NO_VALUE:
+                        values[index][name] = _copy_value(value)
+            if block_uncached:
+                uncached.append((index, block_uncached))
+                uncached_names.update(block_uncached)
+
+        if uncached:
+            self.misses += sum(len(block_uncached) for _, block_uncached in uncached)
+            loaded = self._source.get_many_for_blocks([blocks[index] for index, _ in uncached], uncached_names)
+            for (index, block_uncached), block_loaded in zip(uncached, loaded):
+                for name, cache_key in block_uncached.items():
+                    value = block_loaded.get(name, NO_VALUE)
+                    if cache_key is not None:
+                        self._values[cache_key] = value
+                    if value is not NO_VALUE:
+                        values[index][name] = _copy_value(value)
+        return values
+
+    def set(self, block, name, value):
+        self._values.pop(self._cache_key(block, name))
+        self._source.set(block, name, value)
+
+    def set_many(self, block, update_dict):
+        for name in update_dict:
+            self._values.pop(self._cache_key(block, name))
+        self._source.set_many(block, update_dict)
+
+    def set_many_for_blocks(self, blocks, updates):
+        for block, update_dict in zip(blocks, updates):
+            for name in update_dict:
+                self._values.pop(self._cache_key(block, name))
+        self._source.set_many_for_blocks(blocks, updates)
+
+    def delete(self, block, name):
+        self._values.pop(self._cache_key(block, name))
+        self._source.delete(block, name)
+
+
+def _approximate_size(value):
+    """Estimate the number of bytes of memory used by the JSON-like `value`."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for key, item in value.iteritems():
+            size += _approximate_size(key) + _approximate_size(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            size += _approximate_size(item)
+    return size
+
+
+class SharedFieldCache(object):
+    """
+    A process-wide cache of field values that are the same for every user.
+
+    Values are cached by scope, block scope id and field name (a
+    :class:`~xblock.runtime.KeyValueStore.Key` without its user_id), along with
+    the version of their block when they were read. Writing to a block
+    invalidates its cached values by moving it to a new version.
+
+    Versions are counted in this process, so writes made by other processes
+    aren't seen. Runtimes with several worker processes should override
+    `version` to also reflect a token shared between processes, such as the
+    time a course was last published.
+
+    The cache is thread-safe. It holds values totalling roughly `max_size`
+    bytes, evicting the least recently used, and counts its `hits` and `misses`.
+    It remembers the versions of at most `max_versions` written blocks; when
+    it forgets one, every value cached for a block it doesn't remember is
+    invalidated.
+    """
+    def __init__(self, max_size=64 * 1024 * 1024, max_versions=10000):
+        """
+        :param max_size: the approximate number of bytes of values to keep
+        :type max_size: int
+        :param max_versions: the number of written blocks to remember the versions of
+        :type max_versions: int
+        """
+        self.max_size = max_size
+        self.max_versions = max_versions
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = LRUCache()
+        self._versions = LRUCache()
+        self._last_version = 0
+        self._base_version = 0
+        self._lock = threading.Lock()
+
+    def version(self, block_scope, block_scope_id):
+        """
+        Return the current version of the values stored for `block_scope_id`.
+
+        :param block_scope: the :class:`~xblock.fields.BlockScope` that `block_scope_id` identifies a block in
+        :param block_scope_id: the definition id, usage id, block type or None identifying the block
+        """
+        with self._lock:
+            return self._versions.get((block_scope, block_scope_id), self._base_version)
+
+    def invalidate(self, block_scope, block_scope_id):
+        """
+        Invalidate all of the values cached for `block_scope_id`.
+        """
+        with self._lock:
+            self._last_version += 1
+            self._versions[(block_scope, block_scope_id)] = self._last_version
+            if len(self._versions) > self.max_versions:
+                # Forgotten blocks move past every version handed out so far,
+                # so none of the values cached for them can be read again
+                while len(self._versions) > self.max_versions:
+                    self._versions.popitem()
+                self._base_version = self._last_version
+
+    def get(self, key, version):
+        """
+        Return the value cached under `key` at `version`, or NO_CACHE_VALUE if there is none.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == version:
+                    self.hits += 1
+                    return entry[1]
+                self._discard(key)
+            self.misses += 1
+            return NO_CACHE_VALUE
+
+    def set(self, key, version, value):
+        """
+        Cache `value` under `key`, as read at `version`.
+        """
+        size = _approximate_size(value)
+        if size > self.max_size:
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (version, value, size)
+            self.size += size
+            while self.size > self.max_size:
+                _, (_, _, evicted_size) = self._entries.popitem()
+                self.size -= evicted_size
+
+    def clear(self):
+        """Remove all cached values."""
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _discard(self, key):
+        """Remove the entry for `key`, if there is one. Must be called with the lock held."""
+        entry = self._entries.pop(key)
+        if entry is not None:
+            self.size -= entry[2]
+
+
+class SharedCachingFieldData(FieldData):
+    """
+    A FieldData that wraps another FieldData, reading fields that are the same
+    for every user through a process-wide :class:`SharedFieldCache`.
+
+    Only fields whose scope has a :class:`~xblock.fields.UserScope` of NONE,
+    such as `Scope.content` and `Scope.settings`, are cached. Writes through
+    this FieldData invalidate the cached values of the blocks they change.
+    Context defaults aren't cached.
+    """
+    def __init__(self, source, cache):
+        """
+        :param source: the FieldData to read through to
+        :type source: :class:`~xblock.field_data.FieldData`
+        :param cache: the cache shared by all requests in this process
+        :type cache: :class:`SharedFieldCache`
+        """
+        self._source = source
+        self._cache = cache
+
+    def __repr__(self):
+        return "<{0.__class__.__name__} {0._source!r}>".format(self)
+
+    def _shared_key(self, block, name):
+        """
+        Return the key and the version key the field `name` of `block` is cached
+        under, or (None, None) if its values aren't shared between users.
+        """
+        try:
+            scope, _, block_attr = key_recipe(block.__class__, name)
+        except KeyError:
+            return None, None
+        if scope in (Scope.children, Scope.parent) or scope.user != UserScope.NONE:
+            return None, None
+        block_scope_id = getattr(block.scope_ids, block_attr) if block_attr is not None else None
+        return (scope, block_scope_id, name), (scope.block, block_scope_id)
+
+    def _stored_value(self, block, name, key, version_key):
+        """Return the stored value of the field `name`, or NO_VALUE if it has none."""
+        version = self._cache.version(*version_key)
+        value = self._cache.get(key, version)
+        if value is NO_CACHE_VALUE:
+            value = self._source.lookup(block, name, False)
+            self._cache.set(key, version, value)
+        return value
+
+    def get(self, block, name):
+        key, version_key = self._shared_key(block, name)
+        if key is None:
+            return self._source.get(block, name)
+        value = self._stored_value(block, name, key, version_key)
+        if value is NO_VALUE:
+            raise KeyError(repr(name))
+        return _copy_value(value)
+
+    def has(self, block, name):
+        key, version_key = self._shared_key(block, name)
+        if key is None:
+            return self._source.has(block, name)
+        return self._stored_value(block, name, key, version_key) is not NO_VALUE
+
+    def default(self, block, name):
+        return self._source.default(block, name)
+
+    def lookup(self, block, name, with_default=True):
+        if self._reads_overridden(SharedCachingFieldData):
+            return super(SharedCachingFieldData, self).lookup(block, name, with_default)
+        key, version_key = self._shared_key(block, name)
+        if key is None:
+            return self._source.lookup(block, name, with_default)
+        value = self._stored_value(block, name, key, version_key)
+        if value is not NO_VALUE:
+            return _copy_value(value)
+        if not with_default:
+            return NO_VALUE
+        try:
+            return self._source.default(block, name)
+        except KeyError:
+            return NO_DEFAULT
+
+    def get_many(self, block, names):
+        values = {}
+        uncached = {}
+        for name in names:
+            key, version_key = self._shared_key(block, name)
+            if key is None:
+                uncached[name] = None
+                continue
+            version = self._cache.version(*version_key)
+            value = self._cache.get(key, version)
+            if value is NO_CACHE_VALUE:
+                uncached[name] = (key, version)
+            elif value is not NO_VALUE:
+                values[name] = _copy_value(value)
+
+        if uncached:
+            loaded = self._source.get_many(block, uncached.keys())
+            for name, cache_entry in uncached.items():
+                value = loaded.get(name, NO_VALUE)
+                if cache_entry is not None:
+                    self._cache.set(cache_entry[0], cache_entry[1], value)
+                if value is not NO_VALUE:
+                    values[name] = _copy_value(value)
+        return values
+
+    def get_many_for_blocks(self, blocks, names):
+        names = list(names)
+        values = [{} for _ in blocks]
+        uncached = []
+        uncached_names = set()
+        for index, block in enumerate(blocks):
+            block_uncached = {}
+            for name in names:
+                if name not in block.fields:
+                    continue
+                key, version_key = self._shared_key(block, name)
+                if key is None:
+                    block_uncached[name] = None
+                    continue
+                version = self._cache.version(*version_key)
+                value = self._cache.get(key, version)
+                if value is NO_CACHE_VALUE:
+                    block_uncached[name] = (key, version)
+                elif value is not NO_VALUE:
+                    values[index][name] = _copy_value(value)
+            if block_uncached:
+                uncached.append((index, block_uncached))
+                uncached_names.update(block_uncached)
+
+        if uncached:
+            loaded = self._source.get_many_for_blocks([blocks[index] for index, _ in uncached], uncached_names)
+            for (index, block_uncached), block_loaded in zip(uncached, loaded):
+                for name, cache_entry in block_uncached.items():
+                    value = block_loaded.get(name, NO_VALUE)
+                    if cache_entry is not None:
+                        self._cache.set(cache_entry[0], cache_entry[1], value)
+                    if value is not NO_VALUE:
+                        values[index][name] = _copy_value(value)
+        return values
+
+    def _invalidate(self, block, names):
+        """Invalidate the shared values of the blocks that the fields `names` of `block` are stored with."""
+        for name in names:
+            key, version_key = self._shared_key(block, name)
+            if key is not None:
+                self._cache.invalidate(*version_key)
+
+    def set(self, block, name, value):
+        self._source.set(block, name, value)
+        self._invalidate(block, [name])
+
+    def set_many(self, block, update_dict):
+        try:
+            self._source.set_many(block, update_dict)
+        finally:
+            # Some of the fields may have been saved even if the write failed
+            self._invalidate(block, update_dict)
+
+    def set_many_for_blocks(self, blocks, updates):
+        try:
+            self._source.set_many_for_blocks(blocks, updates)
+        finally:
+            for block, update_dict in zip(blocks, updates):
+                self._invalidate(block, update_dict)
+
+    def delete(self, block, name):
+        self._source.delete(block, name)
+        self._invalidate(block, [name])
+
+
+# The DebouncingFieldData instances whose held values are written as the process exits
+_DEBOUNCING_FIELD_DATA = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_debouncing_field_data():
+    """Write the values held by every DebouncingFieldData, as the process exits."""
+    for field_data in list(_DEBOUNCING_FIELD_DATA):
+        try:
+            field_data.flush()
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Couldn't write the values held by %r", field_data)
+
+
+class _HeldValue(object):
+    """
+    A value that a :class:`DebouncingFieldData` holds for the field `name` of
+    a block, which is known by its class and scope ids rather than kept alive.
+    """
+    __slots__ = ('block_ref', 'block_class', 'scope_ids', 'name', 'value', 'deadline', 'size')
+
+    def __init__(self, block, name, value, deadline, size):
+        self.block_ref = weakref.ref(block)
+        self.block_class = block.__class__
+        self.scope_ids = block.scope_ids
+        self.name = name
+        self.value = value
+        self.deadline = deadline
+        self.size = size
+
+    def block(self):
+        """Return the block to write the value for, or a bare instance of its class if it is gone."""
+        block = self.block_ref()
+        if block is None:
+            block = self.block_class.__new__(self.block_class)
+            block.runtime = None
+            block.scope_ids = self.scope_ids
+        return block
+
+
+class DebouncingFieldData(FieldData):
+    """
+    A FieldData that wraps another FieldData, holding back the writes of
+    fields declared with `debounce=True`, so that repeated saves are written
+    together.
+
+    The first save of a debounced field is held for `window` seconds, and saves
+    made in the meantime replace the held value, which is then written with
+    the next write through this FieldData, or with :meth:`flush`.  If the
+    values held total more than roughly `max_held_size` bytes, the oldest are
+    written at once.  Reads through this FieldData see the held values.
+    Values that can't be written with a later write are logged and held
+    again; only :meth:`flush` raises the errors of writing held values.
+
+    There is no timer: a value whose window has passed is only written with
+    the next write through this FieldData.  The host must call :meth:`flush`
+    as a user's session ends (passing their user id), and periodically for
+    values that nothing else would write; those still held as the process
+    exits are written then.  Held values refer to their blocks by class and
+    scope ids, so they don't keep the blocks alive.
+    Held values aren't seen by other processes, so only fields that are read
+    back by the same process, such as the position in a video a student is
+    watching, should be debounced.
+
+    `field_names` names further fields to debounce, as a runtime policy for
+    fields declared without `debounce=True`.  This FieldData is thread-safe.
+    """
+    def __init__(self, source, window=30, max_held_size=1024 * 1024, field_names=(), clock=time.time):
+        """
+        :param source: the FieldData to write to
+        :type source: :class:`~xblock.field_data.FieldData`
+        :param window: the number of seconds to hold the first save of a field for
+        :param max_held_size: the approximate number of bytes of values to hold at most
+        :param field_names: the names of fields to debounce as well as those declared with `debounce=True`
+        :param clock: a function returning the current time, in seconds
+        """
+        self._source = source
+        self.window = window
+        self.max_held_size = max_held_size
+        self._field_names = frozenset(field_names)
+        self._clock = clock
+        # key -> _HeldValue, in the order they were first held
+        self._held = OrderedDict()
+        self._held_size = 0
+        self._lock = threading.Lock()
+        _DEBOUNCING_FIELD_DATA.add(self)
+
+    def __repr__(self):
+        return "<{0.__class__.__name__} {0._source!r}>".format(self)
+
+    def __len__(self):
+        return len(self._held)
+
+    def _held_key(self, block, name):
+        """
+        Return the key the field `name` of `block` is held under, or None if it
+        isn't debounced.
+        """
+        field = block.fields.get(name)
+        if field is None or not (field.debounce or name in self._field_names):
+            return None
+        scope, user_attr, block_attr = key_recipe(block.__class__, name)
+        scope_ids = block.scope_ids
+        return (
+            scope,
+            getattr(scope_ids, user_attr) if user_attr is not None else None,
+            getattr(scope_ids, block_attr) if block_attr is not None else None,
+            name,
+        )
+
+    def _held_value(self, block, name):
+        """Return the value held for the field `name` of `block`, or NO_VALUE if there isn't one."""
+        key = self._held_key(block, name)
+        if key is None:
+            return NO_VALUE
+        with self._lock:
+            held = self._held.get(key)
+            return NO_VALUE if held is None else _copy_value(held.value)
+
+    def get(self, block, name):
+        value = self._held_value(block, name)
+        if value is NO_VALUE:
+            return self._source.get(block, name)
+        return value
+
+    def has(self, block, name):
+        return self._held_value(block, name) is not NO_VALUE or self._source.has(block, name)
+
     def default(self, block, name):
         return self._source.default(block, name)
+
+    def lookup(self, block, name, with_default=True):
+        if self._reads_overridden(DebouncingFieldData):
+            return super(DebouncingFieldData, self).lookup(block, name, with_default)
+        value = self._held_value(block, name)
+        if value is NO_VALUE:
+            return self._source.lookup(block, name, with_default)
+        return value
+
+    def get_many(self, block, names):
+        names = list(names)
+        values = self._source.get_many(block, names)
+        for name in names:
+            value = self._held_value(block, name)
+            if value is not NO_VALUE:
+                values[name] = value
+        return values
+
+    def get_many_for_blocks(self, blocks, names):
+        names = list(names)
+        values = self._source.get_many_for_blocks(blocks, names)
+        for block, block_values in zip(blocks, values):
+            for name in names:
+                value = self._held_value(block, name) if name in block.fields else NO_VALUE
+                if value is not NO_VALUE:
+                    block_values[name] = value
+        return values
+
+    def _hold(self, block, update_dict):
+        """
+        Hold the values in `update_dict` of the fields of `block` that are
+        debounced, returning a dict of the other values.
+        """
+        now = self._clock()
+        immediate = {}
+        with self._lock:
+            for name, value in update_dict.iteritems():
+                key = self._held_key(block, name)
+                if key is None:
+                    immediate[name] = value
+                    continue
+                if isinstance(value, DictPatch):
+                    # A later patch would only hold the changes since this one
+                    value = dict(value)
+                held = self._held.get(key)
+                if isinstance(value, CounterIncrement) and held is not None:
+                    # Coalesced increments add up, and follow a held whole value
+                    if isinstance(held.value, CounterIncrement):
+                        # pylint: disable=maybe-no-member
+                        value = CounterIncrement(value, held.value.delta + value.delta)
+                    else:
+                        value = int(value)
+                size = _approximate_size(value)
+                if held is None:
+                    self._held[key] = _HeldValue(block, name, value, now + self.window, size)
+                else:
+                    self._held_size -= held.size
+                    held.block_ref, held.value, held.size = weakref.ref(block), value, size
+                self._held_size += size
+        return immediate
+
+    def _take(self, due_only=True, user_id=None):
+        """
+        Remove and return the held entries to write: those whose window has
+        passed (or all of them, if not `due_only`), those of `user_id` if it
+        is given, and the oldest while the held values are too big.
+        """
+        now = self._clock()
+        with self._lock:
+            taken = []
+            for key, held in self._held.items():
+                if (
+                        (not due_only and (user_id is None or held.scope_ids.user_id == user_id)) or
+                        (due_only and held.deadline <= now) or
+                        self._held_size > self.max_held_size
+                ):
+                    del self._held[key]
+                    self._held_size -= held.size
+                    taken.append((key, held))
+            return taken
+
+    def _write(self, taken):
+        """
+        Write the held entries `taken`, holding again any that couldn't be
+        written, and re-raising the error if there were any.
+        """
+        if not taken:
+            return
+        blocks = []
+        updates = []
+        positions = {}
+        for _, held in taken:
+            block_key = (held.block_class, held.scope_ids)
+            if block_key not in positions:
+                positions[block_key] = len(blocks)
+                blocks.append(held.block())
+                updates.append({})
+            updates[positions[block_key]][held.name] = held.value
+
+        try:
+            self._source.set_many_for_blocks(blocks, updates)
+        except Exception as save_error:  # pylint: disable=broad-except
+            saved = set()
+            if isinstance(save_error, KeyValueMultiSaveError):
+                saved = set(
+                    (position, name)
+                    for position, names in enumerate(save_error.saved_field_names)
+                    for name in names
+                )
+            with self._lock:
+                for key, held in taken:
+                    position = positions[(held.block_class, held.scope_ids)]
+                    if (position, held.name) not in saved and key not in self._held:
+                        self._held[key] = held
+                        self._held_size += held.size
+            raise
+
+    def _write_due(self):
+        """
+        Write the held values whose window has passed, logging any error, as
+        the values that couldn't be written are held again for a later write.
+        """
+        try:
+            self._write(self._take())
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Couldn't write the values held by %r", self)
+
+    def flush(self, user_id=None):
+        """
+        Write all of the values held, or only those of `user_id` if it is given.
+        """
+        self._write(self._take(due_only=False, user_id=user_id))
+
+    def set(self, block, name, value):
+        self.set_many(block, {name: value})
+
+    def set_many(self, block, update_dict):
+        immediate = self._hold(block, update_dict)
+        if immediate:
+            self._source.set_many(block, immediate)
+        self._write_due()
+
+    def set_many_for_blocks(self, blocks, updates):
+        immediate = [self._hold(block, update_dict) for block, update_dict in zip(blocks, updates)]
+        if any(immediate):
+            self._source.set_many_for_blocks(blocks, immediate)
+        self._write_due()
+
+    def delete(self, block, name):
+        key = self._held_key(block, name)
+        if key is not None:
+            with self._lock:
+                held = self._held.pop(key, None)
+                if held is not None:
+                    self._held_size -= held.size
+        self._source.delete(block, name)
@@ -6,16 +6,32 @@ for each scope.
 
 """
 
-from collections import namedtuple
+from collections import MutableMapping, namedtuple
+import array
+import base64
+import collections
 import copy
 import datetime
 import dateutil.parser
+import dateutil.tz
 import itertools
 import logging
+import operator
+import os
 import pytz
+import re
+import sys
+import threading
 import traceback
 import warnings
 
+try:
+    import numpy  # pylint: disable=F0401
+except ImportError:
+    numpy = None  # pylint: disable=invalid-name
+
+from xblock.lru import LRUCache
+
 
 # __all__ controls what classes end up in the docs, and in what order.
 __all__ = [
@@ -40,6 +56,100 @@ class ModifyingEnforceTypeWarning(DeprecationWarning):
     pass
 
 
+class FieldValidation(object):
+    """
+    How fields that don't enforce their types check the values set on them.
+
+    Fields declared with `enforce_type=True` always enforce their types.  The
+    other fields, in each mode:
+
+    * ``off``: set values without calling `enforce_type` at all.
+    * ``sampled``: call `enforce_type` for one in every `sample_rate` values
+      set, and count the values that it would reject or change in `counters`,
+      instead of warning about them.
+    * ``warn``: call `enforce_type` for every value set, and warn about the
+      values it would reject or change.  This is the default.
+    * ``strict``: enforce the type of every value set, as if every field had
+      been declared with `enforce_type=True`.
+
+    The mode of :data:`FIELD_VALIDATION` is read from the
+    ``XBLOCK_FIELD_VALIDATION`` environment variable when xblock is imported,
+    as the name of the mode, with the sample rate after a colon for sampled
+    validation (for example, ``sampled:1000``), and can be changed with
+    :meth:`configure`.
+    """
+    OFF = 'off'
+    SAMPLED = 'sampled'
+    WARN = 'warn'
+    STRICT = 'strict'
+    MODES = (OFF, SAMPLED, WARN, STRICT)
+
+    ENVIRONMENT_VARIABLE = 'XBLOCK_FIELD_VALIDATION'
+    DEFAULT_SAMPLE_RATE = 100
+
+    def __init__(self, mode=WARN, sample_rate=DEFAULT_SAMPLE_RATE):
+        self.mode = self.WARN
+        self.sample_rate = self.DEFAULT_SAMPLE_RATE
+        self.counters = collections.Counter()
+        self._sets = itertools.count()
+        self._lock = threading.Lock()
+        self.configure(mode, sample_rate)
+
+    def configure(self, mode, sample_rate=None):
+        """
+        Change the validation mode, and the sample rate if `sample_rate` is given.
+
+        Raises ValueError if `mode` isn't one of `MODES`, or if `sample_rate`
+        isn't a positive integer.
+        """
+        if mode not in self.MODES:
+            raise ValueError("Unknown field validation mode: {!r}".format(mode))
+        if sample_rate is not None:
+            sample_rate = int(sample_rate)
+            if sample_rate < 1:
+                raise ValueError("The sample rate must be at least 1, not {}".format(sample_rate))
+            self.sample_rate = sample_rate
+        # Keep the constant, so that fields can compare modes by identity
+        self.mode = self.MODES[self.MODES.index(mode)]
+
+    def configure_from_environ(self, environ=None):
+        """
+        Configure the mode from the ``XBLOCK_FIELD_VALIDATION`` variable in
+        `environ` (by default, `os.environ`), if it is set.  An invalid value
+        is logged and ignored.
+        """
+        setting = (os.environ if environ is None else environ).get(self.ENVIRONMENT_VARIABLE)
+        if not setting:
+            return
+        mode, _, sample_rate = setting.strip().partition(':')
+        try:
+            self.configure(mode, sample_rate or None)
+        except ValueError:
+            logging.warn("Ignoring invalid %s setting %r", self.ENVIRONMENT_VARIABLE, setting)
+
+    def should_sample(self):
+        """Return whether the value now being set should be checked, in sampled mode."""
+        return next(self._sets) % self.sample_rate == 0
+
+    def record(self, outcome, field_name):
+        """
+        Count a sampled value of the field `field_name` that `enforce_type`
+        would have rejected (`outcome` is 'failed') or changed ('modified').
+        """
+        with self._lock:
+            self.counters[outcome, field_name] += 1
+
+    def reset_counters(self):
+        """Forget the counts of sampled values."""
+        with self._lock:
+            self.counters.clear()
+
+
+# The validation used by all fields
+FIELD_VALIDATION = FieldValidation()
+FIELD_VALIDATION.configure_from_environ()
+
+
 class Sentinel(object):
     """
     Class for implementing sentinel objects (only equal to themselves).
@@ -71,6 +181,18 @@ class Sentinel(object):
         """
         return hash(self.name)
 
+    def __copy__(self):
+        """
+        Sentinels aren't copied, so that they can be compared by identity
+        """
+        return self
+
+    def __deepcopy__(self, memo):  # pylint: disable=unused-argument
+        """
+        Nor are they deep copied
+        """
+        return self
+
 
 class BlockScope(object):
     """
@@ -240,11 +362,407 @@ NO_CACHE_VALUE = Sentinel("fields.NO_CACHE_VALUE")
 # because it was explicitly set
 EXPLICITLY_SET = Sentinel("fields.EXPLICITLY_SET")
 
+# define a placeholder value that marks a field without a dirty baseline in an
+# XBlock's slot storage ("None" may be a valid baseline, so we cannot use it).
+NOT_DIRTY = Sentinel("fields.NOT_DIRTY")
+
+# placeholder values returned by FieldData.lookup when a field has no stored
+# value: NO_VALUE if no default was asked for, and NO_DEFAULT if there was no
+# context default either, so the field's static default should be used.
+NO_VALUE = Sentinel("fields.NO_VALUE")
+NO_DEFAULT = Sentinel("fields.NO_DEFAULT")
+
 # Fields that cannot have runtime-generated defaults. These are special,
 # because they define the structure of XBlock trees.
 NO_GENERATED_DEFAULTS = ('parent', 'children')
 
 
+class SlotMapping(MutableMapping):
+    """
+    A dict-like view of one of the fixed-size lists in which an XBlock keeps
+    its cached field values and dirty baselines, indexed by the slots in
+    `_field_slots`.
+
+    Slots holding `empty` are treated as missing.  The view is keyed by field
+    name, or by :class:`Field` if `by_field` is True, so that code written
+    against the dicts the lists replaced keeps working.
+    """
+    __slots__ = ('_xblock', '_attr', '_empty', '_by_field')
+
+    def __init__(self, xblock, attr, empty, by_field=False):
+        self._xblock = xblock
+        self._attr = attr
+        self._empty = empty
+        self._by_field = by_field
+
+    def _slot(self, key):
+        """Return the slot of `key`, raising KeyError if it isn't a field of the block."""
+        return self._xblock._field_slots[key.name if self._by_field else key]  # pylint: disable=protected-access
+
+    def __getitem__(self, key):
+        value = getattr(self._xblock, self._attr)[self._slot(key)]
+        if value is self._empty:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        getattr(self._xblock, self._attr)[self._slot(key)] = value
+
+    def __delitem__(self, key):
+        items = getattr(self._xblock, self._attr)
+        slot = self._slot(key)
+        if items[slot] is self._empty:
+            raise KeyError(key)
+        items[slot] = self._empty
+
+    def __iter__(self):
+        items = getattr(self._xblock, self._attr)
+        fields = self._xblock.fields
+        for name, slot in self._xblock._field_slots.iteritems():  # pylint: disable=protected-access
+            if items[slot] is not self._empty:
+                yield fields[name] if self._by_field else name
+
+    def __len__(self):
+        # Compare by identity alone, so that no field value's __eq__ is called
+        return sum(itertools.imap(operator.is_not, getattr(self._xblock, self._attr), itertools.repeat(self._empty)))
+
+    def __nonzero__(self):
+        return any(itertools.imap(operator.is_not, getattr(self._xblock, self._attr), itertools.repeat(self._empty)))
+
+    def replace(self, mapping):
+        """Empty every slot, then fill the slots of the keys in `mapping` with their values."""
+        items = getattr(self._xblock, self._attr)
+        slots = [(self._slot(key), value) for key, value in dict(mapping).iteritems()]
+        items[:] = [self._empty] * len(items)
+        for slot, value in slots:
+            items[slot] = value
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class TrackedList(list):
+    """
+    A list that marks its owning field dirty whenever it is mutated in place.
+
+    Used by fields declared with ``track_mutations=True``, so that reading
+    the field doesn't need a deep-copied baseline to detect changes.  Only
+    mutations of the list itself are tracked, not mutations of the objects
+    it contains.
+    """
+    __slots__ = ('_xblock', '_field')
+
+    def __init__(self, iterable, xblock, field):
+        super(TrackedList, self).__init__(iterable)
+        self._xblock = xblock
+        self._field = field
+
+    def _changed(self):
+        """Mark the owning field as dirty on the owning xblock."""
+        # pylint: disable=protected-access
+        self._field._mark_mutated(self._xblock, self)
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(list(self), memo)
+
+    def __reduce__(self):
+        return (list, (list(self),))
+
+    def __setitem__(self, index, value):
+        super(TrackedList, self).__setitem__(index, value)
+        self._changed()
+
+    def __delitem__(self, index):
+        super(TrackedList, self).__delitem__(index)
+        self._changed()
+
+    def __setslice__(self, i, j, sequence):
+        super(TrackedList, self).__setslice__(i, j, sequence)
+        self._changed()
+
+    def __delslice__(self, i, j):
+        super(TrackedList, self).__delslice__(i, j)
+        self._changed()
+
+    def __iadd__(self, other):
+        result = super(TrackedList, self).__iadd__(other)
+        self._changed()
+        return result
+
+    def __imul__(self, count):
+        result = super(TrackedList, self).__imul__(count)
+        self._changed()
+        return result
+
+    def append(self, value):
+        super(TrackedList, self).append(value)
+        self._changed()
+
+    def extend(self, iterable):
+        super(TrackedList, self).extend(iterable)
+        self._changed()
+
+    def insert(self, index, value):
+        super(TrackedList, self).insert(index, value)
+        self._changed()
+
+    def pop(self, *args):
+        result = super(TrackedList, self).pop(*args)
+        self._changed()
+        return result
+
+    def remove(self, value):
+        super(TrackedList, self).remove(value)
+        self._changed()
+
+    def reverse(self):
+        super(TrackedList, self).reverse()
+        self._changed()
+
+    def sort(self, *args, **kwargs):
+        super(TrackedList, self).sort(*args, **kwargs)
+        self._changed()
+
+
+class TrackedDict(dict):
+    """
+    A dict that marks its owning field dirty whenever it is mutated in place.
+
+    The dict counterpart of :class:`TrackedList`.  Only mutations of the dict
+    itself are tracked, not mutations of the values it contains.
+    """
+    __slots__ = ('_xblock', '_field')
+
+    def __init__(self, mapping, xblock, field):
+        super(TrackedDict, self).__init__(mapping)
+        self._xblock = xblock
+        self._field = field
+
+    def _changed(self):
+        """Mark the owning field as dirty on the owning xblock."""
+        # pylint: disable=protected-access
+        self._field._mark_mutated(self._xblock, self)
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+    def __setitem__(self, key, value):
+        super(TrackedDict, self).__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        super(TrackedDict, self).__delitem__(key)
+        self._changed()
+
+    def clear(self):
+        super(TrackedDict, self).clear()
+        self._changed()
+
+    def pop(self, *args):
+        result = super(TrackedDict, self).pop(*args)
+        self._changed()
+        return result
+
+    def popitem(self):
+        result = super(TrackedDict, self).popitem()
+        self._changed()
+        return result
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+        result = super(TrackedDict, self).setdefault(key, default)
+        self._changed()
+        return result
+
+    def update(self, *args, **kwargs):
+        super(TrackedDict, self).update(*args, **kwargs)
+        self._changed()
+
+
+def _packed(typecode, values):
+    """
+    Return a new array of `typecode` holding `values`, copying the bytes of
+    arrays of the same typecode rather than converting each of their items.
+    """
+    result = array.array(typecode)
+    if isinstance(values, array.array) and values.typecode != typecode:
+        values = values.tolist()
+    array.array.extend(result, values)
+    return result
+
+
+class TrackedArray(array.array):
+    """
+    An array that marks its owning field dirty whenever it is changed in place.
+
+    The values of :class:`NumericArray` fields are tracked arrays, so that
+    reading the field doesn't need a copied baseline to detect changes.
+    Changes made through the buffer protocol, such as through a NumPy array
+    made with `numpy.frombuffer`, can't be seen, and must be followed by a call
+    to :meth:`mark_changed`.
+    """
+    __slots__ = ('_xblock', '_field')
+
+    def __new__(cls, typecode, initializer, xblock, field):  # pylint: disable=unused-argument
+        self = super(TrackedArray, cls).__new__(cls, typecode)
+        array.array.extend(self, _packed(typecode, initializer))
+        return self
+
+    def __init__(self, typecode, initializer, xblock, field):  # pylint: disable=unused-argument
+        super(TrackedArray, self).__init__()
+        self._xblock = xblock
+        self._field = field
+
+    def mark_changed(self):
+        """Mark the owning field as dirty on the owning xblock."""
+        # pylint: disable=protected-access
+        self._field._mark_mutated(self._xblock, self)
+
+    def add(self, values):
+        """
+        Add `values`, a number or a sequence as long as the array, to the
+        entries of the array, in place.
+
+        If NumPy is installed, the entries are updated by one vectorized
+        operation on the buffer of the array.  Otherwise, :mod:`array` has no
+        vectorized arithmetic, so the sums are computed one Python number at a
+        time into a new array, which replaces the entries in a single slice
+        assignment.
+        """
+        if not isinstance(values, (int, long, float)) and len(values) != len(self):
+            raise ValueError('Can only add a number or a sequence of the same length')
+        if self._vectorized('add', values):
+            return
+        if isinstance(values, (int, long, float)):
+            values = itertools.repeat(values, len(self))
+        self[:] = array.array(self.typecode, itertools.imap(operator.add, self, values))
+
+    def scale(self, factor):
+        """
+        Multiply the entries of the array by `factor`, in place, vectorized
+        as for :meth:`add`.
+        """
+        if self._vectorized('multiply', factor):
+            return
+        self[:] = array.array(self.typecode, itertools.imap(operator.mul, self, itertools.repeat(factor, len(self))))
+
+    def _vectorized(self, ufunc_name, operand):
+        """
+        Apply the NumPy ufunc named `ufunc_name` to the entries and `operand`,
+        writing the results back through the buffer of the array.
+
+        Results that the array couldn't hold raise the `TypeError` or
+        `OverflowError` that assigning them to it would.  Returns False,
+        leaving the array unchanged, if NumPy isn't installed, the array is
+        empty, or its buffer can't be written.
+        """
+        if numpy is None or not self:
+            return False
+        view = numpy.frombuffer(self, dtype=self.typecode)
+        if not view.flags.writeable:
+            return False
+        ufunc = getattr(numpy, ufunc_name)
+        if view.dtype.kind == 'f':
+            ufunc(view, operand, out=view)
+        else:
+            # Work in 64 bits, so that results out of the range of the typecode can be found
+            result = ufunc(view.astype(numpy.int64), operand)
+            if result.dtype.kind not in 'iu':
+                raise TypeError('integer argument expected, got float')
+            limits = numpy.iinfo(view.dtype)
+            if result.min() < limits.min or result.max() > limits.max:
+                raise OverflowError('result out of range for typecode %r' % self.typecode)
+            view[:] = result
+        self.mark_changed()
+        return True
+
+    def __copy__(self):
+        return _packed(self.typecode, self)
+
+    def __deepcopy__(self, memo):  # pylint: disable=unused-argument
+        return _packed(self.typecode, self)
+
+    def __reduce__(self):
+        return (array.array, (self.typecode, list(self)))
+
+    def __setitem__(self, index, value):
+        super(TrackedArray, self).__setitem__(index, value)
+        self.mark_changed()
+
+    def __delitem__(self, index):
+        super(TrackedArray, self).__delitem__(index)
+        self.mark_changed()
+
+    def __setslice__(self, i, j, sequence):
+        super(TrackedArray, self).__setslice__(i, j, sequence)
+        self.mark_changed()
+
+    def __delslice__(self, i, j):
+        super(TrackedArray, self).__delslice__(i, j)
+        self.mark_changed()
+
+    def __iadd__(self, other):
+        result = super(TrackedArray, self).__iadd__(other)
+        self.mark_changed()
+        return result
+
+    def __imul__(self, count):
+        result = super(TrackedArray, self).__imul__(count)
+        self.mark_changed()
+        return result
+
+    def append(self, value):
+        super(TrackedArray, self).append(value)
+        self.mark_changed()
+
+    def extend(self, iterable):
+        super(TrackedArray, self).extend(iterable)
+        self.mark_changed()
+
+    def insert(self, index, value):
+        super(TrackedArray, self).insert(index, value)
+        self.mark_changed()
+
+    def pop(self, *args):
+        result = super(TrackedArray, self).pop(*args)
+        self.mark_changed()
+        return result
+
+    def remove(self, value):
+        super(TrackedArray, self).remove(value)
+        self.mark_changed()
+
+    def reverse(self):
+        super(TrackedArray, self).reverse()
+        self.mark_changed()
+
+    def byteswap(self):
+        super(TrackedArray, self).byteswap()
+        self.mark_changed()
+
+    def fromlist(self, values):
+        super(TrackedArray, self).fromlist(values)
+        self.mark_changed()
+
+    def fromstring(self, string):
+        super(TrackedArray, self).fromstring(string)
+        self.mark_changed()
+
+    def fromfile(self, infile, count):
+        super(TrackedArray, self).fromfile(infile, count)
+        self.mark_changed()
+
+
 class Field(object):
     """
     A field class that can be used as a class attribute to define what data the
@@ -277,6 +795,16 @@ class Field(object):
             possible to convert it. This provides a guarantee on the stored
             value type.
 
+        track_mutations: whether list and dict values loaded by this field
+            should record in-place changes as they happen, rather than being
+            deep-copied on every read and compared on save. Only changes to
+            the top-level list or dict are detected, so nested values must be
+            reassigned to be saved (defaults to False).
+
+        debounce: whether repeated saves of this field may be held back and
+            written together, by a runtime using
+            :class:`~xblock.field_data.DebouncingFieldData` (defaults to False).
+
         kwargs: optional runtime-specific options/metadata. Will be stored as
             runtime_options.
 
@@ -287,10 +815,13 @@ class Field(object):
     # We're OK redefining built-in `help`
     # pylint: disable=W0622
     def __init__(self, help=None, default=UNSET, scope=Scope.content,
-                 display_name=None, values=None, enforce_type=False, **kwargs):
+                 display_name=None, values=None, enforce_type=False,
+                 track_mutations=False, debounce=False, **kwargs):
         self._name = "unknown"
         self.help = help
         self._enable_enforce_type = enforce_type
+        self._track_mutations = track_mutations
+        self.debounce = debounce
         if default is not UNSET:
             self._default = self._check_or_enforce_type(default)
         self.scope = scope
@@ -355,16 +886,29 @@ class Field(object):
         """
         return self._display_name if self._display_name is not None else self.name
 
+    # XBlocks keep cached values and dirty baselines in the fixed-size lists
+    # `_field_values` and `_field_baselines`, at the slot their class assigned
+    # to each field.  Other objects using fields keep them in the dicts
+    # `_field_data_cache` and `_dirty_fields`.
+
     def _get_cached_value(self, xblock):
         """
         Return a value from the xblock's cache, or a marker value if either the cache
         doesn't exist or the value is not found in the cache.
         """
+        # pylint: disable=protected-access
+        values = getattr(xblock, '_field_values', None)
+        if values is not None:
+            return values[xblock._field_slots[self.name]]
         return getattr(xblock, '_field_data_cache', {}).get(self.name, NO_CACHE_VALUE)
 
     def _set_cached_value(self, xblock, value):
         """Store a value in the xblock's cache, creating the cache if necessary."""
         # pylint: disable=protected-access
+        values = getattr(xblock, '_field_values', None)
+        if values is not None:
+            values[xblock._field_slots[self.name]] = value
+            return
         if not hasattr(xblock, '_field_data_cache'):
             xblock._field_data_cache = {}
         xblock._field_data_cache[self.name] = value
@@ -372,7 +916,10 @@ class Field(object):
     def _del_cached_value(self, xblock):
         """Remove a value from the xblock's cache, if the cache exists."""
         # pylint: disable=protected-access
-        if hasattr(xblock, '_field_data_cache') and self.name in xblock._field_data_cache:
+        values = getattr(xblock, '_field_values', None)
+        if values is not None:
+            values[xblock._field_slots[self.name]] = NO_CACHE_VALUE
+        elif hasattr(xblock, '_field_data_cache') and self.name in xblock._field_data_cache:
             del xblock._field_data_cache[self.name]
 
     def _mark_dirty(self, xblock, value):
@@ -381,19 +928,80 @@ class Field(object):
 
         # Deep copy the value being marked as dirty, so that there
         # is a baseline to check against when saving later
-        if self not in xblock._dirty_fields:
+        baselines = getattr(xblock, '_field_baselines', None)
+        if baselines is not None:
+            slot = xblock._field_slots[self.name]
+            if baselines[slot] is NOT_DIRTY:
+                baselines[slot] = copy.deepcopy(value)
+        elif self not in xblock._dirty_fields:
             xblock._dirty_fields[self] = copy.deepcopy(value)
 
+    def _clear_dirty(self, xblock):
+        """Forget that this field is dirty on the xblock, if it was."""
+        # pylint: disable=protected-access
+        baselines = getattr(xblock, '_field_baselines', None)
+        if baselines is not None:
+            baselines[xblock._field_slots[self.name]] = NOT_DIRTY
+        else:
+            xblock._dirty_fields.pop(self, None)
+
+    def _mark_mutated(self, xblock, value):
+        """
+        Record that the tracked `value` cached for this field was changed in place.
+        """
+        # Values orphaned by a later set or delete no longer belong to the field
+        if self._get_cached_value(xblock) is value:
+            self._mark_dirty(xblock, EXPLICITLY_SET)
+
+    def _track(self, xblock, value):
+        """
+        Wrap a freshly loaded `value` so that in-place changes mark this field dirty.
+
+        Values that aren't lists or dicts are returned unchanged.
+        """
+        if isinstance(value, list):
+            return TrackedList(value, xblock, self)
+        if isinstance(value, dict):
+            return TrackedDict(value, xblock, self)
+        return value
+
+    def _set_loaded_value(self, xblock, value):
+        """
+        Cache `value`, the stored JSON value of this field read ahead of time, as
+        though it had been read by `__get__`.
+
+        A value that is already cached is kept.
+        """
+        if self._get_cached_value(xblock) is NO_CACHE_VALUE:
+            value = self.from_json(value)
+            if self._track_mutations:
+                value = self._track(xblock, value)
+            self._set_cached_value(xblock, value)
+
+    def _is_tracked(self, xblock, value):
+        """Return whether `value` records its own changes to this field on `xblock`."""
+        # pylint: disable=protected-access
+        return (
+            isinstance(value, (TrackedList, TrackedDict, TrackedArray)) and
+            value._xblock is xblock and
+            value._field is self
+        )
+
     def _is_dirty(self, xblock):
         """
         Return whether this field should be saved when xblock.save() is called
         """
         # pylint: disable=protected-access
-        if self not in xblock._dirty_fields:
+        baselines = getattr(xblock, '_field_baselines', None)
+        if baselines is not None:
+            baseline = baselines[xblock._field_slots[self.name]]
+            if baseline is NOT_DIRTY:
+                return False
+        elif self in xblock._dirty_fields:
+            baseline = xblock._dirty_fields[self]
+        else:
             return False
-
-        baseline = xblock._dirty_fields[self]
-        return baseline is EXPLICITLY_SET or xblock._field_data_cache[self.name] != baseline
+        return baseline is EXPLICITLY_SET or self._get_cached_value(xblock) != baseline
 
     def _check_or_enforce_type(self, value):
         """
@@ -404,9 +1012,19 @@ class Field(object):
         To aid with migration, enable the warnings with:
             warnings.simplefilter("always", FailingEnforceTypeWarning)
             warnings.simplefilter("always", ModifyingEnforceTypeWarning)
+
+        Fields that don't enforce their types are checked according to the
+        mode of :data:`FIELD_VALIDATION`.
         """
-        if self._enable_enforce_type:
+        mode = FIELD_VALIDATION.mode
+        if self._enable_enforce_type or mode is FieldValidation.STRICT:
             return self.enforce_type(value)
+        if mode is FieldValidation.OFF:
+            return value
+        if mode is FieldValidation.SAMPLED:
+            if FIELD_VALIDATION.should_sample():
+                self._sample_enforce_type(value)
+            return value
 
         try:
             new_value = self.enforce_type(value)
@@ -422,6 +1040,16 @@ class Field(object):
 
         return value
 
+    def _sample_enforce_type(self, value):
+        """Count whether self.enforce_type would reject or change `value`."""
+        try:
+            new_value = self.enforce_type(value)
+        except Exception:  # pylint: disable=broad-except
+            FIELD_VALIDATION.record('failed', self._name)
+        else:
+            if value != new_value:
+                FIELD_VALIDATION.record('modified', self._name)
+
     def __get__(self, xblock, xblock_class):
         """
         Gets the value of this xblock. Prioritizes the cached value over
@@ -432,23 +1060,39 @@ class Field(object):
         if xblock is None:
             return self
 
+        reads = getattr(xblock, '_field_reads', None)
+        if reads is not None:
+            reads.add(self._name)
+
         value = self._get_cached_value(xblock)
         if value is NO_CACHE_VALUE:
-            if xblock._field_data.has(xblock, self.name):
-                value = self.from_json(xblock._field_data.get(xblock, self.name))
+            field_data = xblock._field_data
+            if hasattr(type(field_data), 'lookup'):
+                # Read the stored value or the context default in a single call
+                value = field_data.lookup(xblock, self.name, self.name not in NO_GENERATED_DEFAULTS)
+                if value is NO_VALUE or value is NO_DEFAULT:
+                    value = self.default
+                else:
+                    value = self.from_json(value)
+            elif field_data.has(xblock, self.name):
+                # Objects standing in for a FieldData may only support has, get and default
+                value = self.from_json(field_data.get(xblock, self.name))
             elif self.name not in NO_GENERATED_DEFAULTS:
                 # Cache default value
                 try:
-                    value = self.from_json(xblock._field_data.default(xblock, self.name))
+                    value = self.from_json(field_data.default(xblock, self.name))
                 except KeyError:
                     value = self.default
             else:
                 value = self.default
+            if self._track_mutations:
+                value = self._track(xblock, value)
             self._set_cached_value(xblock, value)
 
         # If this is a mutable type, mark it as dirty, since mutations can occur without an
-        # explicit call to __set__ (but they do require a call to __get__)
-        if self.MUTABLE:
+        # explicit call to __set__ (but they do require a call to __get__). Tracked values
+        # mark themselves dirty when they are actually changed.
+        if self.MUTABLE and not (self._track_mutations and self._is_tracked(xblock, value)):
             self._mark_dirty(xblock, value)
 
         return value
@@ -483,15 +1127,15 @@ class Field(object):
         # We also need to clear this item from the dirty fields, to prevent
         # an erroneous write of its value on implicit save. OK if it was
         # not in the dirty fields to begin with.
-        try:
-            del xblock._dirty_fields[self]
-        except KeyError:
-            pass
+        self._clear_dirty(xblock)
 
         # Since we know that the field_data no longer contains the value, we can
         # avoid the possible database lookup that a future get() call would
         # entail by setting the cached value now to its default value.
-        self._set_cached_value(xblock, copy.deepcopy(self.default))
+        value = copy.deepcopy(self.default)
+        if self._track_mutations:
+            value = self._track(xblock, value)
+        self._set_cached_value(xblock, value)
 
     def __repr__(self):
         return "<{0.__class__.__name__} {0._name}>".format(self)
@@ -575,6 +1219,59 @@ class JSONField(Field):
     pass  # for now; we'll bubble functions down when we finish deprecation in Field
 
 
+def scalar_field(*unchanged_types):
+    """
+    A class decorator that gives an immutable scalar field class its own
+    `__get__` and `__set__`, specialized for that class as it is created.
+
+    The specialized methods read and write the slot storage of XBlocks
+    directly.  Values whose exact type is in `unchanged_types`, which
+    `enforce_type` returns unchanged, are set without calling it, and so
+    without the checks and warnings of `_check_or_enforce_type`.  Anything
+    else, including subclasses that may override `enforce_type`, falls back to
+    the generic :class:`Field` implementation.
+    """
+    unchanged_types = frozenset(unchanged_types)
+
+    def decorate(cls):
+        """Install the specialized methods on `cls`."""
+        assert not cls.MUTABLE, "Only immutable fields can skip dirty-tracking on read"
+        generic_get = Field.__get__
+
+        def __get__(self, xblock, xblock_class):
+            # pylint: disable=protected-access
+            if xblock is None:
+                return self
+            values = getattr(xblock, '_field_values', None)
+            if values is not None and xblock._field_reads is None:
+                value = values[xblock._field_slots[self._name]]
+                if value is not NO_CACHE_VALUE:
+                    return value
+            return generic_get(self, xblock, xblock_class)
+
+        def __set__(self, xblock, value):
+            # pylint: disable=protected-access
+            if type(value) not in unchanged_types or type(self) is not cls:
+                value = self._check_or_enforce_type(value)
+            baselines = getattr(xblock, '_field_baselines', None)
+            if baselines is None:
+                self._mark_dirty(xblock, EXPLICITLY_SET)
+                self._set_cached_value(xblock, value)
+                return
+            slot = xblock._field_slots[self._name]
+            if baselines[slot] is NOT_DIRTY:
+                baselines[slot] = EXPLICITLY_SET
+            xblock._field_values[slot] = value
+
+        __get__.__doc__ = Field.__get__.__doc__
+        __set__.__doc__ = Field.__set__.__doc__
+        cls.__get__ = __get__
+        cls.__set__ = __set__
+        return cls
+    return decorate
+
+
+@scalar_field(int, long, type(None))
 class Integer(JSONField):
     """
     A field that contains an integer.
@@ -597,6 +1294,100 @@ class Integer(JSONField):
     enforce_type = from_json
 
 
+class CounterIncrement(int):
+    """
+    The JSON value of a :class:`Counter` field being saved, along with
+    `delta`, the amount it was changed by since it was read.
+
+    It is the whole value, so storage that can't increment values can write it
+    as it is.
+    """
+    __slots__ = ('delta',)
+
+    def __new__(cls, value, delta):
+        self = super(CounterIncrement, cls).__new__(cls, value)
+        self.delta = delta
+        return self
+
+    def __reduce__(self):
+        return (int, (int(self),))
+
+
+class _CounterValue(int):
+    """
+    The value of a :class:`Counter` field as read from a block.
+
+    Adding to it or subtracting from it gives another `_CounterValue`, so that
+    the field can tell an increment, such as ``block.count += 1``, from an
+    assignment of a new value.
+    """
+    __slots__ = ()
+
+    def _increment(self, result):
+        """Return `result` as a `_CounterValue`, if it is an int."""
+        if type(result) is int:
+            return _CounterValue(result)
+        return result
+
+    def __add__(self, other):
+        return self._increment(super(_CounterValue, self).__add__(other))
+
+    def __radd__(self, other):
+        return self._increment(super(_CounterValue, self).__radd__(other))
+
+    def __sub__(self, other):
+        return self._increment(super(_CounterValue, self).__sub__(other))
+
+
+class Counter(Integer):
+    """
+    A field that contains a tally, such as a number of students who answered,
+    which many users may change at the same time.
+
+    Adding to or subtracting from the value read, as in ``block.count += 1``,
+    changes the tally by an increment.  Saving the field then hands the storage
+    a :class:`CounterIncrement` of the amount the tally was changed by since it
+    was read, so that storage which supports it can add that amount to the
+    stored value, rather than overwrite increments saved by other users in the
+    meantime.  The value on the block isn't updated with those increments until
+    it is read again.
+
+    Any other assignment, such as ``block.count = 0``, sets the tally to that
+    value, which is saved as it is.
+
+    """
+    _default = 0
+
+    def __get__(self, xblock, xblock_class):
+        value = super(Counter, self).__get__(xblock, xblock_class)
+        if type(value) is int:
+            return _CounterValue(value)
+        return value
+
+    def __set__(self, xblock, value):
+        if isinstance(value, _CounterValue):
+            value = self._check_or_enforce_type(int(value))
+            # The baseline is the value before the first change since the last save
+            self._mark_dirty(xblock, super(Counter, self).__get__(xblock, xblock.__class__))
+        else:
+            value = self._check_or_enforce_type(value)
+            # Save an assigned value as it is, not as an increment
+            self._clear_dirty(xblock)
+            self._mark_dirty(xblock, EXPLICITLY_SET)
+        self._set_cached_value(xblock, value)
+
+    def to_json_increment(self, baseline, value):
+        """
+        Return the JSON `value` as a :class:`CounterIncrement` from `baseline`,
+        the value it had when it was read, or `value` unchanged if it can't be
+        expressed as an increment.
+        """
+        if baseline is EXPLICITLY_SET or value is None:
+            return value
+        return CounterIncrement(value, value - (self.to_json(baseline) or 0))
+
+
+@scalar_field(float, type(None))
 class Float(JSONField):
     """
     A field that contains a float.
@@ -616,6 +1407,7 @@ class Float(JSONField):
     enforce_type = from_json
 
 
+@scalar_field(bool)
 class Boolean(JSONField):
     """
     A field class for representing a boolean.
@@ -655,15 +1447,64 @@ class Boolean(JSONField):
     enforce_type = from_json
 
 
+class DictPatch(dict):
+    """
+    The JSON value of a :class:`Dict` field saved in patch mode, along with
+    the changes made to it since it was read.
+
+    It is the whole value, so storage that doesn't know about patches can
+    write it as it is.  `changed` maps each top-level key that was added or
+    given a new value to its value, and `deleted` lists the keys that were
+    removed.
+    """
+    __slots__ = ('changed', 'deleted')
+
+    def __init__(self, value, changed, deleted):
+        super(DictPatch, self).__init__(value)
+        self.changed = changed
+        self.deleted = deleted
+
+    def __reduce__(self):
+        return (dict, (dict(self),))
+
+
 class Dict(JSONField):
     """
     A field class for representing a Python dict.
 
     The value, as loaded or enforced, must be either be None or a dict.
 
+    If `patch` is True, saving the field hands the storage a
+    :class:`DictPatch` of the keys changed since the value was read, so that
+    storage which supports it can update those keys rather than rewrite the
+    whole dict.  Values that were assigned, rather than changed in place, and
+    values loaded with `track_mutations` are written whole.
+
     """
     _default = {}
 
+    def __init__(self, *args, **kwargs):
+        self.patch = kwargs.pop('patch', False)
+        super(Dict, self).__init__(*args, **kwargs)
+
+    def to_json_patch(self, baseline, value):
+        """
+        Return the JSON `value` as a :class:`DictPatch` against `baseline`,
+        the value it had when it was read, or `value` unchanged if it can't
+        be expressed as a patch.
+        """
+        if baseline is EXPLICITLY_SET or not isinstance(value, dict):
+            return value
+        baseline = self.to_json(baseline)
+        if not isinstance(baseline, dict):
+            return value
+        changed = dict(
+            (key, item) for key, item in value.iteritems()
+            if key not in baseline or baseline[key] != item
+        )
+        deleted = [key for key in baseline if key not in value]
+        return DictPatch(value, changed, deleted)
+
     def from_json(self, value):
         if value is None or isinstance(value, dict):
             return value
@@ -673,6 +1514,535 @@ class Dict(JSONField):
     enforce_type = from_json
 
 
+# The parts of the value of a ShardedField, such as the entries of a
+# ShardedDict, are stored under names made of the name of the field and the
+# key of the part, joined by SHARD_SEPARATOR.
+SHARD_SEPARATOR = '/'
+
+
+class ShardedEntries(MutableMapping):
+    """
+    The value of a :class:`ShardedDict` field on an XBlock.
+
+    Each entry is read from the block's field data the first time it is used,
+    and only the entries that were set, or that may have been changed in place,
+    are written when the block is saved.  The keys of the entries are stored
+    under the name of the field, and are read the first time they are needed.
+
+    Deleted entries are deleted from the field data when the block is saved,
+    once the keys without them have been written.
+    """
+    def __init__(self, xblock, field, stored=NO_VALUE):
+        self._xblock = xblock
+        self._field = field
+        # The stored value of the field itself is the list of keys of its entries
+        self._keys = set(stored or ()) if stored is not NO_VALUE else None
+        self._keys_changed = False
+        self._entries = {}
+        # Copies of the loaded entries that can be changed in place, to compare on save
+        self._baselines = {}
+        self._changed = set()
+        self._deleted = set()
+
+    def __repr__(self):
+        return "<{0.__class__.__name__} {1} of {2} entries loaded>".format(self, len(self._entries), len(self))
+
+    def _entry_name(self, key):
+        """Return the name the entry `key` is stored under."""
+        return self._field.name + SHARD_SEPARATOR + key
+
+    def _key_set(self):
+        """Return the set of keys of the entries, reading it if necessary."""
+        if self._keys is None:
+            try:
+                keys = self._xblock._field_data.get(self._xblock, self._field.name)  # pylint: disable=protected-access
+            except KeyError:
+                keys = None
+            self._keys = set(keys or ())
+        return self._keys
+
+    def _loaded(self, key, value):
+        """Record `value`, just read from the field data, as the value of the entry `key`."""
+        self._entries[key] = value
+        if isinstance(value, (list, dict)):
+            self._baselines[key] = copy.deepcopy(value)
+            self._field._mark_dirty(self._xblock, EXPLICITLY_SET)  # pylint: disable=protected-access
+
+    def load(self, keys):
+        """
+        Read all of the entries in `keys` that aren't loaded yet with a single
+        call to the field data.
+        """
+        names = dict(
+            (self._entry_name(key), key) for key in keys
+            if key not in self._entries and key in self._key_set()
+        )
+        if names:
+            values = self._xblock._field_data.get_many(self._xblock, list(names))  # pylint: disable=protected-access
+            for name, value in values.iteritems():
+                self._loaded(names[name], value)
+
+    def __getitem__(self, key):
+        if key not in self._entries:
+            if key not in self._key_set():
+                raise KeyError(key)
+            field_data = self._xblock._field_data  # pylint: disable=protected-access
+            try:
+                value = field_data.get(self._xblock, self._entry_name(key))
+            except KeyError:
+                raise KeyError(key)
+            self._loaded(key, value)
+        elif key in self._baselines:
+            # The entry may be changed in place, so it is checked on save
+            self._field._mark_dirty(self._xblock, EXPLICITLY_SET)  # pylint: disable=protected-access
+        return self._entries[key]
+
+    def __setitem__(self, key, value):
+        if not isinstance(key, basestring):
+            raise TypeError('Keys of a ShardedDict must be strings, found %s' % type(key))
+        keys = self._key_set()
+        if key not in keys:
+            keys.add(key)
+            self._keys_changed = True
+        self._entries[key] = value
+        self._baselines.pop(key, None)
+        self._changed.add(key)
+        self._deleted.discard(key)
+        self._field._mark_dirty(self._xblock, EXPLICITLY_SET)  # pylint: disable=protected-access
+
+    def __delitem__(self, key):
+        keys = self._key_set()
+        if key not in keys:
+            raise KeyError(key)
+        keys.remove(key)
+        self._deleted.add(key)
+        self._keys_changed = True
+        self._entries.pop(key, None)
+        self._baselines.pop(key, None)
+        self._changed.discard(key)
+        self._field._mark_dirty(self._xblock, EXPLICITLY_SET)  # pylint: disable=protected-access
+
+    def __contains__(self, key):
+        return key in self._key_set()
+
+    def clear(self):
+        # Delete the entries without reading them, as MutableMapping.clear would
+        for key in list(self._key_set()):
+            del self[key]
+
+    def __iter__(self):
+        return iter(sorted(self._key_set()))
+
+    def __len__(self):
+        return len(self._key_set())
+
+    def _updates(self):
+        """Return a dict of the names and values of the entries, and keys, to write."""
+        updates = dict((self._entry_name(key), self._entries[key]) for key in self._changed)
+        for key, baseline in self._baselines.iteritems():
+            if self._entries[key] != baseline:
+                updates[self._entry_name(key)] = self._entries[key]
+        if self._keys_changed:
+            updates[self._field.name] = sorted(self._keys)
+        return updates
+
+    def _saved(self, saved_names):
+        """Record that the entries, and keys, in `saved_names` were written."""
+        for name in saved_names:
+            field_name, separator, key = name.partition(SHARD_SEPARATOR)
+            if field_name != self._field.name:
+                continue
+            if not separator:
+                self._keys_changed = False
+                self._delete_pending()
+            elif key in self._entries:
+                self._changed.discard(key)
+                if isinstance(self._entries[key], (list, dict)):
+                    self._baselines[key] = copy.deepcopy(self._entries[key])
+
+    def _delete_pending(self):
+        """Delete the deleted entries from the field data."""
+        for key in sorted(self._deleted):
+            try:
+                self._xblock._field_data.delete(self._xblock, self._entry_name(key))  # pylint: disable=protected-access
+            except KeyError:
+                pass
+            self._deleted.discard(key)
+
+
+class ShardedField(JSONField):
+    """
+    Base class for fields whose values are stored in parts, so that using and
+    saving a value doesn't read or write all of it.
+
+    Each part is stored under the name of the field and the key of the part,
+    joined by `SHARD_SEPARATOR`, in the field's scope, and what is needed to
+    find the parts is stored under the name of the field itself.
+
+    The value of the field on a block is an instance of `entries_class`, made
+    with the block, the field, and the value stored under the field's name, or
+    :data:`NO_VALUE` if it hasn't been read.  It reads the parts it needs as
+    they are used.  Its `_updates` method returns a dict of the names and
+    values of the parts to write when the block is saved, and its `_saved`
+    method records which of those names were written.  Parts that are no
+    longer needed are deleted by its `_saved` method once the value stored
+    under the field's name has been written, or by its `_delete_pending`
+    method when the field is deleted.
+
+    """
+    entries_class = None
+
+    def __get__(self, xblock, xblock_class):
+        if xblock is None:
+            return self
+
+        reads = getattr(xblock, '_field_reads', None)
+        if reads is not None:
+            reads.add(self._name)
+
+        value = self._get_cached_value(xblock)
+        if value is NO_CACHE_VALUE:
+            value = self.entries_class(xblock, self)  # pylint: disable=not-callable
+            self._set_cached_value(xblock, value)
+        return value
+
+    def __delete__(self, xblock):
+        # Deleting the field deletes its parts at once, as it does the field itself
+        entries = self.__get__(xblock, xblock.__class__)
+        entries.clear()  # pylint: disable=maybe-no-member
+        entries._delete_pending()  # pylint: disable=protected-access, maybe-no-member
+        super(ShardedField, self).__delete__(xblock)
+        self._set_cached_value(xblock, self.entries_class(xblock, self, None))  # pylint: disable=not-callable
+
+    def _set_loaded_value(self, xblock, value):
+        if self._get_cached_value(xblock) is NO_CACHE_VALUE:
+            self._set_cached_value(xblock, self.entries_class(xblock, self, value))  # pylint: disable=not-callable
+
+
+class ShardedDict(ShardedField):
+    """
+    A field class for representing a large Python dict with string keys, each
+    of whose entries is stored separately.
+
+    The value is a :class:`ShardedEntries` mapping, which reads entries as they
+    are used, and writes only the entries that were changed when the block is
+    saved, rather than the whole dict.  Assigning a dict replaces all of the
+    entries.
+
+    The entries are only ever read from the field data, so a ShardedDict is
+    empty until entries are set.  It can't be declared with a `default`, and
+    context defaults aren't used.
+
+    """
+    _default = {}
+    entries_class = ShardedEntries
+
+    def __init__(self, *args, **kwargs):
+        # The default is the second positional argument of Field
+        if len(args) > 1 or kwargs.get('default', UNSET) is not UNSET:
+            raise ValueError('ShardedDict fields are always empty by default, and take no default')
+        super(ShardedDict, self).__init__(*args, **kwargs)
+
+    def __set__(self, xblock, value):
+        value = self._check_or_enforce_type(value)
+        entries = self.__get__(xblock, xblock.__class__)
+        entries.clear()  # pylint: disable=maybe-no-member
+        entries.update(value or {})  # pylint: disable=maybe-no-member
+
+    def to_json(self, value):
+        return dict(value) if value is not None else None
+
+    def from_json(self, value):
+        if value is None or isinstance(value, dict):
+            return value
+        else:
+            raise TypeError('Value stored in a ShardedDict must be None or a dict, found %s' % type(value))
+
+    enforce_type = from_json
+
+
+class LogEntries(object):
+    """
+    The value of an :class:`AppendLog` field on an XBlock.
+
+    The entries are kept in segments of a fixed number of entries, each stored
+    as a list under the name of the field and the number of the segment.  The
+    length of the log and the size of its segments are stored under the name
+    of the field.
+
+    Appending an entry reads at most the last segment, if it is partly
+    filled, and saving the block writes only the segments that entries were
+    appended to.  Reading entries, pages or the tail of the log reads only the
+    segments that hold them.  Entries shouldn't be changed once appended.
+
+    The segments of a cleared log are deleted from the field data when the
+    block is saved, once the new length has been written.
+    """
+    def __init__(self, xblock, field, stored=NO_VALUE):
+        self._xblock = xblock
+        self._field = field
+        self._length = None
+        self._segment_size = None
+        if stored is not NO_VALUE:
+            self._set_state(stored)
+        self._segments = {}
+        self._appended = set()
+        self._length_changed = False
+        self._deleted = set()
+
+    def __repr__(self):
+        return "<{0.__class__.__name__} {1} entries, {2} segments loaded>".format(
+            self, len(self), len(self._segments)
+        )
+
+    def _set_state(self, stored):
+        """Record the length and segment size of the log from `stored`, the value stored for the field."""
+        stored = stored or {}
+        self._length = stored.get('length', 0)
+        self._segment_size = stored.get('segment_size', self._field.segment_size)
+
+    def _ensure_state(self):
+        """Read the length and segment size of the log, if they haven't been read."""
+        if self._length is None:
+            field_data = self._xblock._field_data  # pylint: disable=protected-access
+            try:
+                stored = field_data.get(self._xblock, self._field.name)
+            except KeyError:
+                stored = None
+            self._set_state(stored)
+
+    def _segment_name(self, index):
+        """Return the name the segment `index` is stored under."""
+        return self._field.name + SHARD_SEPARATOR + str(index)
+
+    def _load_segments(self, indexes):
+        """Read all of the segments in `indexes` that aren't loaded yet with a single call to the field data."""
+        names = dict(
+            (self._segment_name(index), index) for index in indexes
+            if index not in self._segments
+        )
+        if names:
+            values = self._xblock._field_data.get_many(self._xblock, list(names))  # pylint: disable=protected-access
+            for name, index in names.iteritems():
+                self._segments[index] = list(values.get(name) or ())
+
+    def __len__(self):
+        self._ensure_state()
+        return self._length
+
+    def append(self, entry):
+        """Add `entry` to the end of the log."""
+        self._ensure_state()
+        index = self._length // self._segment_size
+        if index not in self._segments:
+            if self._length % self._segment_size:
+                self._load_segments([index])
+            else:
+                self._segments[index] = []
+        self._segments[index].append(entry)
+        self._appended.add(index)
+        self._deleted.discard(index)
+        self._length += 1
+        self._length_changed = True
+        self._field._mark_dirty(self._xblock, EXPLICITLY_SET)  # pylint: disable=protected-access
+
+    def extend(self, entries):
+        """Add all of `entries` to the end of the log."""
+        for entry in entries:
+            self.append(entry)
+
+    def page(self, start, count):
+        """Return a list of up to `count` entries, starting with the entry at `start`."""
+        length = len(self)
+        stop = min(start + count, length)
+        if stop <= start:
+            return []
+        first, last = start // self._segment_size, (stop - 1) // self._segment_size
+        self._load_segments(xrange(first, last + 1))
+        entries = []
+        for index in xrange(first, last + 1):
+            entries.extend(self._segments[index])
+        offset = first * self._segment_size
+        return entries[start - offset:stop - offset]
+
+    def tail(self, count=1):
+        """Return a list of the last `count` entries."""
+        return self.page(max(len(self) - count, 0), count)
+
+    def pages(self, page_size=None):
+        """
+        Iterate over the log in lists of `page_size` entries, one segment's
+        worth by default, reading segments as they are reached.
+        """
+        length = len(self)
+        page_size = page_size or self._segment_size
+        for start in xrange(0, length, page_size):
+            yield self.page(start, page_size)
+
+    def __iter__(self):
+        for page in self.pages():
+            for entry in page:
+                yield entry
+
+    def __getitem__(self, index):
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError('log index out of range')
+        return self.page(index, 1)[0]
+
+    def clear(self):
+        """Remove all of the entries, deleting their segments when the block is saved."""
+        self._deleted.update(xrange((len(self) + self._segment_size - 1) // self._segment_size))
+        self._segments.clear()
+        self._appended.clear()
+        self._length = 0
+        self._length_changed = True
+        self._field._mark_dirty(self._xblock, EXPLICITLY_SET)  # pylint: disable=protected-access
+
+    def _updates(self):
+        """Return a dict of the names and values of the segments, and length, to write."""
+        updates = dict((self._segment_name(index), list(self._segments[index])) for index in self._appended)
+        if self._length_changed:
+            updates[self._field.name] = {'length': self._length, 'segment_size': self._segment_size}
+        return updates
+
+    def _saved(self, saved_names):
+        """Record that the segments, and length, in `saved_names` were written."""
+        for name in saved_names:
+            field_name, separator, index = name.partition(SHARD_SEPARATOR)
+            if field_name != self._field.name:
+                continue
+            if not separator:
+                self._length_changed = False
+                self._delete_pending()
+            else:
+                self._appended.discard(int(index))
+
+    def _delete_pending(self):
+        """Delete the segments of the cleared log that weren't appended to again from the field data."""
+        field_data = self._xblock._field_data  # pylint: disable=protected-access
+        for index in sorted(self._deleted):
+            try:
+                field_data.delete(self._xblock, self._segment_name(index))
+            except KeyError:
+                pass
+            self._deleted.discard(index)
+
+
+class AppendLog(ShardedField):
+    """
+    A field class for representing a list that grows by appending, such as a
+    history of submissions or events.
+
+    The value is a :class:`LogEntries` log, stored in segments of
+    `segment_size` entries (defaults to 100), so that appending an entry and
+    saving the block writes at most one or two segments, rather than the whole
+    list.  Assigning a list replaces all of the entries.
+
+    The entries are only ever read from the field data, so an AppendLog is
+    empty until entries are appended.  It can't be declared with a `default`,
+    and context defaults aren't used.
+
+    """
+    _default = []
+    entries_class = LogEntries
+
+    def __init__(self, *args, **kwargs):
+        # The default is the second positional argument of Field
+        if len(args) > 1 or kwargs.get('default', UNSET) is not UNSET:
+            raise ValueError('AppendLog fields are always empty by default, and take no default')
+        self.segment_size = kwargs.pop('segment_size', 100)
+        super(AppendLog, self).__init__(*args, **kwargs)
+
+    def __set__(self, xblock, value):
+        value = self._check_or_enforce_type(value)
+        entries = self.__get__(xblock, xblock.__class__)
+        entries.clear()  # pylint: disable=maybe-no-member
+        entries.extend(value or [])  # pylint: disable=maybe-no-member
+
+    def to_json(self, value):
+        return list(value) if value is not None else None
+
+    def from_json(self, value):
+        if value is None or isinstance(value, list):
+            return value
+        else:
+            raise TypeError('Value stored in an AppendLog must be None or a list, found %s' % type(value))
+
+    enforce_type = from_json
+
+
+class NumericArray(JSONField):
+    """
+    A field class for representing a packed array of numbers, such as a
+    histogram or a list of scores.
+
+    The value is a :class:`TrackedArray`, an :class:`array.array` of
+    `typecode` (defaults to 'd', for floats) which records its own changes,
+    and can be used through the buffer protocol, by NumPy for example.  It is
+    stored as the typecode and the base64 encoding of its little-endian
+    bytes, such as ``"d:AAAAAAAA8D8="``.  Lists of numbers, as stored by a
+    `List` field, are also read.
+
+    Only typecodes whose sizes are the same on all platforms can be used.
+
+    """
+    TYPECODES = 'bBhHiIfd'
+    _default = ()
+
+    def __init__(self, *args, **kwargs):
+        self.typecode = kwargs.pop('typecode', 'd')
+        if self.typecode not in self.TYPECODES:
+            raise ValueError('NumericArray typecode must be one of %r, found %r' % (self.TYPECODES, self.typecode))
+        super(NumericArray, self).__init__(*args, **kwargs)
+        self._track_mutations = True
+
+    def __set__(self, xblock, value):
+        super(NumericArray, self).__set__(xblock, value)
+        value = self._get_cached_value(xblock)
+        if not self._is_tracked(xblock, value):
+            self._set_cached_value(xblock, self._track(xblock, value))
+
+    def _track(self, xblock, value):
+        if value is None:
+            return value
+        return TrackedArray(self.typecode, value, xblock, self)
+
+    def to_json(self, value):
+        if value is None:
+            return None
+        value = _packed(self.typecode, value)
+        if sys.byteorder == 'big':
+            value.byteswap()
+        return self.typecode + ':' + base64.b64encode(value.tostring())
+
+    def from_json(self, value):
+        if value is None:
+            return value
+        elif isinstance(value, basestring):
+            typecode, separator, data = value.partition(':')
+            if not separator or typecode not in self.TYPECODES:
+                raise ValueError('Value stored in a NumericArray must start with a typecode, found %r' % value[:10])
+            result = array.array(typecode)
+            result.fromstring(base64.b64decode(data))
+            if sys.byteorder == 'big':
+                result.byteswap()
+            if typecode != self.typecode:
+                result = _packed(self.typecode, result)
+            return result
+        elif isinstance(value, (list, tuple, array.array)):
+            return _packed(self.typecode, value)
+        else:
+            raise TypeError('Value stored in a NumericArray must be None, a string or a list, found %s' % type(value))
+
+    def enforce_type(self, value):
+        if isinstance(value, basestring):
+            raise TypeError('Value of a NumericArray must be None or a sequence of numbers, found %s' % type(value))
+        return self.from_json(value)
+
+
 class List(JSONField):
     """
     A field class for representing a list.
@@ -691,6 +2061,7 @@ class List(JSONField):
     enforce_type = from_json
 
 
+@scalar_field(str, unicode, type(None))
 class String(JSONField):
     """
     A field class for representing a string.
@@ -719,6 +2090,75 @@ class DateTime(JSONField):
 
     DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
 
+    # The dates written by `to_json`, and other common ISO-8601 shapes, which
+    # are parsed without dateutil
+    ISO_DATETIME_RE = re.compile(
+        r'(\d{4})-(\d{2})-(\d{2})'
+        r'(?:[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.(\d{1,6}))?)?'
+        r'(Z|[+-]\d{2}:?\d{2})?)?\Z'
+    )
+
+    def __init__(self, *args, **kwargs):
+        """
+        Takes the arguments of :class:`Field`, and also:
+
+        memo_size: if given, the number of the most recently parsed date
+            strings for which this field remembers the datetime it parsed
+        """
+        memo_size = kwargs.pop('memo_size', None)
+        self._memo = LRUCache(memo_size) if memo_size else None
+        self._memo_lock = threading.Lock()
+        super(DateTime, self).__init__(*args, **kwargs)
+
+    def _parse_iso(self, value):
+        """
+        Parse `value` if it has one of the shapes matched by `ISO_DATETIME_RE`,
+        returning None if it doesn't, or if its parts are out of range.
+        """
+        match = self.ISO_DATETIME_RE.match(value)
+        if match is None:
+            return None
+        year, month, day, hour, minute, second, fraction, offset = match.groups()
+        if offset is None:
+            tzinfo = pytz.utc
+        else:
+            minutes = 0 if offset == 'Z' else int(offset[1:3]) * 60 + int(offset[-2:])
+            if minutes == 0:
+                # dateutil gives UTC, rather than an offset of zero, for these
+                tzinfo = dateutil.tz.tzutc()
+            else:
+                tzinfo = dateutil.tz.tzoffset(None, (-60 if offset[0] == '-' else 60) * minutes)
+        try:
+            return datetime.datetime(
+                int(year), int(month), int(day),
+                int(hour or 0), int(minute or 0), int(second or 0),
+                int(fraction.ljust(6, '0')) if fraction else 0,
+                tzinfo,
+            )
+        except ValueError:
+            return None
+
+    def _parse(self, value):
+        """
+        Parse the date string `value`, with dateutil if it isn't in one of the
+        shapes parsed by `_parse_iso`.
+        """
+        parsed_date = self._parse_iso(value)
+        if parsed_date is not None:
+            return parsed_date
+
+        try:
+            parsed_date = dateutil.parser.parse(value)
+        except (TypeError, ValueError):
+            raise ValueError("Could not parse {} as a date".format(value))
+
+        if parsed_date.tzinfo is not None:  # pylint: disable=maybe-no-member
+            parsed_date.astimezone(pytz.utc)  # pylint: disable=maybe-no-member
+        else:
+            parsed_date = parsed_date.replace(tzinfo=pytz.utc)  # pylint: disable=maybe-no-member
+
+        return parsed_date
+
     def from_json(self, value):
         """
         Parse the date from an ISO-formatted date string, or None.
@@ -729,16 +2169,15 @@ class DateTime(JSONField):
             if value == "":
                 return None
 
-            try:
-                parsed_date = dateutil.parser.parse(value)
-            except (TypeError, ValueError):
-                raise ValueError("Could not parse {} as a date".format(value))
-
-            if parsed_date.tzinfo is not None:  # pylint: disable=maybe-no-member
-                parsed_date.astimezone(pytz.utc)  # pylint: disable=maybe-no-member
-            else:
-                parsed_date = parsed_date.replace(tzinfo=pytz.utc)  # pylint: disable=maybe-no-member
+            if self._memo is None:
+                return self._parse(value)
 
+            with self._memo_lock:
+                parsed_date = self._memo.get(value)
+            if parsed_date is None:
+                parsed_date = self._parse(value)
+                with self._memo_lock:
+                    self._memo[value] = parsed_date
             return parsed_date
 
         if value is None:
@@ -822,45 +2261,80 @@ class ModelMetaclass(type):
     def __new__(mcs, name, bases, attrs):
         new_class = super(ModelMetaclass, mcs).__new__(mcs, name, bases, attrs)
 
+        # Every field of the new class is declared in the attributes of one of
+        # the classes in its Method Resolution Order (mro).  The fields of base
+        # classes made by this metaclass have already been collected, so only
+        # the other classes need their attributes scanned.
+        field_names = set()
+        covered = set()
+        for base_class in new_class.__mro__:  # pylint: disable=E1101
+            if base_class in covered:
+                continue
+            if base_class is not new_class and isinstance(base_class, ModelMetaclass):
+                field_names.update(base_class.fields)
+                covered.update(base_class.__mro__)
+            else:
+                field_names.update(
+                    attr_name for attr_name, attr_value in vars(base_class).iteritems()
+                    if isinstance(attr_value, Field)
+                )
+
+        # Each field is the first one found, as expected for method resolution.
+        # A field hidden by an attribute that isn't a field is still found on
+        # the base classes.
         fields = {}
-        # Pylint tries to do fancy inspection for class methods/properties, and
-        # in this case, gets it wrong
-
-        # Loop through all of the baseclasses of cls, in
-        # the order that methods are resolved (Method Resolution Order / mro)
-        # and find all of their defined fields.
-        #
-        # Only save the first such defined field (as expected for method resolution)
-        for base_class in new_class.mro():  # pylint: disable=E1101
-            # We can't use inspect.getmembers() here, because that would
-            # call the fields property again, and generate an infinite loop.
-            # Instead, we loop through all of the attribute names, exclude the
-            # 'fields' attribute, and then retrieve the value
-            for attr_name in dir(base_class):
-                attr_value = getattr(base_class, attr_name)
-                if isinstance(attr_value, Field):
-                    fields.setdefault(attr_name, attr_value)
-
-                    # Allow the field to know what its name is
-                    attr_value._name = attr_name  # pylint: disable=protected-access
+        for attr_name in sorted(field_names):
+            attr_value = getattr(new_class, attr_name, None)
+            if not isinstance(attr_value, Field):
+                attr_value = mcs._find_hidden_field(new_class, attr_name)
+            if attr_value is None:
+                continue
+            fields[attr_name] = attr_value
+
+            # Allow the field to know what its name is
+            attr_value._name = attr_name  # pylint: disable=protected-access
 
         new_class.fields = fields
 
+        # Give each field a fixed slot in the lists XBlocks keep their values in
+        new_class._field_slots = dict(  # pylint: disable=protected-access
+            (name, slot) for slot, name in enumerate(sorted(fields))
+        )
+
         return new_class
 
+    @staticmethod
+    def _find_hidden_field(block_class, attr_name):
+        """
+        Return the first field named `attr_name` on the base classes of
+        `block_class`, or None if there isn't one.
+        """
+        for base_class in block_class.__mro__[1:]:
+            attr_value = getattr(base_class, attr_name, None)
+            if isinstance(attr_value, Field):
+                return attr_value
+        return None
+
 
 class ChildrenModelMetaclass(type):
     """
     A metaclass that transforms the attribute `has_children = True` into a List
     field with a children scope.
 
+    The field tracks its mutations if the class also sets
+    `track_children_mutations = True`.
+
     """
     def __new__(mcs, name, bases, attrs):
         if (attrs.get('has_children', False) or
                 any(getattr(base, 'has_children', False) for base in bases)):
             attrs['children'] = ReferenceList(
                 help='The ids of the children of this XBlock',
-                scope=Scope.children)
+                scope=Scope.children,
+                track_mutations=(
+                    attrs.get('track_children_mutations', False) or
+                    any(getattr(base, 'track_children_mutations', False) for base in bases)
+                ))
         else:
             attrs['has_children'] = False
 
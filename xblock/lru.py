@@ -0,0 +1,55 @@
+"""
+A small least-recently-used cache, for the caches kept by runtimes and field data.
+"""
+
+from collections import OrderedDict
+
+
+class LRUCache(object):
+    """
+    A mapping that holds at most `maxsize` items, evicting the least recently
+    used item to make room for new ones.
+
+    Reading an item with `get` marks it as recently used; checking for it
+    with `in` doesn't.  If `maxsize` is None, the cache is unbounded.
+
+    The cache isn't thread-safe; callers sharing one between threads must lock
+    around it.
+    """
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key, default=None):
+        """Return the value for `key`, marking it as recently used, or `default`."""
+        try:
+            value = self._items.pop(key)
+        except KeyError:
+            return default
+        self._items[key] = value
+        return value
+
+    def __setitem__(self, key, value):
+        self._items.pop(key, None)
+        self._items[key] = value
+        if self.maxsize is not None:
+            while len(self._items) > self.maxsize:
+                self.popitem()
+
+    def pop(self, key, default=None):
+        """Remove `key`, returning its value, or `default` if it wasn't cached."""
+        return self._items.pop(key, default)
+
+    def popitem(self):
+        """Remove and return the least recently used (key, value) pair."""
+        return self._items.popitem(last=False)
+
+    def clear(self):
+        """Remove all items."""
+        self._items.clear()
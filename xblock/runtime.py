@@ -5,17 +5,32 @@ Machinery to make the common case easy when building new runtimes
 import functools
 import gettext
 import itertools
+import logging
 import re
+import sys
 import threading
+import weakref
+
+try:
+    import simplejson as json  # pylint: disable=F0401
+except ImportError:
+    import json
 
 from abc import ABCMeta, abstractmethod
+from contextlib import contextmanager
 from lxml import etree
 from StringIO import StringIO
+import six
 
-from collections import namedtuple
-from xblock.fields import Field, BlockScope, Scope, ScopeIds, UserScope
-from xblock.field_data import FieldData
+from collections import OrderedDict, defaultdict, namedtuple
+from xblock.fields import (
+    CounterIncrement, DictPatch, Field, ScopeBase, ScopeIds, ShardedField, NO_CACHE_VALUE, NO_DEFAULT, NO_VALUE,
+    SHARD_SEPARATOR,
+)
+from xblock.field_data import FieldData, field_key_recipe, key_recipe
+from xblock.lru import LRUCache
 from xblock.exceptions import (
+    KeyValueMultiSaveError,
     NoSuchViewError,
     NoSuchHandlerError,
     NoSuchServiceError,
@@ -23,6 +38,13 @@ from xblock.exceptions import (
     NoSuchDefinition,
 )
 from xblock.core import XBlock
+from xblock.session import SaveSession
+
+
+log = logging.getLogger(__name__)
+
+# Which per-key methods each KeyValueStore class overrides, by method names
+_KVS_OVERRIDES = weakref.WeakKeyDictionary()
 
 
 class KeyValueStore(object):
@@ -62,6 +84,47 @@ class KeyValueStore(object):
         """
         raise KeyError(repr(key))
 
+    def _overrides(self, base_class, *names):
+        """
+        Return whether the class of this store overrides any of the methods
+        `names` of `base_class`, in which case the shortcuts of `base_class`
+        that skip those methods mustn't be used.
+        """
+        overrides = _KVS_OVERRIDES.setdefault(type(self), {})
+        overridden = overrides.get(names)
+        if overridden is None:
+            overridden = overrides[names] = any(
+                getattr(type(self), name).__func__ is not getattr(base_class, name).__func__
+                for name in names
+            )
+        return overridden
+
+    def lookup(self, key, with_default=True):
+        """
+        Reads the value of the given `key` from storage, falling back to its
+        context default, without raising `KeyError`.
+
+        Returns the stored value if there is one. Otherwise, returns
+        :data:`~xblock.fields.NO_VALUE` if `with_default` is False, the
+        value of `default` if there is a context default, and
+        :data:`~xblock.fields.NO_DEFAULT` if there isn't.
+
+        The default implementation goes through has, get and default. Runtimes whose
+        backends can answer in a single call will want to override this method.
+        """
+        try:
+            if self.has(key):
+                return self.get(key)
+        except KeyError:
+            # Some stores raise KeyError rather than answering False
+            pass
+        if not with_default:
+            return NO_VALUE
+        try:
+            return self.default(key)
+        except KeyError:
+            return NO_DEFAULT
+
     def set_many(self, update_dict):
         """
         For each (`key, value`) in `update_dict`, set `key` to `value` in storage.
@@ -75,6 +138,92 @@ class KeyValueStore(object):
         for key, value in update_dict.iteritems():
             self.set(key, value)
 
+    def update_many(self, update_dict):
+        """
+        For each (`key, value`) in `update_dict`, set `key` to `value` in
+        storage, where some of the values are :class:`~xblock.fields.DictPatch` values.
+
+        Stores that can update single entries of a stored dict will want to
+        override this method to apply the `changed` and `deleted` entries of
+        each patch, and write the patch as a whole value when there is no
+        stored dict to apply it to.  The default implementation writes every
+        value whole through set_many.
+
+        :update_dict: field_name, field_value pairs for all cached changes
+        """
+        self.set_many(dict(
+            (key, dict(value) if isinstance(value, DictPatch) else value)
+            for key, value in update_dict.iteritems()
+        ))
+
+    def incr(self, key, delta):
+        """
+        Adds `delta` to the number stored for `key`, treating a missing value
+        as 0, and returns the result.
+
+        The default implementation reads and writes the value through get and
+        set, so increments made at the same time by other processes can be
+        lost.  Stores that can increment a value in a single operation will
+        want to override this method.
+        """
+        try:
+            value = self.get(key)
+        except KeyError:
+            value = None
+        value = (value or 0) + delta
+        self.set(key, value)
+        return value
+
+    def get_many(self, keys):
+        """
+        Reads the values of all of `keys` from storage.
+
+        Returns a dict mapping each key that has a value in storage to that value.
+        Keys without a value are left out of the result.
+
+        The default implementation brute force reads key by key through get, which
+        may be inefficient for runtimes making a backend call per read. Such
+        implementations will want to override this method.
+
+        :keys: iterable of `KeyValueStore.Key`s to read
+        """
+        values = {}
+        for key in keys:
+            try:
+                values[key] = self.get(key)
+            except KeyError:
+                pass
+        return values
+
+    def has_many(self, keys):
+        """
+        Returns a dict mapping each of `keys` to whether or not it is present in storage.
+
+        The default implementation checks key by key through has. Runtimes doing a
+        backend call per check will want to override this method.
+
+        :keys: iterable of `KeyValueStore.Key`s to check
+        """
+        return dict((key, self.has(key)) for key in keys)
+
+    def delete_many(self, keys):
+        """
+        Deletes all of `keys` from storage.
+
+        Keys that aren't present in storage are skipped, rather than raising
+        `KeyError`, so that a bulk delete never stops partway through.
+
+        The default implementation deletes key by key through delete. Runtimes doing a
+        backend call per delete will want to override this method.
+
+        :keys: iterable of `KeyValueStore.Key`s to delete
+        """
+        for key in keys:
+            try:
+                self.delete(key)
+            except KeyError:
+                pass
+
 
 class DictKeyValueStore(KeyValueStore):
     """
@@ -82,6 +231,7 @@ class DictKeyValueStore(KeyValueStore):
     """
     def __init__(self, storage=None):
         self.db_dict = storage if storage is not None else {}
+        self._incr_lock = threading.Lock()
 
     def get(self, key):
         return self.db_dict[key]
@@ -98,6 +248,40 @@ class DictKeyValueStore(KeyValueStore):
     def has(self, key):
         return key in self.db_dict
 
+    def incr(self, key, delta):
+        with self._incr_lock:
+            value = (self.db_dict.get(key) or 0) + delta
+            self.db_dict[key] = value
+        return value
+
+    def lookup(self, key, with_default=True):
+        # An overridden `default` is still called below; `get` and `has` aren't
+        if self._overrides(DictKeyValueStore, 'get', 'has'):
+            return super(DictKeyValueStore, self).lookup(key, with_default)
+        value = self.db_dict.get(key, NO_VALUE)
+        if value is not NO_VALUE or not with_default:
+            return value
+        try:
+            return self.default(key)
+        except KeyError:
+            return NO_DEFAULT
+
+    def get_many(self, keys):
+        if self._overrides(DictKeyValueStore, 'get'):
+            return super(DictKeyValueStore, self).get_many(keys)
+        return dict((key, self.db_dict[key]) for key in keys if key in self.db_dict)
+
+    def has_many(self, keys):
+        if self._overrides(DictKeyValueStore, 'has'):
+            return super(DictKeyValueStore, self).has_many(keys)
+        return dict((key, key in self.db_dict) for key in keys)
+
+    def delete_many(self, keys):
+        if self._overrides(DictKeyValueStore, 'delete'):
+            return super(DictKeyValueStore, self).delete_many(keys)
+        for key in keys:
+            self.db_dict.pop(key, None)
+
 
 class KvsFieldData(FieldData):
     """
@@ -144,33 +328,31 @@ class KvsFieldData(FieldData):
             field_name=name
         )
         """
-        field = self._getfield(block, name)
-        if field.scope in (Scope.children, Scope.parent):
-            block_id = block.scope_ids.usage_id
-            user_id = None
-        else:
-            block_scope = field.scope.block
-
-            if block_scope == BlockScope.ALL:
-                block_id = None
-            elif block_scope == BlockScope.USAGE:
-                block_id = block.scope_ids.usage_id
-            elif block_scope == BlockScope.DEFINITION:
-                block_id = block.scope_ids.def_id
-            elif block_scope == BlockScope.TYPE:
-                block_id = block.scope_ids.block_type
-
-            if field.scope.user == UserScope.ONE:
-                user_id = block.scope_ids.user_id
+        # Keys only depend on the block's class and scope_ids, so each block
+        # remembers the keys built for it until its scope_ids change.
+        # pylint: disable=protected-access
+        scope_ids = block.scope_ids
+        memo = getattr(block, '_kvs_key_memo', None)
+        if memo is None or memo[0] is not scope_ids:
+            memo = block._kvs_key_memo = (scope_ids, {})
+
+        key = memo[1].get(name)
+        if key is None:
+            if type(self)._getfield.__func__ is KvsFieldData._getfield.__func__:
+                scope, user_attr, block_attr = key_recipe(block.__class__, name)
             else:
-                user_id = None
-
-        key = KeyValueStore.Key(
-            scope=field.scope,
-            user_id=user_id,
-            block_scope_id=block_id,
-            field_name=name
-        )
+                # Subclasses choose which field a name refers to
+                field_name = name.partition(SHARD_SEPARATOR)[0]
+                field = self._getfield(block, field_name)
+                if field_name != name and not isinstance(field, ShardedField):
+                    raise KeyError(name)
+                scope, user_attr, block_attr = field_key_recipe(field)
+            key = memo[1][name] = KeyValueStore.Key(
+                scope,
+                getattr(scope_ids, user_attr) if user_attr is not None else None,
+                getattr(scope_ids, block_attr) if block_attr is not None else None,
+                name
+            )
         return key
 
     def get(self, block, name):
@@ -211,7 +393,130 @@ class KvsFieldData(FieldData):
         for (key, value) in update_dict.items():
             updated_dict[self._key(block, key)] = value
 
-        self._kvs.set_many(updated_dict)
+        try:
+            self._write_many(updated_dict)
+        except KeyValueMultiSaveError as save_error:
+            # XBlock.save expects the names of the saved fields
+            raise KeyValueMultiSaveError([
+                key.field_name if isinstance(key, KeyValueStore.Key) else key
+                for key in save_error.saved_field_names
+            ])
+
+    def _write_many(self, updated_dict):
+        """
+        Write `updated_dict` to the kvs, through update_many if it holds any
+        patches, and with incr for the values that are increments.
+
+        Increments are applied first, and can't be undone, so if the rest of
+        the values aren't all written, KeyValueMultiSaveError is raised with
+        the keys of the increments among the saved keys, whatever the error.
+        """
+        increments = [(key, value) for key, value in updated_dict.iteritems() if isinstance(value, CounterIncrement)]
+        saved_keys = []
+        if increments:
+            updated_dict = dict(
+                (key, value) for key, value in updated_dict.iteritems() if not isinstance(value, CounterIncrement)
+            )
+            for key, increment in increments:
+                try:
+                    self._kvs.incr(key, increment.delta)
+                except Exception:  # pylint: disable=broad-except
+                    log.exception("Error incrementing %r", key)
+                    raise KeyValueMultiSaveError(saved_keys)
+                saved_keys.append(key)
+            if not updated_dict:
+                return
+
+        try:
+            if any(isinstance(value, DictPatch) for value in updated_dict.itervalues()):
+                self._kvs.update_many(updated_dict)
+            else:
+                self._kvs.set_many(updated_dict)
+        except KeyValueMultiSaveError as save_error:
+            if not saved_keys:
+                raise
+            raise KeyValueMultiSaveError(saved_keys + list(save_error.saved_field_names))
+        except Exception:  # pylint: disable=broad-except
+            if not saved_keys:
+                raise
+            log.exception("Error writing %r after applying increments", updated_dict.keys())
+            raise KeyValueMultiSaveError(saved_keys)
+
+    def get_many(self, block, names):
+        """
+        Retrieve the values of all of the fields in `names` with a single call to the kvs.
+        """
+        names_by_key = {}
+        for name in names:
+            try:
+                names_by_key[self._key(block, name)] = name
+            except KeyError:
+                # Not a field, so it can't have a value
+                pass
+
+        values = self._kvs.get_many(names_by_key.keys())
+        return dict((names_by_key[key], value) for key, value in values.iteritems())
+
+    def set_many_for_blocks(self, blocks, updates):
+        """
+        Update the fields of all of `blocks` with a single call to the kvs.
+
+        If the kvs raises :class:`~xblock.exceptions.KeyValueMultiSaveError`,
+        the fields it reports saving are attributed to their blocks by the keys
+        in its `saved_field_names`.  Fields saved under other names are
+        treated as unsaved, so that they stay dirty and are written again.
+        """
+        updated_dict = {}
+        fields_by_key = defaultdict(list)
+        for index, (block, update_dict) in enumerate(zip(blocks, updates)):
+            for name, value in update_dict.iteritems():
+                key = self._key(block, name)
+                updated_dict[key] = value
+                fields_by_key[key].append((index, name))
+
+        try:
+            self._write_many(updated_dict)
+        except KeyValueMultiSaveError as save_error:
+            saved_field_names = [[] for _ in blocks]
+            for key in save_error.saved_field_names:
+                for index, name in fields_by_key.get(key, ()):
+                    saved_field_names[index].append(name)
+            raise KeyValueMultiSaveError(saved_field_names)
+
+    def get_many_for_blocks(self, blocks, names):
+        """
+        Retrieve the values of the fields in `names` on all of `blocks` with a single call to the kvs.
+        """
+        names = list(names)
+        # Blocks that share a definition or usage share keys
+        fields_by_key = defaultdict(list)
+        for index, block in enumerate(blocks):
+            for name in names:
+                try:
+                    fields_by_key[self._key(block, name)].append((index, name))
+                except KeyError:
+                    # Not a field, so it can't have a value
+                    pass
+
+        values = [{} for _ in blocks]
+        for key, value in self._kvs.get_many(fields_by_key.keys()).iteritems():
+            for index, name in fields_by_key[key]:
+                values[index][name] = value
+        return values
+
+    def lookup(self, block, name, with_default=True):
+        """
+        Retrieve the value for the field named `name`, or its default, with a single call to the kvs.
+
+        Subclasses that override `has`, `get` or `default` are looked up through them instead.
+        """
+        if self._reads_overridden(KvsFieldData):
+            return super(KvsFieldData, self).lookup(block, name, with_default)
+        try:
+            key = self._key(block, name)
+        except KeyError:
+            return NO_DEFAULT if with_default else NO_VALUE
+        return self._kvs.lookup(key, with_default)
 
     def default(self, block, name):
         """
@@ -244,6 +549,24 @@ class IdReader(object):
         """
         pass
 
+    def get_definition_ids(self, usage_ids):
+        """Retrieve the definitions that many usages are derived from.
+
+        The default implementation calls `get_definition_id` for each usage.
+        IdReaders backed by a remote store will want to override it to make a
+        single call.
+
+        Args:
+            usage_ids: The ids of the usages to query
+
+        Returns:
+            A dict mapping each usage id to the `definition_id` it is derived from
+
+        Raises:
+            NoSuchUsage: if any of the usages doesn't exist
+        """
+        return dict((usage_id, self.get_definition_id(usage_id)) for usage_id in usage_ids)
+
     @abstractmethod
     def get_block_type(self, def_id):
         """Retrieve the block_type of a particular definition
@@ -256,6 +579,44 @@ class IdReader(object):
         """
         pass
 
+    def get_block_types(self, def_ids):
+        """Retrieve the block_types of many definitions.
+
+        The default implementation calls `get_block_type` for each definition.
+        IdReaders backed by a remote store will want to override it to make a
+        single call.
+
+        Args:
+            def_ids: The ids of the definitions to query
+
+        Returns:
+            A dict mapping each definition id to its `block_type`
+
+        Raises:
+            NoSuchDefinition: if any of the definitions doesn't exist
+        """
+        return dict((def_id, self.get_block_type(def_id)) for def_id in def_ids)
+
+    def resolve(self, usage_id):
+        """Retrieve both the definition and the block_type of a usage.
+
+        The default implementation calls `get_definition_id` and then
+        `get_block_type`.  IdReaders that can find both at once will want to
+        override it to make a single call.
+
+        Args:
+            usage_id: The id of the usage to query
+
+        Returns:
+            A (`definition_id`, `block_type`) tuple
+
+        Raises:
+            NoSuchUsage: if the usage doesn't exist
+            NoSuchDefinition: if the usage's definition doesn't exist
+        """
+        def_id = self.get_definition_id(usage_id)
+        return def_id, self.get_block_type(def_id)
+
 
 class IdGenerator(object):
     """An abstract object that creates usage and definition ids"""
@@ -328,6 +689,299 @@ class MemoryIdManager(IdReader, IdGenerator):
         except KeyError:
             raise NoSuchDefinition(repr(def_id))
 
+    def resolve(self, usage_id):
+        """Get the definition id and block_type of a usage."""
+        try:
+            def_id = self._usages[usage_id]
+        except KeyError:
+            raise NoSuchUsage(repr(usage_id))
+        try:
+            return def_id, self._definitions[def_id]
+        except KeyError:
+            raise NoSuchDefinition(repr(def_id))
+
+
+class CachingIdReader(IdReader):
+    """
+    An IdReader that wraps another IdReader, remembering the definitions and
+    block types it has read.
+
+    Usages and definitions that don't exist are remembered too, and raise
+    :class:`~xblock.exceptions.NoSuchUsage` or
+    :class:`~xblock.exceptions.NoSuchDefinition` again without asking the
+    wrapped IdReader.  Each kind of id is cached in an LRU cache of at most
+    `maxsize` items.  The number of reads answered from the cache and from the
+    wrapped IdReader are counted in `hits` and `misses`.
+
+    The ids read should not change while they are cached, as is the case for a
+    published course.  The cache is thread-safe, so it can be shared between
+    requests; call `clear` to forget everything it has read.
+    """
+    def __init__(self, source, maxsize=10000):
+        """
+        :param source: the IdReader to read ids from
+        :type source: :class:`~xblock.runtime.IdReader`
+        :param maxsize: the number of usages and of definitions to remember
+        :type maxsize: int
+        """
+        self._source = source
+        self._usages = LRUCache(maxsize)
+        self._definitions = LRUCache(maxsize)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return "<{0.__class__.__name__} {0._source!r}>".format(self)
+
+    def _cached(self, cache, key):
+        """
+        Return the value cached under `key`, or NO_CACHE_VALUE if there isn't one.
+
+        Raises the cached exception if `key` is remembered as not existing.
+        """
+        with self._lock:
+            value = cache.get(key, NO_CACHE_VALUE)
+            if value is NO_CACHE_VALUE:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if isinstance(value, (NoSuchUsage, NoSuchDefinition)):
+            raise value
+        return value
+
+    def _remember(self, cache, key, value):
+        """Cache `value`, or the exception raised reading it, under `key`."""
+        with self._lock:
+            cache[key] = value
+
+    def _read(self, cache, key, read_one):
+        """Read the value of `key` with `read_one`, remembering it, or the exception raised, in `cache`."""
+        try:
+            value = read_one(key)
+        except (NoSuchUsage, NoSuchDefinition) as exc:
+            self._remember(cache, key, exc)
+            raise
+        self._remember(cache, key, value)
+        return value
+
+    def get_definition_id(self, usage_id):
+        def_id = self._cached(self._usages, usage_id)
+        if def_id is NO_CACHE_VALUE:
+            def_id = self._read(self._usages, usage_id, self._source.get_definition_id)
+        return def_id
+
+    def get_block_type(self, def_id):
+        block_type = self._cached(self._definitions, def_id)
+        if block_type is NO_CACHE_VALUE:
+            block_type = self._read(self._definitions, def_id, self._source.get_block_type)
+        return block_type
+
+    def resolve(self, usage_id):
+        def_id = self._cached(self._usages, usage_id)
+        if def_id is NO_CACHE_VALUE:
+            try:
+                def_id, block_type = self._source.resolve(usage_id)
+            except NoSuchUsage as exc:
+                self._remember(self._usages, usage_id, exc)
+                raise
+            except NoSuchDefinition:
+                # Find out which definition is missing, so that it can be remembered
+                def_id = self._read(self._usages, usage_id, self._source.get_definition_id)
+            else:
+                self._remember(self._usages, usage_id, def_id)
+                self._remember(self._definitions, def_id, block_type)
+                return def_id, block_type
+        return def_id, self.get_block_type(def_id)
+
+    def get_definition_ids(self, usage_ids):
+        return self._get_many(
+            self._usages, usage_ids, self._source.get_definition_ids, self._source.get_definition_id
+        )
+
+    def get_block_types(self, def_ids):
+        return self._get_many(
+            self._definitions, def_ids, self._source.get_block_types, self._source.get_block_type
+        )
+
+    def _get_many(self, cache, keys, read_many, read_one):
+        """
+        Return a dict of the values of `keys`, reading those that aren't in
+        `cache` with a single call to `read_many`.
+
+        If `read_many` raises an error, the uncached keys are read one at a time
+        with `read_one`, so that the keys that don't exist are remembered.
+        """
+        values = {}
+        uncached = []
+        for key in keys:
+            value = self._cached(cache, key)
+            if value is NO_CACHE_VALUE:
+                uncached.append(key)
+            else:
+                values[key] = value
+
+        if uncached:
+            try:
+                read = read_many(uncached)
+            except (NoSuchUsage, NoSuchDefinition):
+                read = dict((key, self._read(cache, key, read_one)) for key in uncached)
+            else:
+                with self._lock:
+                    for key, value in read.iteritems():
+                        cache[key] = value
+            values.update(read)
+        return values
+
+    def clear(self):
+        """Forget all of the ids that have been read."""
+        with self._lock:
+            self._usages.clear()
+            self._definitions.clear()
+
+
+class BlockIdentityMap(object):
+    """
+    A map from `(user_id, usage_id)` to the block a :class:`.Runtime` constructed for it.
+
+    While a runtime has an identity map, :meth:`.Runtime.get_block` returns the
+    same block for the same user and usage, rather than constructing a new
+    block, and so losing the values the block has cached.
+
+    The map only holds weak references to its blocks, so blocks nothing else
+    refers to can still be freed.  The host decides how long a map lives,
+    usually a single request, and calls :meth:`clear` if blocks must be
+    constructed afresh, for instance after storage has been changed underneath
+    them.
+
+    The map isn't thread-safe, so each thread should use its own.
+    """
+    def __init__(self):
+        self._blocks = weakref.WeakValueDictionary()
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def get(self, user_id, usage_id):
+        """Return the block for `usage_id` as seen by `user_id`, or None if there isn't one."""
+        return self._blocks.get((user_id, usage_id))
+
+    def add(self, user_id, usage_id, block):
+        """Remember `block` as the block for `usage_id` as seen by `user_id`."""
+        self._blocks[(user_id, usage_id)] = block
+
+    def discard(self, user_id, usage_id):
+        """Forget the block for `usage_id` as seen by `user_id`, if there is one."""
+        self._blocks.pop((user_id, usage_id), None)
+
+    def clear(self):
+        """Forget all of the blocks."""
+        self._blocks.clear()
+
+
+class FieldReadProfiles(object):
+    """
+    Profiles of the fields that each view and handler of each block type reads.
+
+    A :class:`.Runtime` given profiles records the fields each block reads
+    while :meth:`.Runtime.render` and :meth:`.Runtime.handle` invoke its views
+    and handlers.  Each profile counts the calls, and the calls that read each
+    field, with earlier calls weighed down by `decay` each time a new call is
+    recorded, so that the profiles follow changes in what the code reads.
+
+    Once a view or handler has been called `min_calls` times, the fields read
+    by at least `threshold` of its (weighted) calls are read in bulk before
+    each later call, along with the fields it declares with
+    :meth:`.XBlock.prefetches`.
+
+    Setting :attr:`enabled` to False stops both recording and prefetching.
+    The profiles can be written to a file with :meth:`dump`, and read back
+    with :meth:`load`, so that they survive restarts.
+    """
+    # Fields whose weight decays below this are forgotten
+    MIN_WEIGHT = 0.01
+
+    def __init__(self, decay=0.9, threshold=0.5, min_calls=3):
+        self.enabled = True
+        self.decay = decay
+        self.threshold = threshold
+        self.min_calls = min_calls
+        # (block_type, function_name) -> [calls, weighted calls, {field_name: weighted reads}]
+        self._profiles = {}
+        self._lock = threading.Lock()
+
+    def record(self, block_type, function_name, field_names):
+        """Record that a call of `function_name` on a block of `block_type` read `field_names`."""
+        with self._lock:
+            profile = self._profiles.setdefault((block_type, function_name), [0, 0.0, {}])
+            profile[0] += 1
+            profile[1] = profile[1] * self.decay + 1
+            weights = profile[2]
+            for field_name in weights.keys():
+                weights[field_name] *= self.decay
+                if weights[field_name] < self.MIN_WEIGHT:
+                    del weights[field_name]
+            for field_name in field_names:
+                weights[field_name] = weights.get(field_name, 0.0) + 1
+
+    def frequencies(self, block_type, function_name):
+        """
+        Return a dict of the fields read by `function_name` on blocks of
+        `block_type` to the weighted fraction of its calls that read them.
+        """
+        with self._lock:
+            profile = self._profiles.get((block_type, function_name))
+            if profile is None:
+                return {}
+            _, calls, weights = profile
+            return dict((field_name, weight / calls) for field_name, weight in weights.iteritems())
+
+    def fields_to_prefetch(self, block_type, function_name):
+        """Return the names of the fields to read before `function_name` is called on a block of `block_type`."""
+        if not self.enabled:
+            return []
+        profile = self._profiles.get((block_type, function_name))
+        if profile is None or profile[0] < self.min_calls:
+            return []
+        return [
+            field_name
+            for field_name, frequency in self.frequencies(block_type, function_name).iteritems()
+            if frequency >= self.threshold
+        ]
+
+    def profiles(self):
+        """
+        Return a dict of each `(block_type, function_name)` that has been
+        recorded to the dict of frequencies returned by :meth:`frequencies`.
+        """
+        return dict((key, self.frequencies(*key)) for key in self._profiles.keys())
+
+    def clear(self):
+        """Forget all of the profiles."""
+        with self._lock:
+            self._profiles.clear()
+
+    def dump(self, fileobj):
+        """Write the profiles to `fileobj`, as JSON."""
+        with self._lock:
+            profiles = [
+                [block_type, function_name, count, calls, weights]
+                for (block_type, function_name), (count, calls, weights) in self._profiles.iteritems()
+            ]
+        json.dump({'profiles': profiles}, fileobj, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, fileobj, **kwargs):
+        """
+        Read profiles written by :meth:`dump` from `fileobj`, returning a new
+        instance constructed with `kwargs`.
+        """
+        profiles = cls(**kwargs)
+        stored = profiles._profiles  # pylint: disable=protected-access
+        for block_type, function_name, count, calls, weights in json.load(fileobj)['profiles']:
+            stored[(block_type, function_name)] = [count, calls, weights]
+        return profiles
+
 
 class Runtime(object):
     """
@@ -411,8 +1065,15 @@ class Runtime(object):
         """
         raise NotImplementedError("Runtime needs to provide publish()")
 
+    # The fields that link blocks together, read in bulk by load_tree
+    STRUCTURE_FIELDS = ('children', 'parent')
+
+    # Whether get_child_blocks remembers the child blocks on their parent
+    cache_child_blocks = False
+
     # Construction
-    def __init__(self, id_reader, field_data, mixins=(), services=None, default_class=None, select=None):
+    def __init__(self, id_reader, field_data, mixins=(), services=None, default_class=None, select=None,
+                 identity_map=None, block_structure=None, field_profiles=None):
         """
         Arguments:
             id_reader (IdReader): An object that allows the `Runtime` to
@@ -435,6 +1096,20 @@ class Runtime(object):
                 when calling :meth:`.XBlock.load_class` to resolve a `block_type`.
                 This is the same `select` as used by :meth:`.Plugin.load_class`.
 
+            identity_map (BlockIdentityMap): If provided, :meth:`get_block`
+                returns the blocks remembered in it rather than constructing new
+                ones.  The host can also set :attr:`identity_map` at the start of
+                each request.
+
+            block_structure (BlockStructure): An index of the blocks' parents and
+                children, consulted instead of reading the `parent` and `children`
+                fields of the blocks it includes, and updated as their children
+                are saved.
+
+            field_profiles (FieldReadProfiles): If provided, the fields each
+                view and handler reads are recorded in it, and the fields they
+                usually read are prefetched before they are invoked.
+
         """
         self.id_reader = id_reader
         self.field_data = field_data
@@ -447,8 +1122,59 @@ class Runtime(object):
         self.select = select
 
         self.user_id = None
+        self.identity_map = identity_map
+        self.block_structure = block_structure
+        self.field_profiles = field_profiles
+        self.active_session = None
         self.mixologist = Mixologist(mixins)
         self._view_name = None
+        # The ids of the blocks whose declared fields render_children has read
+        self._prefetched_block_ids = frozenset()
+
+    # Saving
+
+    @contextmanager
+    def session(self):
+        """
+        Save the blocks saved in the body of the `with` statement together.
+
+        While the session is open, :meth:`.XBlock.save` adds blocks to it
+        rather than writing their fields, and when it ends, the fields of all
+        of the blocks are written in one bulk call for each :class:`.FieldData`
+        they use.  Sessions opened while one is open join it, so only the
+        outermost session writes.  Sessions are only opened by the host, for
+        example around the :meth:`render`, :meth:`handle` or
+        :meth:`parse_xml_file` calls of a whole request.
+
+        Each block is written with the changes it has made by the time the
+        session ends, and :meth:`.XBlock.save` doesn't raise
+        :class:`~xblock.exceptions.XBlockSaveError` in a session, so hosts
+        should only open sessions around blocks that don't handle their own
+        save errors.  The blocks saved before an exception are still written
+        as the session ends, as they would have been if each block had been
+        saved at once.
+
+        Raises :class:`~xblock.exceptions.XBlocksSaveError` if some of the
+        fields can't be written.
+        """
+        if self.active_session is not None:
+            yield self.active_session
+            return
+
+        session = self.active_session = SaveSession()
+        try:
+            yield session
+        except BaseException:
+            exc_info = sys.exc_info()
+            self.active_session = None
+            try:
+                session.flush()
+            except Exception:  # pylint: disable=broad-except
+                # Raise the original exception rather than one from saving
+                log.exception("Couldn't save the blocks of a session ended by an exception")
+            six.reraise(*exc_info)
+        self.active_session = None
+        session.flush()
 
     # Block operations
 
@@ -488,16 +1214,306 @@ class Runtime(object):
 
         The `usage_id` is used to find the XBlock class and data.
 
+        If the runtime has an :attr:`identity_map`, the block it already holds
+        for the current user and `usage_id` is returned instead.
+
         """
-        def_id = self.id_reader.get_definition_id(usage_id)
+        identity_map = self.identity_map
+        if identity_map is not None:
+            block = identity_map.get(self.user_id, usage_id)
+            if block is not None:
+                return block
+
         try:
-            block_type = self.id_reader.get_block_type(def_id)
+            if hasattr(self.id_reader, 'resolve'):
+                def_id, block_type = self.id_reader.resolve(usage_id)
+            else:
+                # An id reader that doesn't derive from IdReader
+                def_id = self.id_reader.get_definition_id(usage_id)
+                block_type = self.id_reader.get_block_type(def_id)
         except NoSuchDefinition:
             raise NoSuchUsage(repr(usage_id))
         keys = ScopeIds(self.user_id, block_type, def_id, usage_id)
         block = self.construct_xblock(block_type, keys)
+        if identity_map is not None:
+            identity_map.add(self.user_id, usage_id, block)
         return block
 
+    def get_blocks(self, usage_ids, prefetch=()):
+        """
+        Create the XBlock instances for many usages in this runtime.
+
+        This gives the same blocks as calling :meth:`get_block` for each of
+        `usage_ids`, but resolves their ids with one call to each of the bulk
+        :class:`.IdReader` methods, and loads each block type once.  Each block
+        is built with :meth:`construct_xblock_from_class`.  In runtimes that
+        override :meth:`get_block` or :meth:`construct_xblock` but not this
+        method, or whose id reader has no bulk methods, the blocks come from
+        :meth:`get_block` instead.
+
+        If `prefetch` names any fields, their stored values are read for all of
+        the blocks with :meth:`prefetch_fields`.
+
+        Returns a list of the blocks, in the same order as `usage_ids`.
+
+        """
+        usage_ids = list(usage_ids)
+        if self._overrides_block_construction() or not hasattr(self.id_reader, 'get_definition_ids'):
+            blocks = [self.get_block(usage_id) for usage_id in usage_ids]
+            if prefetch:
+                self.prefetch_fields(blocks, prefetch)
+            return blocks
+
+        blocks = {}
+        identity_map = self.identity_map
+        if identity_map is not None:
+            for usage_id in usage_ids:
+                block = identity_map.get(self.user_id, usage_id)
+                if block is not None:
+                    blocks[usage_id] = block
+
+        new_usage_ids = [usage_id for usage_id in set(usage_ids) if usage_id not in blocks]
+        if new_usage_ids:
+            def_ids = self.id_reader.get_definition_ids(new_usage_ids)
+            try:
+                block_types = self.id_reader.get_block_types(set(def_ids.itervalues()))
+            except NoSuchDefinition:
+                # Report the usage whose definition is missing, as get_block does
+                for usage_id in new_usage_ids:
+                    try:
+                        self.id_reader.get_block_type(def_ids[usage_id])
+                    except NoSuchDefinition:
+                        raise NoSuchUsage(repr(usage_id))
+                raise
+
+            usage_ids_by_type = defaultdict(list)
+            for usage_id in new_usage_ids:
+                usage_ids_by_type[block_types[def_ids[usage_id]]].append(usage_id)
+
+            for block_type, type_usage_ids in usage_ids_by_type.iteritems():
+                cls = self.load_block_type(block_type)
+                for usage_id in type_usage_ids:
+                    keys = ScopeIds(self.user_id, block_type, def_ids[usage_id], usage_id)
+                    block = self.construct_xblock_from_class(cls, keys)
+                    blocks[usage_id] = block
+                    if identity_map is not None:
+                        identity_map.add(self.user_id, usage_id, block)
+
+        if prefetch:
+            self.prefetch_fields(blocks.values(), prefetch)
+        return [blocks[usage_id] for usage_id in usage_ids]
+
+    def _overrides_block_construction(self):
+        """
+        Return whether this runtime overrides :meth:`get_block` or
+        :meth:`construct_xblock`, which building blocks in bulk would skip.
+        """
+        cls = type(self)
+        return any(
+            getattr(cls, name).__func__ is not getattr(Runtime, name).__func__
+            for name in ('get_block', 'construct_xblock')
+        )
+
+    def get_child_blocks(self, block):
+        """
+        Return the child blocks of `block`, in order.
+
+        The blocks linked to `block` by :meth:`load_tree` are returned until its
+        `children` field changes.  If :attr:`cache_child_blocks` is set, the
+        blocks loaded here are remembered on `block` in the same way.
+
+        """
+        # pylint: disable=protected-access
+        children = block.children
+        if block._child_block_ids == children:
+            return block._child_blocks
+        child_blocks = self.get_blocks(children)
+        if self.cache_child_blocks:
+            block._child_blocks = child_blocks
+            block._child_block_ids = list(children)
+        return child_blocks
+
+    def load_tree(self, root_usage_id, depth=None):
+        """
+        Load the block `root_usage_id` and its descendants, one level at a time.
+
+        Each level of blocks is constructed with a single :meth:`get_blocks`
+        call.  The `children` and `parent` fields of the whole level are taken
+        from the :attr:`block_structure`, or else read in bulk.  The blocks are then linked together, so that
+        :meth:`get_child_blocks`, :meth:`render_children` and
+        :meth:`.XBlock.get_parent` don't need to read any more of the tree.
+
+        Arguments:
+            root_usage_id: The usage id of the block at the root of the tree.
+
+            depth (int): The number of levels of descendants to load, or None to
+                load all of them.
+
+        Returns the root block.
+
+        """
+        # pylint: disable=protected-access
+        root = self.get_blocks([root_usage_id])[0]
+        self._load_structure_fields([root])
+        loaded = {root_usage_id: root}
+        level = [root]
+        level_depth = 0
+        while level and (depth is None or level_depth < depth):
+            parents = [block for block in level if block.has_children]
+            child_ids = []
+            for block in parents:
+                for child_id in block.children:
+                    if child_id not in loaded:
+                        loaded[child_id] = None
+                        child_ids.append(child_id)
+
+            level = self.get_blocks(child_ids)
+            self._load_structure_fields(level)
+            loaded.update(zip(child_ids, level))
+
+            for block in parents:
+                block._child_blocks = [loaded[child_id] for child_id in block.children]
+                block._child_block_ids = list(block.children)
+                usage_id = block.scope_ids.usage_id
+                for child in block._child_blocks:
+                    if child.parent == usage_id:
+                        child._parent_block = block
+                        child._parent_block_id = usage_id
+            level_depth += 1
+        return root
+
+    def _load_structure_fields(self, blocks):
+        """
+        Cache the `children` and `parent` fields of `blocks`, taking them from
+        the block structure if it includes the blocks, and otherwise reading
+        them with one :meth:`prefetch_fields` call.
+        """
+        structure = self.block_structure
+        unindexed = []
+        for block in blocks:
+            usage_id = block.scope_ids.usage_id
+            if structure is not None and usage_id in structure:
+                # pylint: disable=protected-access
+                block.fields['parent']._set_loaded_value(block, structure.parent(usage_id))
+                if block.has_children:
+                    block.fields['children']._set_loaded_value(block, list(structure.children(usage_id)))
+            else:
+                unindexed.append(block)
+        if unindexed:
+            self.prefetch_fields(unindexed, self.STRUCTURE_FIELDS)
+
+    def update_block_structure(self, block, field_names=('children',)):
+        """
+        Record the newly saved `children` or `parent` of `block`, whichever are
+        in `field_names`, in the :attr:`block_structure`, if the runtime has one
+        that includes `block`.
+
+        Called by :meth:`.XBlock.save`.  The block types of children that are
+        new to the index are found through the :attr:`id_reader`.
+
+        """
+        structure = self.block_structure
+        usage_id = block.scope_ids.usage_id
+        if structure is None or usage_id not in structure:
+            return
+
+        if 'parent' in field_names:
+            structure.set_parent(usage_id, block.parent)
+        if 'children' not in field_names:
+            return
+
+        children = list(block.children)
+        new_children = [child for child in children if child not in structure]
+        structure.set_block(usage_id, block.scope_ids.block_type, children)
+        if new_children:
+            try:
+                def_ids = self.id_reader.get_definition_ids(new_children)
+                block_types = self.id_reader.get_block_types(set(def_ids.itervalues()))
+            except (NoSuchUsage, NoSuchDefinition):
+                # Children the index has no type for are read from storage as usual
+                return
+            for child in new_children:
+                structure.set_block_type(child, block_types[def_ids[child]])
+
+    def prefetch_fields(self, blocks, field_names):
+        """
+        Read the stored values of the fields `field_names` of all of `blocks`,
+        with one :meth:`.FieldData.get_many_for_blocks` call for each
+        :class:`.FieldData` the blocks use, and cache them in the blocks.
+
+        Fields that a block doesn't have, or has already read, are skipped, and
+        nothing is read if every block has read all of the fields.
+
+        """
+        # pylint: disable=protected-access
+        field_names = [
+            name for name in OrderedDict.fromkeys(field_names)
+            if any(
+                name in block.fields and block.fields[name]._get_cached_value(block) is NO_CACHE_VALUE
+                for block in blocks
+            )
+        ]
+        if not field_names:
+            return
+
+        blocks_by_field_data = {}
+        for block in blocks:
+            blocks_by_field_data.setdefault(id(block._field_data), (block._field_data, []))[1].append(block)
+
+        for field_data, field_data_blocks in blocks_by_field_data.itervalues():
+            values = field_data.get_many_for_blocks(field_data_blocks, field_names)
+            for block, block_values in zip(field_data_blocks, values):
+                for name, value in block_values.iteritems():
+                    block.fields[name]._set_loaded_value(block, value)
+
+    def prefetch_declared_fields(self, blocks, function_name, fallback_name):
+        """
+        Read the fields that the function `function_name` of each of `blocks`
+        declares with :meth:`.XBlock.prefetches`, using :meth:`prefetch_fields`.
+
+        Blocks without a function called `function_name` are checked for a
+        function called `fallback_name` instead.
+
+        If the runtime has :attr:`field_profiles`, the fields that
+        `function_name` usually reads are read as well.
+
+        """
+        profiles = self.field_profiles
+        field_names = set()
+        for block in blocks:
+            if profiles is not None:
+                field_names.update(profiles.fields_to_prefetch(block.scope_ids.block_type, function_name))
+            func = getattr(block, function_name, None) or getattr(block, fallback_name, None)
+            for declared in getattr(func, '_prefetch_fields', ()):
+                if isinstance(declared, ScopeBase):
+                    field_names.update(name for name, field in block.fields.iteritems() if field.scope == declared)
+                else:
+                    field_names.add(declared)
+        if field_names:
+            self.prefetch_fields(blocks, sorted(field_names))
+
+    @contextmanager
+    def _recording_field_reads(self, block, function_name):
+        """
+        Record the fields `block` reads in the body of the `with` statement in
+        :attr:`field_profiles`, as read by `function_name`.
+        """
+        # pylint: disable=protected-access
+        profiles = self.field_profiles
+        if profiles is None or not profiles.enabled:
+            yield
+            return
+
+        outer_reads = block._field_reads
+        block._field_reads = reads = set()
+        try:
+            yield
+        finally:
+            block._field_reads = outer_reads
+            if outer_reads is not None:
+                outer_reads.update(reads)
+        profiles.record(block.scope_ids.block_type, function_name, reads)
+
     # Parsing XML
 
     def parse_xml_string(self, xml, id_generator):
@@ -569,12 +1585,17 @@ class Runtime(object):
         view is returned, with possible modifications by the runtime to
         integrate it into a larger whole.
 
+        The fields the view declares with :meth:`.XBlock.prefetches` are read
+        in one bulk call before the view is invoked.
+
         """
         # Set the active view so that :function:`render_child` can use it
         # as a default
         old_view_name = self._view_name
         self._view_name = view_name
         try:
+            if id(block) not in self._prefetched_block_ids:
+                self.prefetch_declared_fields([block], view_name, "fallback_view")
 
             view_fn = getattr(block, view_name, None)
             if view_fn is None:
@@ -583,7 +1604,8 @@ class Runtime(object):
                     raise NoSuchViewError(block, view_name)
                 view_fn = functools.partial(view_fn, view_name)
 
-            frag = view_fn(context)
+            with self._recording_field_reads(block, view_name):
+                frag = view_fn(context)
 
             # Explicitly save because render action may have changed state
             block.save()
@@ -612,13 +1634,23 @@ class Runtime(object):
 
         Returns a list of values, each as provided by :func:`render`.
 
+        The fields that the children's views declare with
+        :meth:`.XBlock.prefetches` are read for all of the children at once.
+
         """
-        results = []
-        for child_id in block.children:
-            child = self.get_block(child_id)
-            result = self.render_child(child, view_name, context)
-            results.append(result)
-        return results
+        children = self.get_child_blocks(block)
+        self.prefetch_declared_fields(children, view_name or self._view_name, "fallback_view")
+
+        old_prefetched_block_ids = self._prefetched_block_ids
+        self._prefetched_block_ids = frozenset(id(child) for child in children)
+        try:
+            results = []
+            for child in children:
+                result = self.render_child(child, view_name, context)
+                results.append(result)
+            return results
+        finally:
+            self._prefetched_block_ids = old_prefetched_block_ids
 
     def wrap_child(self, block, view, frag, context):  # pylint: disable=W0613
         """
@@ -641,16 +1673,23 @@ class Runtime(object):
         :param request: The request to handle
         :type request: webob.Request
         :param suffix: The remainder of the url, after the handler url prefix, if available
+
+        The fields the handler declares with :meth:`.XBlock.prefetches` are read
+        in one bulk call before the handler is called.
         """
+        self.prefetch_declared_fields([block], handler_name, "fallback_handler")
+
         handler = getattr(block, handler_name, None)
         if handler and getattr(handler, '_is_xblock_handler', False):
             # Cache results of the handler call for later saving
-            results = handler(request, suffix)
+            with self._recording_field_reads(block, handler_name):
+                results = handler(request, suffix)
         else:
             fallback_handler = getattr(block, "fallback_handler", None)
             if fallback_handler and getattr(fallback_handler, '_is_xblock_handler', False):
                 # Cache results of the handler call for later saving
-                results = fallback_handler(handler_name, request, suffix)
+                with self._recording_field_reads(block, handler_name):
+                    results = fallback_handler(handler_name, request, suffix)
             else:
                 raise NoSuchHandlerError("Couldn't find handler %r for %r" % (handler_name, block))
 
@@ -846,6 +1885,8 @@ class Mixologist(object):
                 # Use setdefault so that if someone else has already
                 # created a class before we got the lock, we don't
                 # overwrite it
+                # The metaclass of the mixed class assigns slots for all of
+                # the mixed fields
                 return _CLASS_CACHE.setdefault(mixin_key, type(
                     base_class.__name__ + 'WithMixins',
                     (base_class, ) + mixins,
@@ -0,0 +1,72 @@
+"""
+A unit of work, saving the changes of many blocks together.
+
+While a :class:`.Runtime` has a :class:`SaveSession` open, saving an XBlock
+only adds it to the session.  When the session ends, the changed fields of
+all of the blocks added to it are written with one
+:meth:`.FieldData.set_many_for_blocks` call for each :class:`.FieldData` they
+use, rather than with a call for each block.
+"""
+from xblock.exceptions import KeyValueMultiSaveError, XBlocksSaveError
+
+
+class SaveSession(object):
+    """
+    The blocks saved while a runtime's session is open.
+
+    Blocks are written in the order they were first saved.  A block saved
+    more than once is written once, with the fields it has changed by the time
+    the session is flushed.
+
+    A session belongs to a single runtime, and isn't thread-safe.
+    """
+    def __init__(self):
+        self._blocks = []
+        self._block_ids = set()
+
+    def __len__(self):
+        return len(self._blocks)
+
+    def add(self, block):
+        """Add `block` to the blocks to write when the session is flushed."""
+        if id(block) not in self._block_ids:
+            self._block_ids.add(id(block))
+            self._blocks.append(block)
+
+    def flush(self):
+        """
+        Write the changed fields of all of the blocks added to the session,
+        and clear their dirty fields.
+
+        If some fields can't be written, the other blocks are still saved, and
+        :class:`~xblock.exceptions.XBlocksSaveError` is raised, with an
+        :class:`~xblock.exceptions.XBlockSaveError` for each block that wasn't
+        completely saved.  Their unsaved fields are left dirty.
+        """
+        # pylint: disable=protected-access
+        blocks, self._blocks, self._block_ids = self._blocks, [], set()
+
+        blocks_by_field_data = {}
+        for block in blocks:
+            if block._dirty_fields:
+                blocks_by_field_data.setdefault(id(block._field_data), (block._field_data, []))[1].append(block)
+
+        errors = []
+        for field_data, field_data_blocks in blocks_by_field_data.itervalues():
+            updates = [block._get_fields_to_save() for block in field_data_blocks]
+            try:
+                field_data.set_many_for_blocks(field_data_blocks, updates)
+            except KeyValueMultiSaveError as save_error:
+                for block, update_dict, saved_field_names in zip(
+                        field_data_blocks, updates, save_error.saved_field_names
+                ):
+                    if set(update_dict) <= set(saved_field_names):
+                        block._saved(update_dict)
+                    else:
+                        errors.append((block, block._save_failed(saved_field_names)))
+            else:
+                for block, update_dict in zip(field_data_blocks, updates):
+                    block._saved(update_dict)
+
+        if errors:
+            raise XBlocksSaveError(errors)
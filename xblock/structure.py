@@ -0,0 +1,198 @@
+"""
+An index of how the blocks of a course are arranged in a tree.
+
+A :class:`BlockStructure` records the parent, children and block type of each
+usage, so that a runtime can find a block's ancestors, descendants and depth
+without reading the `parent` and `children` fields of every block on the way.
+It can be built once for a course, written to a file, and loaded again when a
+worker starts.
+"""
+import threading
+import zlib
+
+try:
+    import simplejson as json  # pylint: disable=F0401
+except ImportError:
+    import json
+
+
+class BlockStructure(object):
+    """
+    An index of usage ids to their parent, children and block type.
+
+    Usages are added with :meth:`set_block`, which also records each child's
+    parent.  Depths and ancestors are worked out from the parents when they are
+    asked for, so moving a block only changes the entries of its old and new
+    parents.
+
+    Usage ids and block types must be strings for the index to be written with
+    :meth:`dump`.
+
+    Reading the index is thread-safe, and so are updates through
+    :meth:`set_block`.
+    """
+    FORMAT_VERSION = 1
+
+    def __init__(self):
+        self._parents = {}
+        self._children = {}
+        self._block_types = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._block_types)
+
+    def __contains__(self, usage_id):
+        return usage_id in self._block_types
+
+    def __iter__(self):
+        return iter(self._block_types)
+
+    def set_block(self, usage_id, block_type, children=()):
+        """
+        Record that `usage_id` is a block of `block_type`, with `children`.
+
+        Children that aren't in the index yet are added without any children
+        of their own.  Former children that are no longer listed are left in
+        the index without a parent.
+
+        :param usage_id: the usage to record
+        :param block_type: the block type of the usage
+        :type block_type: str
+        :param children: the usage ids of the children of the usage, in order
+        """
+        children = tuple(children)
+        with self._lock:
+            self._block_types[usage_id] = block_type
+            self._parents.setdefault(usage_id, None)
+            for old_child in self._children.get(usage_id, ()):
+                if self._parents.get(old_child) == usage_id:
+                    self._parents[old_child] = None
+            self._children[usage_id] = children
+            for child in children:
+                self._parents[child] = usage_id
+                self._children.setdefault(child, ())
+
+    def set_parent(self, usage_id, parent_id):
+        """
+        Record that the parent of `usage_id` is `parent_id`, or that it has no
+        parent if `parent_id` is None, keeping the children of both.
+        """
+        with self._lock:
+            self._parents[usage_id] = parent_id
+
+    def set_block_type(self, usage_id, block_type):
+        """Record the block type of `usage_id`, keeping its parent and children."""
+        with self._lock:
+            self._block_types[usage_id] = block_type
+            self._parents.setdefault(usage_id, None)
+            self._children.setdefault(usage_id, ())
+
+    def block_type(self, usage_id):
+        """Return the block type of `usage_id`, or None if it isn't known."""
+        return self._block_types.get(usage_id)
+
+    def parent(self, usage_id):
+        """Return the usage id of the parent of `usage_id`, or None if it has no parent."""
+        return self._parents.get(usage_id)
+
+    def children(self, usage_id):
+        """Return a tuple of the usage ids of the children of `usage_id`."""
+        return self._children.get(usage_id, ())
+
+    def ancestors(self, usage_id):
+        """
+        Return a list of the usage ids of the ancestors of `usage_id`, starting
+        with the root of its tree and ending with its parent.
+        """
+        ancestors = []
+        parent = self._parents.get(usage_id)
+        while parent is not None and parent not in ancestors:
+            ancestors.append(parent)
+            parent = self._parents.get(parent)
+        ancestors.reverse()
+        return ancestors
+
+    def depth(self, usage_id):
+        """Return the number of ancestors of `usage_id`; the root of a tree has a depth of 0."""
+        return len(self.ancestors(usage_id))
+
+    def descendants(self, usage_id):
+        """
+        Yield the usage ids of the descendants of `usage_id`, depth first, with
+        each block before its children.
+        """
+        seen = set([usage_id])
+        stack = list(reversed(self.children(usage_id)))
+        while stack:
+            descendant = stack.pop()
+            if descendant in seen:
+                continue
+            seen.add(descendant)
+            yield descendant
+            stack.extend(reversed(self.children(descendant)))
+
+    @classmethod
+    def build(cls, runtime, root_usage_id):
+        """
+        Build the index of the tree under `root_usage_id`, loading the tree
+        with :meth:`.Runtime.load_tree`.
+
+        :param runtime: the runtime to load the blocks with
+        :type runtime: :class:`~xblock.runtime.Runtime`
+        :param root_usage_id: the usage id at the root of the tree
+        """
+        structure = cls()
+        stack = [runtime.load_tree(root_usage_id)]
+        while stack:
+            block = stack.pop()
+            usage_id = block.scope_ids.usage_id
+            if usage_id in structure:
+                continue
+            if block.has_children:
+                structure.set_block(usage_id, block.scope_ids.block_type, block.children)
+                stack.extend(runtime.get_child_blocks(block))
+            else:
+                structure.set_block(usage_id, block.scope_ids.block_type)
+        return structure
+
+    def dump(self, fileobj):
+        """
+        Write the index to `fileobj`, as compressed JSON.
+
+        Each usage is written once, with its children referring to the other
+        usages by position, and each block type is written once.
+        """
+        with self._lock:
+            usage_ids = list(self._block_types)
+            positions = dict((usage_id, position) for position, usage_id in enumerate(usage_ids))
+            block_types = sorted(set(self._block_types.itervalues()))
+            type_positions = dict((block_type, position) for position, block_type in enumerate(block_types))
+            blocks = [
+                [
+                    usage_id,
+                    type_positions[self._block_types[usage_id]],
+                    [positions[child] for child in self._children.get(usage_id, ()) if child in positions],
+                ]
+                for usage_id in usage_ids
+            ]
+        data = {'version': self.FORMAT_VERSION, 'block_types': block_types, 'blocks': blocks}
+        fileobj.write(zlib.compress(json.dumps(data, separators=(',', ':'))))
+
+    @classmethod
+    def load(cls, fileobj):
+        """Read an index written by :meth:`dump` from `fileobj`."""
+        data = json.loads(zlib.decompress(fileobj.read()))
+        if data['version'] != cls.FORMAT_VERSION:
+            raise ValueError("Unknown block structure format: {!r}".format(data['version']))
+
+        structure = cls()
+        block_types = data['block_types']
+        usage_ids = [usage_id for usage_id, _, _ in data['blocks']]
+        for usage_id, type_position, child_positions in data['blocks']:
+            structure.set_block(
+                usage_id,
+                block_types[type_position],
+                [usage_ids[position] for position in child_positions],
+            )
+        return structure
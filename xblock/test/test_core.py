@@ -8,7 +8,9 @@ metaclassing, field access, caching, serialization, and bulk saves.
 # pylint: disable=W0212
 from mock import patch, MagicMock, Mock
 from datetime import datetime
+import copy
 import json
+import pickle
 import re
 import unittest
 
@@ -19,12 +21,12 @@ from xblock.core import XBlock
 from xblock.exceptions import XBlockSaveError, KeyValueMultiSaveError, JsonHandlerError, DisallowedFileError
 from xblock.fields import ChildrenModelMetaclass, Dict, Float, \
     Integer, List, ModelMetaclass, Field, \
-    Scope
+    Scope, EXPLICITLY_SET
 from xblock.field_data import FieldData, DictFieldData
 
 from xblock.test.tools import (
     assert_equals, assert_raises, assert_raises_regexp,
-    assert_not_equals, assert_false, assert_is
+    assert_not_equals, assert_false, assert_is, assert_true
 )
 
 
@@ -760,6 +762,148 @@ def test_change_mutable_default():
         mutable_test_b._field_data.get(mutable_test_b, 'list_field')
 
 
+def test_tracked_mutable_not_dirty_on_read():
+    class MutableTester(XBlock):
+        """Test class with mutation-tracking fields."""
+        list_field = List(track_mutations=True)
+        dict_field = Dict(track_mutations=True)
+
+    field_data = DictFieldData({'list_field': [1, 2], 'dict_field': {'a': 1}})
+    mutable_test = MutableTester(MagicMock(), field_data, Mock())
+
+    # Reads alone leave no baseline behind
+    assert_equals([1, 2], mutable_test.list_field)
+    assert_equals({'a': 1}, mutable_test.dict_field)
+    assert_equals(len(mutable_test._dirty_fields), 0)
+
+    mutable_test.list_field.append(3)
+    mutable_test.dict_field['b'] = 2
+    assert_equals(len(mutable_test._dirty_fields), 2)
+
+    mutable_test.save()
+    assert_equals(len(mutable_test._dirty_fields), 0)
+    assert_equals([1, 2, 3], field_data.get(mutable_test, 'list_field'))
+    assert_equals({'a': 1, 'b': 2}, field_data.get(mutable_test, 'dict_field'))
+    assert_is(list, type(field_data._data['list_field']))
+    assert_is(dict, type(field_data._data['dict_field']))
+
+
+def test_tracked_mutable_orphaned_value():
+    class MutableTester(XBlock):
+        """Test class with mutation-tracking fields."""
+        list_field = List(track_mutations=True)
+
+    field_data = DictFieldData({})
+    mutable_test = MutableTester(MagicMock(), field_data, Mock())
+
+    old_value = mutable_test.list_field
+    del mutable_test.list_field
+    old_value.append(1)
+
+    # The deleted value no longer belongs to the field, so changing it does nothing
+    assert_equals(len(mutable_test._dirty_fields), 0)
+    assert_equals([], mutable_test.list_field)
+
+
+def test_tracked_mutable_copies():
+    class MutableTester(XBlock):
+        """Test class with mutation-tracking fields."""
+        list_field = List(track_mutations=True)
+
+    mutable_test = MutableTester(MagicMock(), DictFieldData({'list_field': [[1]]}), Mock())
+
+    value = mutable_test.list_field
+    deep = copy.deepcopy(value)
+    assert_is(list, type(deep))
+    assert_equals([[1]], deep)
+    assert_is(list, type(copy.copy(value)))
+    assert_is(list, type(pickle.loads(pickle.dumps(value))))
+
+
+def test_children_track_mutations():
+    class HasChildren(XBlock):
+        """Toy class for children mutation tracking"""
+        has_children = True
+        track_children_mutations = True
+
+    class HasUntrackedChildren(XBlock):
+        """Toy class for children without mutation tracking"""
+        has_children = True
+
+    assert_true(HasChildren.children._track_mutations)  # pylint: disable=no-member, protected-access
+    assert_false(HasUntrackedChildren.children._track_mutations)  # pylint: disable=no-member, protected-access
+
+    block = HasChildren(MagicMock(), DictFieldData({'children': ['a']}), Mock())
+    block.children  # pylint: disable=W0104, no-member
+    assert_equals(len(block._dirty_fields), 0)
+    block.children.append('b')  # pylint: disable=no-member
+    assert_equals(['a', 'b'], block._get_fields_to_save()['children'])
+
+
+def test_save_children_without_block_structure():
+    class HasChildren(XBlock):
+        """Toy class for saving children with a runtime that keeps no block structure"""
+        has_children = True
+
+    block = HasChildren(Mock(spec=[]), DictFieldData({}), Mock())
+    block.children = ['a']  # pylint: disable=attribute-defined-outside-init
+    block.save()
+    assert_equals(['a'], block._field_data.get(block, 'children'))
+
+
+def test_slot_storage():
+    # pylint: disable=no-member
+    class SlottedTester(XBlock):
+        """Toy class for slot storage"""
+        field_a = Integer(scope=Scope.settings)
+        field_b = List(scope=Scope.content)
+
+    assert_equals(sorted(SlottedTester.fields), sorted(SlottedTester._field_slots))
+    assert_equals(range(len(SlottedTester.fields)), sorted(SlottedTester._field_slots.values()))
+
+    block = SlottedTester(MagicMock(), DictFieldData({'field_b': [1]}), Mock())
+    assert_equals({}, block._field_data_cache)
+    assert_equals({}, block._dirty_fields)
+
+    block.field_a = 5
+    block.field_b.append(2)
+    assert_equals({'field_a': 5, 'field_b': [1, 2]}, block._field_data_cache)
+    assert_equals(
+        {SlottedTester.field_a: EXPLICITLY_SET, SlottedTester.field_b: [1]},
+        block._dirty_fields
+    )
+    assert_equals({'field_a': 5, 'field_b': [1, 2]}, block._get_fields_to_save())
+
+    # The views can be changed like the dicts they replaced
+    del block._field_data_cache['field_a']
+    del block._dirty_fields[SlottedTester.field_a]
+    assert_equals(['field_b'], list(block._field_data_cache))
+    with assert_raises(KeyError):
+        block._field_data_cache['field_a']  # pylint: disable=pointless-statement
+
+    block.save()
+    assert_equals(0, len(block._dirty_fields))
+    assert_false(block._dirty_fields)
+    assert_equals([1, 2], block._field_data.get(block, 'field_b'))
+
+    # Assigning a dict replaces the contents of the view
+    block._field_data_cache = {'field_a': 7}
+    block._dirty_fields = {SlottedTester.field_a: EXPLICITLY_SET}
+    assert_equals({'field_a': 7}, block._field_data_cache)
+    assert_true(block._dirty_fields)
+    assert_equals(7, block.field_a)
+    assert_equals({'field_a': 7}, block._get_fields_to_save())
+    with assert_raises(KeyError):
+        block._field_data_cache = {'not a field': 1}
+    assert_equals({'field_a': 7}, block._field_data_cache)
+
+
+def test_instance_attributes():
+    block = XBlock(Mock(), DictFieldData({}), Mock())
+    block.some_attr = 'value'  # pylint: disable=attribute-defined-outside-init
+    assert_equals('value', block.some_attr)
+
+
 def test_handle_shortcut():
     runtime = Mock(spec=['handle'])
     field_data = Mock(spec=[])
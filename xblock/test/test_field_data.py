@@ -1,15 +1,20 @@
 """
 Tests of the utility FieldData's defined by xblock
 """
+import gc
+import weakref
 
 from mock import Mock
 
 from xblock.core import XBlock
-from xblock.exceptions import InvalidScopeError
-from xblock.fields import Scope, String
-from xblock.field_data import SplitFieldData, ReadOnlyFieldData
+from xblock.exceptions import InvalidScopeError, KeyValueMultiSaveError
+from xblock.fields import CounterIncrement, Integer, Scope, ScopeIds, String, List, NO_DEFAULT, NO_VALUE
+from xblock.field_data import (
+    CachingFieldData, DebouncingFieldData, DictFieldData, FieldData, SplitFieldData, ReadOnlyFieldData,
+    SharedCachingFieldData, SharedFieldCache,
+)
 
-from xblock.test.tools import assert_false, assert_raises, assert_equals
+from xblock.test.tools import assert_false, assert_raises, assert_equals, assert_is, assert_true
 
 
 class TestingBlock(XBlock):
@@ -67,10 +72,69 @@ class TestSplitFieldData(object):
         self.content.set_many.assert_called_once_with(self.block, {'content': 'new content'})
         self.settings.set_many.assert_called_once_with(self.block, {'settings': 'new settings'})
 
+    def test_get_many(self):
+        self.content.get_many.return_value = {'content': 'c'}
+        self.settings.get_many.return_value = {}
+        assert_equals(
+            {'content': 'c'},
+            self.split.get_many(self.block, ['content', 'settings'])
+        )
+        self.content.get_many.assert_called_once_with(self.block, ['content'])
+        self.settings.get_many.assert_called_once_with(self.block, ['settings'])
+
+    def test_get_many_for_blocks(self):
+        other = ListBlock(runtime=Mock(), field_data=self.split, scope_ids=Mock())
+        self.content.get_many_for_blocks.return_value = [{'content': 'c'}]
+        self.settings.get_many_for_blocks.return_value = [{}]
+        assert_equals(
+            [{'content': 'c'}, {}],
+            self.split.get_many_for_blocks([self.block, other], ['content', 'settings'])
+        )
+        self.content.get_many_for_blocks.assert_called_once_with([self.block], set(['content']))
+        self.settings.get_many_for_blocks.assert_called_once_with([self.block], set(['settings']))
+
+    def test_set_many_for_blocks(self):
+        other = TestingBlock(runtime=Mock(), field_data=self.split, scope_ids=Mock())
+        self.split.set_many_for_blocks(
+            [self.block, other],
+            [{'content': 'c', 'settings': 's'}, {'content': 'other c'}]
+        )
+        self.content.set_many_for_blocks.assert_called_once_with(
+            [self.block, other], [{'content': 'c'}, {'content': 'other c'}]
+        )
+        self.settings.set_many_for_blocks.assert_called_once_with([self.block], [{'settings': 's'}])
+
+    def test_set_many_for_blocks_failure(self):
+        other = TestingBlock(runtime=Mock(), field_data=self.split, scope_ids=Mock())
+        self.content.set_many_for_blocks.side_effect = KeyValueMultiSaveError([['content'], []])
+        with assert_raises(KeyValueMultiSaveError) as save_error:
+            self.split.set_many_for_blocks(
+                [self.block, other],
+                [{'content': 'c', 'settings': 's'}, {'content': 'other c'}]
+            )
+        assert_equals(
+            [['content', 'settings'], []],
+            [sorted(names) for names in save_error.exception.saved_field_names]
+        )
+
+    def test_lookup(self):
+        self.split.lookup(self.block, 'content', False)
+        self.content.lookup.assert_called_once_with(self.block, 'content', False)
+        assert_false(self.settings.lookup.called)
+
     def test_invalid_scope(self):
         with assert_raises(InvalidScopeError):
             self.split.get(self.block, 'user_state')
 
+    def test_hidden_field(self):
+        class HidingBlock(TestingBlock):
+            """Hides the content field with a plain attribute."""
+            content = 'not a field'
+
+        block = HidingBlock(runtime=Mock(), field_data=self.split, scope_ids=Mock())
+        self.split.get(block, 'content')
+        self.content.get.assert_called_once_with(block, 'content')
+
     def test_default(self):
         self.split.default(self.block, 'content')
         self.content.default.assert_called_once_with(self.block, 'content')
@@ -106,6 +170,11 @@ class TestReadOnlyFieldData(object):
         with assert_raises(InvalidScopeError):
             self.read_only.set_many(self.block, {'content': 'foo', 'settings': 'bar'})
 
+    def test_set_many_for_blocks(self):
+        with assert_raises(InvalidScopeError):
+            self.read_only.set_many_for_blocks([self.block], [{'content': 'foo'}])
+        assert_false(self.source.set_many_for_blocks.called)
+
     def test_default(self):
         assert_equals(self.source.default.return_value, self.read_only.default(self.block, 'content'))
         self.source.default.assert_called_once_with(self.block, 'content')
@@ -113,3 +182,573 @@ class TestReadOnlyFieldData(object):
     def test_has(self):
         assert_equals(self.source.has.return_value, self.read_only.has(self.block, 'content'))
         self.source.has.assert_called_once_with(self.block, 'content')
+
+    def test_get_many(self):
+        assert_equals(
+            self.source.get_many.return_value,
+            self.read_only.get_many(self.block, ['content', 'settings'])
+        )
+        self.source.get_many.assert_called_once_with(self.block, ['content', 'settings'])
+
+    def test_lookup(self):
+        assert_equals(self.source.lookup.return_value, self.read_only.lookup(self.block, 'content'))
+        self.source.lookup.assert_called_once_with(self.block, 'content', True)
+
+
+class TestDictFieldData(object):
+    """
+    Tests of :ref:`DictFieldData`.
+    """
+    def setUp(self):
+        self.data = {'content': ['c'], 'settings': 's'}
+        self.field_data = DictFieldData(self.data)
+        self.block = TestingBlock(
+            runtime=Mock(),
+            field_data=self.field_data,
+            scope_ids=Mock(),
+        )
+
+    def test_get_many(self):
+        values = self.field_data.get_many(self.block, ['content', 'user_state'])
+        assert_equals({'content': ['c']}, values)
+
+        # The values returned are copies of the stored data
+        values['content'].append('d')
+        assert_equals(['c'], self.data['content'])
+
+    def test_lookup(self):
+        value = self.field_data.lookup(self.block, 'content')
+        assert_equals(['c'], value)
+        value.append('d')  # pylint: disable=maybe-no-member
+        assert_equals(['c'], self.data['content'])
+
+        assert_is(NO_VALUE, self.field_data.lookup(self.block, 'user_state', False))
+        assert_is(NO_DEFAULT, self.field_data.lookup(self.block, 'user_state'))
+
+
+class TestFieldDataLookup(object):
+    """
+    Tests of the default :meth:`FieldData.lookup`, built from has, get and default.
+    """
+    def setUp(self):
+        self.source = Mock()
+        self.block = Mock()
+
+        class FakeFieldData(FieldData):
+            """A FieldData that passes the basic methods through to a mock."""
+            def __init__(self, source):
+                self.source = source
+
+            def get(self, *args):
+                return self.source.get(*args)
+
+            def set(self, *args):
+                return self.source.set(*args)
+
+            def delete(self, *args):
+                return self.source.delete(*args)
+
+            def has(self, *args):
+                return self.source.has(*args)
+
+            def default(self, *args):
+                return self.source.default(*args)
+
+        self.field_data = FakeFieldData(self.source)
+
+    def test_stored_value(self):
+        self.source.has.return_value = True
+        assert_equals(self.source.get.return_value, self.field_data.lookup(self.block, 'name'))
+        assert_false(self.source.default.called)
+
+    def test_context_default(self):
+        self.source.has.return_value = False
+        assert_equals(self.source.default.return_value, self.field_data.lookup(self.block, 'name'))
+        assert_false(self.source.get.called)
+
+    def test_no_default(self):
+        self.source.has.return_value = False
+        self.source.default.side_effect = KeyError
+        assert_is(NO_DEFAULT, self.field_data.lookup(self.block, 'name'))
+
+    def test_without_default(self):
+        self.source.has.return_value = False
+        assert_is(NO_VALUE, self.field_data.lookup(self.block, 'name', False))
+        assert_false(self.source.default.called)
+
+    def test_get_many_for_blocks(self):
+        blocks = [
+            TestingBlock(runtime=Mock(), field_data=self.field_data, scope_ids=Mock()),
+            ListBlock(runtime=Mock(), field_data=self.field_data, scope_ids=Mock()),
+        ]
+        self.source.get.side_effect = lambda block, name: name
+        assert_equals(
+            [{'content': 'content'}, {'items': 'items'}],
+            self.field_data.get_many_for_blocks(blocks, ['content', 'items'])
+        )
+
+    def test_set_many_for_blocks(self):
+        def set_value(block, name, value):  # pylint: disable=unused-argument
+            """Fail to save the field called 'bad'."""
+            if name == 'bad':
+                raise KeyValueMultiSaveError([])
+        self.source.set.side_effect = set_value
+        blocks = [Mock(), Mock(), Mock()]
+
+        with assert_raises(KeyValueMultiSaveError) as save_error:
+            self.field_data.set_many_for_blocks(blocks, [{'first': 1}, {'bad': 2}, {'last': 3}])
+        assert_equals([['first'], [], ['last']], save_error.exception.saved_field_names)
+        assert_equals(3, self.source.set.call_count)
+
+
+class OverriddenReads(object):
+    """Reads overridden by a subclass of a wrapping FieldData, which its `lookup` mustn't skip."""
+    def has(self, block, name):  # pylint: disable=unused-argument
+        """Only the `content` field is stored."""
+        return name == 'content'
+
+    def get(self, block, name):  # pylint: disable=unused-argument
+        """Return a value the wrapped FieldData doesn't have."""
+        return 'overridden'
+
+    def default(self, block, name):  # pylint: disable=unused-argument
+        """Give every field a context default."""
+        return 'context default'
+
+
+class OverriddenSplitFieldData(OverriddenReads, SplitFieldData):
+    """A SplitFieldData with overridden reads."""
+    pass
+
+
+class OverriddenReadOnlyFieldData(OverriddenReads, ReadOnlyFieldData):
+    """A ReadOnlyFieldData with overridden reads."""
+    pass
+
+
+class OverriddenCachingFieldData(OverriddenReads, CachingFieldData):
+    """A CachingFieldData with overridden reads."""
+    pass
+
+
+class OverriddenSharedCachingFieldData(OverriddenReads, SharedCachingFieldData):
+    """A SharedCachingFieldData with overridden reads."""
+    pass
+
+
+class OverriddenDebouncingFieldData(OverriddenReads, DebouncingFieldData):
+    """A DebouncingFieldData with overridden reads."""
+    pass
+
+
+def test_wrapper_lookup_through_overrides():
+    source = DictFieldData({})
+    wrappers = [
+        OverriddenSplitFieldData({Scope.content: source, Scope.settings: source}),
+        OverriddenReadOnlyFieldData(source),
+        OverriddenCachingFieldData(source),
+        OverriddenSharedCachingFieldData(source, SharedFieldCache()),
+        OverriddenDebouncingFieldData(source),
+    ]
+    for field_data in wrappers:
+        block = TestingBlock(runtime=Mock(), field_data=field_data, scope_ids=Mock())
+        assert_equals('overridden', field_data.lookup(block, 'content'))
+        assert_equals('context default', field_data.lookup(block, 'settings'))
+        assert_equals('overridden', block.content)
+        assert_equals('context default', block.settings)
+
+
+class ListBlock(XBlock):
+    """
+    An XBlock with a mutable field, for testing that cached values are copied.
+    """
+    items = List(scope=Scope.content)
+    user_state = String(scope=Scope.user_state)
+
+
+class CountingDefaultFieldData(DictFieldData):
+    """
+    A DictFieldData that gives `user_state` fields a context default.
+    """
+    def default(self, block, name):
+        if name == 'user_state':
+            return 'default state'
+        raise KeyError(name)
+
+
+class TestCachingFieldData(object):
+    """
+    Tests of :ref:`CachingFieldData`.
+    """
+    def setUp(self):
+        self.data = {'items': [1, 2]}
+        self.source = Mock(wraps=CountingDefaultFieldData(self.data))
+        self.caching = CachingFieldData(self.source, maxsize=3)
+        self.block = self.make_block('u0', 'd0')
+
+    def make_block(self, usage_id, def_id, user_id='s0'):
+        """Make a block reading through the cache."""
+        return ListBlock(
+            runtime=Mock(),
+            field_data=self.caching,
+            scope_ids=ScopeIds(user_id, 'list_block', def_id, usage_id),
+        )
+
+    def test_get_reads_once(self):
+        assert_equals([1, 2], self.caching.get(self.block, 'items'))
+        assert_equals([1, 2], self.caching.get(self.block, 'items'))
+        assert_equals(1, self.source.lookup.call_count)
+        assert_equals((1, 1), (self.caching.hits, self.caching.misses))
+
+    def test_values_are_copies(self):
+        self.caching.get(self.block, 'items').append(3)
+        assert_equals([1, 2], self.caching.get(self.block, 'items'))
+
+    def test_negative_has_is_cached(self):
+        assert_false(self.caching.has(self.block, 'user_state'))
+        assert_false(self.caching.has(self.block, 'user_state'))
+        with assert_raises(KeyError):
+            self.caching.get(self.block, 'user_state')
+        assert_equals(1, self.source.lookup.call_count)
+
+    def test_defaults_are_cached(self):
+        assert_equals('default state', self.caching.default(self.block, 'user_state'))
+        assert_equals('default state', self.caching.lookup(self.block, 'user_state'))
+        assert_equals(1, self.source.default.call_count)
+        assert_is(NO_VALUE, self.caching.lookup(self.block, 'user_state', False))
+
+        del self.data['items']
+        assert_is(NO_DEFAULT, self.caching.lookup(self.make_block('u1', 'd1'), 'items'))
+
+    def test_shared_between_blocks(self):
+        # Content is shared by blocks with the same definition, user state isn't
+        other_usage = self.make_block('u1', 'd0')
+        other_def = self.make_block('u2', 'd1')
+        self.caching.get(self.block, 'items')
+        self.caching.get(other_usage, 'items')
+        assert_equals(1, self.source.lookup.call_count)
+        self.caching.get(other_def, 'items')
+        assert_equals(2, self.source.lookup.call_count)
+
+        self.caching.has(self.block, 'user_state')
+        self.caching.has(other_usage, 'user_state')
+        assert_equals(4, self.source.lookup.call_count)
+
+    def test_writes_invalidate(self):
+        self.caching.get(self.block, 'items')
+        self.caching.set(self.block, 'items', [3])
+        assert_equals([3], self.caching.get(self.block, 'items'))
+
+        self.caching.set_many(self.block, {'items': [4], 'user_state': 'state'})
+        assert_equals([4], self.caching.get(self.block, 'items'))
+        assert_equals('state', self.caching.get(self.block, 'user_state'))
+
+        self.caching.delete(self.block, 'items')
+        assert_false(self.caching.has(self.block, 'items'))
+
+    def test_set_many_for_blocks(self):
+        other = self.make_block('u1', 'd1')
+        self.caching.get(self.block, 'items')
+        self.caching.set_many_for_blocks([self.block, other], [{'items': [3]}, {'user_state': 'state'}])
+        assert_equals(1, self.source.set_many_for_blocks.call_count)
+        assert_false(self.source.set_many.called)
+        assert_equals([3], self.caching.get(self.block, 'items'))
+
+    def test_get_many(self):
+        self.caching.get(self.block, 'items')
+        assert_equals({'items': [1, 2]}, self.caching.get_many(self.block, ['items', 'user_state']))
+        self.source.get_many.assert_called_once_with(self.block, ['user_state'])
+
+        # Names the source had no value for are remembered as missing
+        assert_false(self.caching.has(self.block, 'user_state'))
+        assert_equals(1, self.source.lookup.call_count)
+
+    def test_get_many_for_blocks(self):
+        self.caching = CachingFieldData(self.source, maxsize=None)
+        blocks = [self.make_block('u{}'.format(i), 'd{}'.format(i % 2)) for i in range(3)]
+        self.caching.get(blocks[0], 'items')
+        assert_equals(
+            [{'items': [1, 2]}] * 3,
+            self.caching.get_many_for_blocks(blocks, ['items', 'user_state'])
+        )
+        # Only the uncached fields are read, in a single call
+        assert_equals(1, self.source.get_many_for_blocks.call_count)
+        assert_equals(blocks, self.source.get_many_for_blocks.call_args[0][0])
+        assert_false(self.source.get_many.called)
+
+        assert_equals([{'items': [1, 2]}] * 3, self.caching.get_many_for_blocks(blocks, ['items', 'user_state']))
+        assert_equals(1, self.source.get_many_for_blocks.call_count)
+
+    def test_lru_eviction(self):
+        blocks = [self.make_block('u{}'.format(i), 'd{}'.format(i)) for i in range(4)]
+        for block in blocks:
+            self.caching.has(block, 'items')
+        # The first block's entry was evicted to make room for the last
+        self.caching.has(blocks[0], 'items')
+        assert_equals(5, self.source.lookup.call_count)
+        self.caching.has(blocks[3], 'items')
+        assert_equals(5, self.source.lookup.call_count)
+
+
+class TestSharedCachingFieldData(object):
+    """
+    Tests of :ref:`SharedCachingFieldData`.
+    """
+    # Each block reads through its own request's field data
+    # pylint: disable=protected-access
+    def setUp(self):
+        self.data = {'items': [1, 2]}
+        self.source = Mock(wraps=CountingDefaultFieldData(self.data))
+        self.cache = SharedFieldCache()
+        self.block = self.make_block('s0')
+
+    def make_block(self, user_id, def_id='d0'):
+        """Make a block reading through a new request's field data."""
+        return ListBlock(
+            runtime=Mock(),
+            field_data=SharedCachingFieldData(self.source, self.cache),
+            scope_ids=ScopeIds(user_id, 'list_block', def_id, 'u0'),
+        )
+
+    def test_shared_between_users(self):
+        other_user = self.make_block('s1')
+        assert_equals([1, 2], self.block._field_data.get(self.block, 'items'))
+        assert_equals([1, 2], other_user._field_data.get(other_user, 'items'))
+        assert_equals(1, self.source.lookup.call_count)
+        assert_equals((1, 1), (self.cache.hits, self.cache.misses))
+
+        # Values are copied on the way out
+        other_user._field_data.get(other_user, 'items').append(3)
+        assert_equals([1, 2], self.block._field_data.get(self.block, 'items'))
+
+    def test_user_fields_not_cached(self):
+        other_user = self.make_block('s1')
+        assert_false(self.block._field_data.has(self.block, 'user_state'))
+        assert_false(other_user._field_data.has(other_user, 'user_state'))
+        assert_equals(2, self.source.has.call_count)
+        assert_equals('default state', self.block._field_data.lookup(self.block, 'user_state'))
+        assert_equals(0, len(self.cache._entries))
+
+    def test_missing_values(self):
+        del self.data['items']
+        assert_false(self.block._field_data.has(self.block, 'items'))
+        assert_is(NO_DEFAULT, self.block._field_data.lookup(self.block, 'items'))
+        assert_is(NO_VALUE, self.block._field_data.lookup(self.block, 'items', False))
+        with assert_raises(KeyError):
+            self.block._field_data.get(self.block, 'items')
+        assert_equals(1, self.source.lookup.call_count)
+
+    def test_writes_invalidate_other_users(self):
+        other_user = self.make_block('s1')
+        other_def = self.make_block('s1', 'd1')
+        other_user._field_data.get(other_user, 'items')
+        other_def._field_data.has(other_def, 'items')
+
+        self.block._field_data.set_many(self.block, {'items': [3], 'user_state': 'state'})
+        assert_equals([3], other_user._field_data.get(other_user, 'items'))
+        assert_equals(3, self.source.lookup.call_count)
+
+        # Blocks with other definitions are still cached
+        other_def._field_data.has(other_def, 'items')
+        assert_equals(3, self.source.lookup.call_count)
+
+        self.block._field_data.delete(self.block, 'items')
+        assert_false(other_user._field_data.has(other_user, 'items'))
+
+    def test_set_many_for_blocks(self):
+        other_user = self.make_block('s1')
+        other_def = self.make_block('s0', 'd1')
+        other_user._field_data.get(other_user, 'items')
+        self.block._field_data.set_many_for_blocks([self.block, other_def], [{'items': [3]}, {'items': [4]}])
+        assert_equals(1, self.source.set_many_for_blocks.call_count)
+        assert_false(self.source.set_many.called)
+        assert_equals([4], other_user._field_data.get(other_user, 'items'))
+
+    def test_overridden_version(self):
+        # Other processes' writes are seen through an overridden version
+        self.cache.version = Mock(return_value='v1')
+        self.block._field_data.get(self.block, 'items')
+        self.data['items'] = [3]
+        assert_equals([1, 2], self.block._field_data.get(self.block, 'items'))
+        self.cache.version.return_value = 'v2'
+        assert_equals([3], self.block._field_data.get(self.block, 'items'))
+
+    def test_get_many(self):
+        other_user = self.make_block('s1')
+        self.block._field_data.get_many(self.block, ['items', 'user_state'])
+        self.source.get_many.assert_called_once_with(self.block, ['items', 'user_state'])
+        assert_equals({'items': [1, 2]}, other_user._field_data.get_many(other_user, ['items']))
+        assert_equals(1, self.source.get_many.call_count)
+
+    def test_get_many_for_blocks(self):
+        blocks = [self.make_block('s{}'.format(i), 'd{}'.format(i)) for i in range(3)]
+        field_data = blocks[0]._field_data
+        assert_equals([{'items': [1, 2]}] * 3, field_data.get_many_for_blocks(blocks, ['items']))
+        assert_equals(1, self.source.get_many_for_blocks.call_count)
+        assert_false(self.source.get_many.called)
+
+        assert_equals([{'items': [1, 2]}] * 3, field_data.get_many_for_blocks(blocks, ['items']))
+        assert_equals(1, self.source.get_many_for_blocks.call_count)
+
+    def test_memory_budget(self):
+        self.cache = SharedFieldCache(max_size=2000)
+        blocks = [self.make_block('s0', 'd{}'.format(i)) for i in range(3)]
+        self.data['items'] = range(50)
+        for block in blocks:
+            block._field_data.get(block, 'items')
+        assert_equals(1, len(self.cache._entries))
+        assert 0 < self.cache.size <= 2000
+
+        # Values larger than the whole budget aren't cached
+        self.data['items'] = range(500)
+        blocks[0]._field_data.get(blocks[0], 'items')
+        assert_equals(1, len(self.cache._entries))
+
+        self.cache.clear()
+        assert_equals((0, 0), (len(self.cache._entries), self.cache.size))
+
+    def test_forgotten_versions(self):
+        self.cache = SharedFieldCache(max_versions=1)
+        blocks = [self.make_block('s0', 'd{}'.format(i)) for i in range(3)]
+        for block in blocks:
+            block._field_data.get(block, 'items')
+        assert_equals(3, self.source.lookup.call_count)
+
+        blocks[0]._field_data.set(blocks[0], 'items', [3])
+        blocks[1]._field_data.set(blocks[1], 'items', [4])
+        assert_equals(1, len(self.cache._versions))
+
+        # Values of blocks whose versions were forgotten are read again
+        blocks[0]._field_data.get(blocks[0], 'items')
+        blocks[2]._field_data.get(blocks[2], 'items')
+        assert_equals(5, self.source.lookup.call_count)
+        blocks[2]._field_data.get(blocks[2], 'items')
+        assert_equals(5, self.source.lookup.call_count)
+
+
+class DebouncedBlock(XBlock):
+    """
+    An XBlock with a field whose saves can be debounced.
+    """
+    position = Integer(scope=Scope.user_state, debounce=True)
+    answer = String(scope=Scope.user_state)
+
+
+class TestDebouncingFieldData(object):
+    """
+    Tests of :ref:`DebouncingFieldData`.
+    """
+    def setUp(self):
+        self.now = 1000
+        self.data = {}
+        self.source = Mock(wraps=DictFieldData(self.data))
+        self.field_data = DebouncingFieldData(self.source, window=30, max_held_size=1000, clock=lambda: self.now)
+        self.block = self.make_block('s0')
+
+    def make_block(self, user_id):
+        """Make a block saving through the debouncing field data."""
+        return DebouncedBlock(
+            runtime=Mock(),
+            field_data=self.field_data,
+            scope_ids=ScopeIds(user_id, 'debounced', 'd0', 'u0'),
+        )
+
+    def test_saves_coalesced(self):
+        for position in range(5):
+            self.block.position = position
+            self.block.save()
+            self.now += 5
+        self.block.answer = u'answer'
+        self.block.save()
+        assert_false(self.source.set_many_for_blocks.called)
+        assert_equals({'answer': u'answer'}, self.data)
+        assert_equals(1, len(self.field_data))
+
+        # Held values are read back
+        assert_equals(4, self.make_block('s0').position)
+        assert_equals({'position': 4}, self.field_data.get_many(self.block, ['position']))
+
+        # Once the window has passed, the latest value is written with the next save
+        self.now += 5
+        self.block.answer = u'changed'
+        self.block.save()
+        self.source.set_many_for_blocks.assert_called_once_with([self.block], [{'position': 4}])
+        assert_equals({'answer': u'changed', 'position': 4}, self.data)
+        assert_equals(0, len(self.field_data))
+
+    def test_flush(self):
+        self.block.position = 5
+        self.block.save()
+        other_user = self.make_block('s1')
+        self.field_data.set(other_user, 'position', 6)
+
+        self.field_data.flush(user_id='s1')
+        assert_equals({'position': 6}, self.data)
+        self.field_data.flush()
+        assert_equals({'position': 5}, self.data)
+        assert_equals(0, len(self.field_data))
+
+    def test_max_held_size(self):
+        self.field_data.max_held_size = 0
+        self.block.position = 5
+        self.block.save()
+        assert_equals({'position': 5}, self.data)
+
+    def test_runtime_policy(self):
+        field_data = DebouncingFieldData(self.source, field_names=['answer'], clock=lambda: self.now)
+        field_data.set(self.block, 'answer', u'held')
+        assert_equals({}, self.data)
+        assert_equals(u'held', field_data.lookup(self.block, 'answer'))
+
+    def test_delete(self):
+        self.block.position = 5
+        self.block.save()
+        del self.block.position
+        assert_equals(0, len(self.field_data))
+        assert_is(None, self.make_block('s0').position)
+
+    def test_increments_coalesced(self):
+        self.field_data.set(self.block, 'position', CounterIncrement(5, 2))
+        self.field_data.set(self.block, 'position', CounterIncrement(6, 1))
+        self.field_data.flush()
+        (_blocks, (update_dict,)), _kwargs = self.source.set_many_for_blocks.call_args
+        assert_equals(3, update_dict['position'].delta)
+
+    def test_failed_write_held_again(self):
+        self.block.position = 5
+        self.block.save()
+        self.source.set_many_for_blocks.side_effect = KeyValueMultiSaveError([[]])
+        with assert_raises(KeyValueMultiSaveError):
+            self.field_data.flush()
+        assert_equals(1, len(self.field_data))
+
+    def test_failed_later_write_held_again(self):
+        self.block.position = 5
+        self.block.save()
+        self.now += 60
+        self.source.set_many_for_blocks.side_effect = KeyValueMultiSaveError([[]])
+        # Saving another block isn't failed by the held values of this one
+        other_user = self.make_block('s1')
+        other_user.answer = u'answer'
+        other_user.save()
+        assert_equals({'answer': u'answer'}, self.data)
+        assert_equals(1, len(self.field_data))
+
+        self.source.set_many_for_blocks.side_effect = None
+        self.field_data.flush()
+        assert_equals(5, self.data['position'])
+
+    def test_blocks_not_kept_alive(self):
+        self.block.position = 5
+        self.block.save()
+        block_ref = weakref.ref(self.block)
+        del self.block
+        gc.collect()
+        assert_is(None, block_ref())
+
+        # The held value is written for a bare block with the same scope ids
+        self.field_data.flush()
+        (blocks, updates), _kwargs = self.source.set_many_for_blocks.call_args
+        assert_equals([{'position': 5}], updates)
+        assert_equals(ScopeIds('s0', 'debounced', 'd0', 'u0'), blocks[0].scope_ids)
+        assert_true(isinstance(blocks[0], DebouncedBlock))
@@ -5,20 +5,29 @@ Tests for classes extending Field.
 # Allow accessing protected members for testing purposes
 # pylint: disable=W0212
 
+import array
+import collections
+import copy
+import mock
 from mock import MagicMock, Mock
 import unittest
 
 import datetime as dt
+import dateutil.parser
+import dateutil.tz
 import pytz
 import warnings
 from contextlib import contextmanager
 
 from xblock.core import XBlock, Scope
+from xblock.exceptions import KeyValueMultiSaveError, XBlockSaveError
 from xblock.field_data import DictFieldData
 from xblock.fields import (
-    Any, Boolean, Dict, Field, Float,
-    Integer, List, String, DateTime, Reference, ReferenceList, Sentinel
+    Any, AppendLog, Boolean, Counter, CounterIncrement, Dict, DictPatch, Field, Float,
+    Integer, List, NumericArray, String, DateTime, Reference, ReferenceList, Sentinel, ShardedDict, TrackedArray,
+    EXPLICITLY_SET, FIELD_VALIDATION, FieldValidation, ModelMetaclass
 )
+from xblock.fields import numpy as INSTALLED_NUMPY
 
 from xblock.test.tools import assert_equals, assert_not_equals, assert_not_in
 from xblock.fields import scope_key, ScopeIds
@@ -270,6 +279,54 @@ class DateTest(FieldTest):
         with self.assertRaises(TypeError):
             DateTime().to_json('not a datetime')
 
+    def test_iso_shapes_match_dateutil(self):
+        for value in (
+                '2014-04-01T02:03:04.567890',
+                '2014-04-01T02:03:04.5',
+                '2014-04-01T02:03:04',
+                '2014-04-01T02:03',
+                '2014-04-01 02:03:04',
+                '2014-04-01',
+                '2014-04-01T02:03:04Z',
+                '2014-04-01T02:03:04+05:30',
+                '2014-04-01T02:03:04.25-0800',
+                u'2014-04-01T02:03:04.567890',
+        ):
+            parsed = DateTime()._parse_iso(value)
+            self.assertIsNotNone(parsed, value)
+            # pylint: disable=maybe-no-member
+            expected = dateutil.parser.parse(value)
+            if expected.tzinfo is None:
+                expected = expected.replace(tzinfo=pytz.utc)
+            self.assertEqual(expected, parsed)
+            self.assertEqual(expected.utcoffset(), parsed.utcoffset())
+
+    def test_iso_zero_offsets_are_utc(self):
+        for value in ('2014-04-01T02:03:04Z', '2014-04-01T02:03:04+00:00', '2014-04-01T02:03:04-0000'):
+            parsed = DateTime()._parse_iso(value)
+            self.assertIsInstance(parsed.tzinfo, dateutil.tz.tzutc, value)
+            self.assertEqual(dt.datetime(2014, 4, 1, 2, 3, 4, tzinfo=pytz.utc), parsed)
+
+    def test_other_shapes_use_dateutil(self):
+        for value in ('April 1, 2014', '2014-04-01T02:03:04.1234567', '2014-02-30T00:00:00', '2014-04-01T02:03:04\n'):
+            self.assertIsNone(DateTime()._parse_iso(value))
+        self.assertEqual(
+            dt.datetime(2014, 4, 1).replace(tzinfo=pytz.utc),
+            DateTime().from_json('April 1, 2014'),
+        )
+        with self.assertRaises(ValueError):
+            DateTime().from_json('2014-02-30T00:00:00')
+
+    def test_memo(self):
+        field = DateTime(memo_size=2)
+        first = field.from_json('2014-04-01T02:03:04.000000')
+        self.assertIs(first, field.from_json('2014-04-01T02:03:04.000000'))
+        field.from_json('2014-04-02T02:03:04.000000')
+        field.from_json('2014-04-03T02:03:04.000000')
+        self.assertEqual(2, len(field._memo))
+        self.assertIsNot(first, field.from_json('2014-04-01T02:03:04.000000'))
+        self.assertNotIn('memo_size', field.runtime_options)
+
 
 class AnyTest(FieldTest):
     """
@@ -377,6 +434,20 @@ class DictTest(FieldTest):
         self.assertJSONOrSetTypeError(3.7)
         self.assertJSONOrSetTypeError(True)
 
+    def test_to_json_patch(self):
+        field = Dict(patch=True)
+        patch = field.to_json_patch({'a': 1, 'b': 2, 'c': 3}, {'a': 1, 'b': 5, 'd': 4})
+        self.assertIsInstance(patch, DictPatch)
+        self.assertEquals({'a': 1, 'b': 5, 'd': 4}, patch)
+        self.assertEquals({'b': 5, 'd': 4}, patch.changed)
+        self.assertEquals(['c'], patch.deleted)
+
+    def test_to_json_patch_whole(self):
+        field = Dict(patch=True)
+        self.assertNotIsInstance(field.to_json_patch(EXPLICITLY_SET, {'a': 1}), DictPatch)
+        self.assertNotIsInstance(field.to_json_patch(None, {'a': 1}), DictPatch)
+        self.assertIs(None, field.to_json_patch({'a': 1}, None))
+
 
 def test_field_name_defaults():
     # Tests field display name default values
@@ -505,6 +576,604 @@ def test_twofaced_field_access():
     assert_not_in('how_many', field_tester._get_fields_to_save())   # pylint: disable=W0212
 
 
+class FieldValidationTest(unittest.TestCase):
+    """
+    Tests of the modes of :data:`~xblock.fields.FIELD_VALIDATION`.
+    """
+    def setUp(self):
+        self.addCleanup(FIELD_VALIDATION.configure, FIELD_VALIDATION.mode, FIELD_VALIDATION.sample_rate)
+        self.addCleanup(FIELD_VALIDATION.reset_counters)
+        FIELD_VALIDATION.reset_counters()
+
+        class ValidatedBlock(XBlock):
+            """A block with a field that doesn't enforce its type."""
+            count = Integer(scope=Scope.settings)
+            checked_count = Integer(scope=Scope.settings, enforce_type=True)
+
+        self.block = ValidatedBlock(MagicMock(), DictFieldData({}), Mock())
+
+    @contextmanager
+    def assertWarnings(self, count):
+        """Asserts that the contained code raises `count` enforce_type warnings."""
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", DeprecationWarning)
+            yield
+        self.assertEquals(count, len(caught))
+
+    def test_off(self):
+        FIELD_VALIDATION.configure(FieldValidation.OFF)
+        with self.assertWarnings(0):
+            self.block.count = 'abc'
+        self.assertEquals('abc', self.block.count)
+        self.block.checked_count = '5'
+        self.assertEquals(5, self.block.checked_count)
+
+    def test_sampled(self):
+        FIELD_VALIDATION.configure(FieldValidation.SAMPLED, sample_rate=1)
+        with self.assertWarnings(0):
+            self.block.count = 'abc'
+            self.block.count = '5'
+            self.block.count = '6'
+        self.assertEquals('6', self.block.count)
+        self.assertEquals(
+            collections.Counter({('failed', 'count'): 1, ('modified', 'count'): 2}),
+            FIELD_VALIDATION.counters,
+        )
+
+    def test_sample_rate(self):
+        FIELD_VALIDATION.configure(FieldValidation.SAMPLED, sample_rate=4)
+        for _ in range(8):
+            self.block.count = '5'
+        self.assertEquals(2, FIELD_VALIDATION.counters['modified', 'count'])
+
+    def test_warn(self):
+        FIELD_VALIDATION.configure(FieldValidation.WARN)
+        with self.assertWarnings(1):
+            self.block.count = 'abc'
+        self.assertEquals({}, FIELD_VALIDATION.counters)
+
+    def test_strict(self):
+        FIELD_VALIDATION.configure(FieldValidation.STRICT)
+        with self.assertRaises(ValueError):
+            self.block.count = 'abc'
+        self.block.count = '5'
+        self.assertEquals(5, self.block.count)
+
+    def test_configure_errors(self):
+        with self.assertRaises(ValueError):
+            FIELD_VALIDATION.configure('sometimes')
+        with self.assertRaises(ValueError):
+            FIELD_VALIDATION.configure(FieldValidation.SAMPLED, sample_rate=0)
+
+    def test_configure_from_environ(self):
+        validation = FieldValidation()
+        validation.configure_from_environ({'XBLOCK_FIELD_VALIDATION': 'sampled:1000'})
+        self.assertIs(FieldValidation.SAMPLED, validation.mode)
+        self.assertEquals(1000, validation.sample_rate)
+        validation.configure_from_environ({'XBLOCK_FIELD_VALIDATION': 'strict'})
+        self.assertIs(FieldValidation.STRICT, validation.mode)
+        validation.configure_from_environ({'XBLOCK_FIELD_VALIDATION': 'sampled:none'})
+        self.assertIs(FieldValidation.STRICT, validation.mode)
+        validation.configure_from_environ({})
+        self.assertIs(FieldValidation.STRICT, validation.mode)
+
+
+class EvenInteger(Integer):
+    """An Integer that rounds down to an even number."""
+    def enforce_type(self, value):
+        return super(EvenInteger, self).enforce_type(value) // 2 * 2
+
+
+class ScalarBlock(XBlock):
+    """
+    An XBlock with scalar fields, for testing their specialized `__get__` and `__set__`.
+    """
+    count = Integer(scope=Scope.settings)
+    name = String(scope=Scope.settings)
+    checked_name = String(scope=Scope.settings, enforce_type=True)
+    even = EvenInteger(scope=Scope.settings, enforce_type=True)
+
+
+class ScalarFieldTest(unittest.TestCase):
+    """
+    Tests of the `__get__` and `__set__` specialized by `scalar_field`.
+    """
+    def setUp(self):
+        self.block = ScalarBlock(MagicMock(), DictFieldData({}), Mock())
+
+    def test_set_marks_dirty(self):
+        self.assertEquals(None, self.block.count)
+        self.block.count = 5
+        self.assertEquals(5, self.block.count)
+        self.assertEquals(EXPLICITLY_SET, self.block._dirty_fields[ScalarBlock.count])
+        self.assertEquals({'count': 5}, self.block._get_fields_to_save())
+
+    def test_set_other_type_is_enforced(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", DeprecationWarning)
+            self.block.name = 5
+        self.assertEquals(1, len(caught))
+        with self.assertRaises(TypeError):
+            self.block.checked_name = 5
+
+    def test_subclass_enforce_type(self):
+        self.block.even = 7
+        self.assertEquals(6, self.block.even)
+
+    def test_model_without_slots(self):
+        class Model(object):
+            """A model keeping its field values in dicts."""
+            __metaclass__ = ModelMetaclass
+
+            flag = Boolean(scope=Scope.settings, default=True)
+
+            def __init__(self):
+                self._field_data = DictFieldData({})
+                self._field_data_cache = {}
+                self._dirty_fields = {}
+                self.scope_ids = Mock()
+
+        model = Model()
+        self.assertTrue(model.flag)
+        model.flag = False
+        self.assertFalse(model.flag)
+        self.assertEquals(EXPLICITLY_SET, model._dirty_fields[Model.flag])
+
+
+class StoredDataTest(unittest.TestCase):
+    """
+    Base class for tests of the fields of a `block_class` block reading from
+    a copy of `stored_data`, through a wrapped :class:`DictFieldData`.
+    """
+    block_class = None
+    stored_data = {}
+
+    def setUp(self):
+        self.data = copy.deepcopy(self.stored_data)
+        self.field_data = Mock(wraps=DictFieldData(self.data))
+        self.block = self.make_block()
+
+    def make_block(self):
+        """Make a block reading from the stored data."""
+        return self.block_class(MagicMock(), self.field_data, Mock())  # pylint: disable=not-callable
+
+    def read_names(self):
+        """Return the names read from the field data, one at a time or in bulk."""
+        names = [args[1] for args, _ in self.field_data.get.call_args_list]
+        for args, _ in self.field_data.get_many.call_args_list:
+            names.extend(sorted(args[1]))
+        return names
+
+
+class ShardedBlock(XBlock):
+    """
+    An XBlock with a ShardedDict field, for testing storing its entries separately.
+    """
+    responses = ShardedDict(scope=Scope.user_state)
+
+
+class ShardedDictTest(StoredDataTest):
+    """
+    Tests of storing the entries of a `ShardedDict` separately.
+    """
+    block_class = ShardedBlock
+    stored_data = {
+        'responses': ['q1', 'q2', 'q3'],
+        'responses/q1': {'answer': 1},
+        'responses/q2': {'answer': 2},
+        'responses/q3': 'skipped',
+    }
+
+    def test_entries_read_lazily(self):
+        self.assertEquals(3, len(self.block.responses))
+        self.assertEquals(['q1', 'q2', 'q3'], list(self.block.responses))
+        self.assertIn('q2', self.block.responses)
+        self.assertNotIn('q4', self.block.responses)
+        self.assertEquals(['responses'], self.read_names())
+
+        self.assertEquals({'answer': 2}, self.block.responses['q2'])
+        self.assertEquals({'answer': 2}, self.block.responses['q2'])
+        with self.assertRaises(KeyError):
+            self.block.responses['q4']  # pylint: disable=pointless-statement
+        self.assertEquals(['responses', 'responses/q2'], self.read_names())
+
+    def test_load(self):
+        self.block.responses.load(['q1', 'q3', 'q4'])  # pylint: disable=no-member
+        self.assertEquals('skipped', self.block.responses['q3'])
+        self.assertEquals(['responses', 'responses/q1', 'responses/q3'], self.read_names())
+
+    def test_only_changed_entries_written(self):
+        self.block.responses['q1']['answer'] = 10
+        self.assertEquals({'answer': 2}, self.block.responses['q2'])
+        self.block.responses['q3'] = 'answered'
+        self.assertEquals(
+            {'responses/q1': {'answer': 10}, 'responses/q3': 'answered'},
+            self.block._get_fields_to_save()
+        )
+        self.block.save()
+        self.assertEquals({}, self.block._get_fields_to_save())
+
+        self.block.responses['q1']['answer'] = 11
+        self.assertEquals({'responses/q1': {'answer': 11}}, self.block._get_fields_to_save())
+
+    def test_keys_written_when_changed(self):
+        self.block.responses['q4'] = 'new'
+        del self.block.responses['q2']
+        # Deleted entries are only deleted as the block is saved
+        self.assertIn('responses/q2', self.data)
+        self.block.save()
+
+        self.assertEquals(['q1', 'q3', 'q4'], self.data['responses'])
+        self.assertEquals('new', self.data['responses/q4'])
+        self.assertNotIn('responses/q2', self.data)
+        self.assertEquals(['q1', 'q3', 'q4'], list(self.make_block().responses))
+
+    def test_deleted_entries_kept_when_save_fails(self):
+        del self.block.responses['q2']
+        del self.block.responses['q3']
+        self.block.responses['q3'] = 'again'
+        self.field_data.set_many.side_effect = KeyValueMultiSaveError([])
+        with self.assertRaises(XBlockSaveError):
+            self.block.save()
+        self.assertEquals({'answer': 2}, self.data['responses/q2'])
+        self.assertEquals(['q1', 'q2', 'q3'], list(self.make_block().responses))
+
+        self.field_data.set_many.side_effect = None
+        self.block.save()
+        self.assertEquals(
+            {'responses': ['q1', 'q3'], 'responses/q1': {'answer': 1}, 'responses/q3': 'again'},
+            self.data
+        )
+
+    def test_assign_and_delete(self):
+        self.block.responses = {'q5': 5}
+        self.block.save()
+        self.assertEquals({'responses': ['q5'], 'responses/q5': 5}, self.data)
+        self.assertEquals({'q5': 5}, ShardedBlock.responses.to_json(self.make_block().responses))
+
+        del self.block.responses
+        self.assertEquals({}, self.data)
+        self.assertEquals(0, len(self.block.responses))
+
+    def test_default_rejected(self):
+        with self.assertRaises(ValueError):
+            ShardedDict(default={'a': 1})
+        with self.assertRaises(ValueError):
+            ShardedDict('help', {'a': 1})
+
+    def test_partial_save(self):
+        self.block.responses['q1'] = 'first'
+        self.block.responses['q4'] = 'new'
+        self.block._save_failed(['responses/q1'])
+        self.assertEquals(
+            {'responses': ['q1', 'q2', 'q3', 'q4'], 'responses/q4': 'new'},
+            self.block._get_fields_to_save()
+        )
+
+
+class LogBlock(XBlock):
+    """
+    An XBlock with AppendLog fields, for testing storing them in segments.
+    """
+    history = AppendLog(scope=Scope.user_state, segment_size=3)
+    long_history = AppendLog(scope=Scope.user_state, segment_size=100)
+
+
+class AppendLogTest(StoredDataTest):
+    """
+    Tests of storing an `AppendLog` in segments.
+    """
+    block_class = LogBlock
+    stored_data = {
+        'history': {'length': 7, 'segment_size': 3},
+        'history/0': [0, 1, 2],
+        'history/1': [3, 4, 5],
+        'history/2': [6],
+    }
+
+    def test_reads(self):
+        # pylint: disable=no-member
+        self.assertEquals(7, len(self.block.history))
+        self.assertEquals([5, 6], self.block.history.tail(2))
+        self.assertEquals(['history', 'history/1', 'history/2'], self.read_names())
+
+        self.assertEquals(4, self.block.history[4])
+        self.assertEquals(6, self.block.history[-1])
+        with self.assertRaises(IndexError):
+            self.block.history[7]  # pylint: disable=pointless-statement
+        self.assertEquals([1, 2, 3], self.block.history.page(1, 3))
+        self.assertEquals([], self.block.history.page(7, 3))
+        self.assertEquals(['history', 'history/1', 'history/2', 'history/0'], self.read_names())
+
+    def test_iteration(self):
+        # pylint: disable=no-member
+        self.assertEquals([[0, 1], [2, 3], [4, 5], [6]], list(self.block.history.pages(2)))
+        self.assertEquals(range(7), list(self.make_block().history))
+
+    def test_append_writes_new_segments(self):
+        self.block.history.extend([7, 8, 9])
+        self.assertEquals(['history', 'history/2'], self.read_names())
+        self.assertEquals(
+            {
+                'history': {'length': 10, 'segment_size': 3},
+                'history/2': [6, 7, 8],
+                'history/3': [9],
+            },
+            self.block._get_fields_to_save()
+        )
+        self.block.save()
+        self.assertEquals({}, self.block._get_fields_to_save())
+
+        self.block.history.append(10)
+        self.assertEquals(
+            {'history': {'length': 11, 'segment_size': 3}, 'history/3': [9, 10]},
+            self.block._get_fields_to_save()
+        )
+
+    def test_stored_segment_size_kept(self):
+        # long_history is declared with segments of 100 entries, but stored in segments of 3
+        for name, value in self.data.items():
+            self.data['long_' + name] = value
+        self.block.long_history.append(7)
+        self.block.save()
+        self.assertEquals([6, 7], self.data['long_history/2'])
+        self.assertEquals(range(8), list(self.make_block().long_history))
+
+    def test_new_log(self):
+        self.data.clear()
+        self.assertEquals([], list(self.block.history))
+        self.block.history.append('first')
+        self.block.save()
+        self.assertEquals({'history': {'length': 1, 'segment_size': 3}, 'history/0': ['first']}, self.data)
+
+    def test_assign_and_delete(self):
+        self.block.history = ['a', 'b']
+        # The old segments are only deleted as the block is saved
+        self.assertEquals([6], self.data['history/2'])
+        self.block.save()
+        self.assertEquals({'history': {'length': 2, 'segment_size': 3}, 'history/0': ['a', 'b']}, self.data)
+        self.assertEquals(['a', 'b'], LogBlock.history.to_json(self.make_block().history))
+
+        del self.block.history
+        self.assertEquals({}, self.data)
+        self.assertEquals(0, len(self.block.history))
+
+    def test_default_rejected(self):
+        with self.assertRaises(ValueError):
+            AppendLog(default=[1, 2])
+        with self.assertRaises(ValueError):
+            AppendLog('help', [1, 2])
+
+    def test_cleared_segments_kept_when_save_fails(self):
+        # pylint: disable=no-member
+        self.block.history.clear()
+        self.block.history.append('new')
+        self.field_data.set_many.side_effect = KeyValueMultiSaveError([])
+        with self.assertRaises(XBlockSaveError):
+            self.block.save()
+        self.assertEquals(range(7), list(self.make_block().history))
+
+        self.field_data.set_many.side_effect = None
+        self.block.save()
+        self.assertEquals({'history': {'length': 1, 'segment_size': 3}, 'history/0': ['new']}, self.data)
+
+
+class ArrayBlock(XBlock):
+    """
+    An XBlock with NumericArray fields, for testing packed arrays.
+    """
+    scores = NumericArray(scope=Scope.user_state_summary)
+    histogram = NumericArray(scope=Scope.user_state_summary, typecode='i')
+
+
+class NumericArrayTest(StoredDataTest):
+    """
+    Tests of packed `NumericArray` values.
+    """
+    block_class = ArrayBlock
+    stored_data = {'scores': 'd:AAAAAAAA8D8AAAAAAAAEQA=='}
+
+    def test_json(self):
+        field = NumericArray(typecode='i')
+        self.assertEquals('i:AQAAAAIAAAA=', field.to_json(array.array('i', [1, 2])))
+        self.assertEquals(array.array('i', [1, 2]), field.from_json('i:AQAAAAIAAAA='))
+        self.assertEquals(array.array('d', [1.0, 2.0]), NumericArray().from_json('i:AQAAAAIAAAA='))
+        self.assertEquals(array.array('i', [1, 2]), field.from_json([1, 2]))
+        self.assertIs(None, field.from_json(None))
+        with self.assertRaises(ValueError):
+            field.from_json('AQAAAAIAAAA=')
+        with self.assertRaises(TypeError):
+            field.from_json({'a': 1})
+        with self.assertRaises(ValueError):
+            NumericArray(typecode='l')
+
+    def test_read(self):
+        self.assertEquals(array.array('d', [1.0, 2.5]), self.block.scores)
+        self.assertIsInstance(self.block.scores, TrackedArray)
+        self.assertEquals(array.array('i'), self.block.histogram)
+        self.assertEquals({}, self.block._get_fields_to_save())
+
+    def test_changes_tracked(self):
+        self.block.scores[0] = 3.0
+        self.block.histogram.extend([0, 0, 0])
+        self.block.histogram[1] += 1
+        self.assertEquals(
+            {'scores': 'd:AAAAAAAACEAAAAAAAAAEQA==', 'histogram': 'i:AAAAAAEAAAAAAAAA'},
+            self.block._get_fields_to_save()
+        )
+        self.block.save()
+        self.assertEquals(array.array('i', [0, 1, 0]), self.make_block().histogram)
+
+        self.block.scores.add([1, 1])
+        self.block.scores.scale(2)
+        self.block.save()
+        self.assertEquals(array.array('d', [8.0, 7.0]), self.make_block().scores)
+
+    def test_whole_array_updates(self):
+        # The same results with NumPy, if it's installed, and without it
+        for numpy_module in set([None, INSTALLED_NUMPY]):
+            with mock.patch('xblock.fields.numpy', numpy_module):
+                field = Mock()
+                values = TrackedArray('B', [1, 2], Mock(), field)
+                values.add([1, 2])
+                values.scale(3)
+                self.assertEquals(array.array('B', [6, 12]), values)
+                with self.assertRaises(OverflowError):
+                    values.scale(100)
+                with self.assertRaises(TypeError):
+                    values.add(0.5)
+                with self.assertRaises(ValueError):
+                    values.add([1])
+                self.assertEquals(array.array('B', [6, 12]), values)
+                self.assertEquals(2, field._mark_mutated.call_count)
+
+                floats = TrackedArray('f', [1.0, 2.0], Mock(), field)
+                floats.add(0.5)
+                floats.scale(2)
+                self.assertEquals(array.array('f', [3.0, 5.0]), floats)
+
+                empty = TrackedArray('d', [], Mock(), field)
+                empty.add(1)
+                empty.scale(2)
+                self.assertEquals(array.array('d'), empty)
+
+    def test_buffer_changes(self):
+        scores = self.block.scores
+        self.assertEquals(scores.tostring(), str(buffer(scores)))
+        self.assertEquals({}, self.block._get_fields_to_save())
+        scores.mark_changed()
+        self.assertEquals(['scores'], self.block._get_fields_to_save().keys())
+
+    def test_assigned_value_tracked(self):
+        self.block.histogram = array.array('i', [1, 2])
+        self.block.save()
+        self.block.histogram.append(3)
+        self.block.save()
+        self.assertEquals(array.array('i', [1, 2, 3]), self.make_block().histogram)
+
+
+class CounterBlock(XBlock):
+    """
+    An XBlock with a Counter field, for testing saving increments.
+    """
+    answered = Counter(scope=Scope.user_state_summary)
+
+
+class CounterTest(unittest.TestCase):
+    """
+    Tests of saving `Counter` fields as increments.
+    """
+    def setUp(self):
+        self.data = {'answered': 10}
+        self.block = CounterBlock(MagicMock(), DictFieldData(self.data), Mock())
+
+    def test_increment_saved(self):
+        self.block.answered += 1
+        self.block.answered += 2
+        to_save = self.block._get_fields_to_save()
+        self.assertEquals({'answered': 13}, to_save)
+        self.assertIsInstance(to_save['answered'], CounterIncrement)
+        self.assertEquals(3, to_save['answered'].delta)
+
+        self.block.save()
+        self.assertEquals(13, self.data['answered'])
+        self.block.answered -= 1
+        self.assertEquals(-1, self.block._get_fields_to_save()['answered'].delta)
+
+    def test_unchanged_not_saved(self):
+        self.block.answered += 1
+        self.block.answered -= 1
+        self.assertEquals({}, self.block._get_fields_to_save())
+
+    def test_default(self):
+        self.data.clear()
+        self.block.answered += 1
+        self.assertEquals(1, self.block._get_fields_to_save()['answered'].delta)
+        self.assertNotIsInstance(Counter().to_json_increment(EXPLICITLY_SET, 5), CounterIncrement)
+
+    def test_assignment_saved_whole(self):
+        self.block.answered += 1
+        self.block.answered = 0
+        to_save = self.block._get_fields_to_save()
+        self.assertEquals({'answered': 0}, to_save)
+        self.assertNotIsInstance(to_save['answered'], CounterIncrement)
+
+        # Increments after an assignment are saved with it
+        self.block.answered += 2
+        self.assertEquals(2, self.block.answered)
+        self.assertNotIsInstance(self.block._get_fields_to_save()['answered'], CounterIncrement)
+
+        self.block.save()
+        self.assertEquals(2, self.data['answered'])
+        self.block.answered = self.block.answered + 1
+        self.assertEquals(1, self.block._get_fields_to_save()['answered'].delta)
+
+
+class ModelMetaclassTest(unittest.TestCase):
+    """
+    Tests of how :class:`~xblock.fields.ModelMetaclass` collects fields.
+    """
+    def scanned_fields(self, cls):
+        """Return the fields of `cls` found by scanning every attribute of every class in its mro."""
+        fields = {}
+        for base_class in cls.mro():
+            for attr_name in dir(base_class):
+                attr_value = getattr(base_class, attr_name)
+                if isinstance(attr_value, Field):
+                    fields.setdefault(attr_name, attr_value)
+        return fields
+
+    def test_diamond(self):
+        # pylint: disable=no-member
+        class Base(XBlock):
+            """The top of the diamond."""
+            shared = String(scope=Scope.settings)
+            base_only = Integer(scope=Scope.settings)
+
+        class Left(Base):
+            """Inherits `shared`."""
+            left = Boolean(scope=Scope.settings)
+
+        class Right(Base):
+            """Overrides `shared`."""
+            shared = Integer(scope=Scope.content)
+
+        class Bottom(Left, Right):
+            """Gets `shared` from Right."""
+            pass
+
+        self.assertEquals(self.scanned_fields(Bottom), Bottom.fields)
+        self.assertIs(Right.shared, Bottom.fields['shared'])
+        self.assertIs(Base.base_only, Bottom.fields['base_only'])
+        self.assertIs(Left.left, Bottom.fields['left'])
+
+    def test_plain_mixin(self):
+        # pylint: disable=no-member
+        class PlainMixin(object):
+            """A mixin that isn't made by ModelMetaclass."""
+            mixed = String(scope=Scope.settings)
+
+        class Block(PlainMixin, XBlock):
+            """A block with fields from a plain mixin."""
+            own = Float(scope=Scope.settings)
+
+        self.assertEquals(self.scanned_fields(Block), Block.fields)
+        self.assertEquals('mixed', Block.fields['mixed']._name)
+
+    def test_hidden_field(self):
+        # pylint: disable=no-member
+        class Base(XBlock):
+            """Declares the field."""
+            hidden = String(scope=Scope.settings)
+
+        class Hider(Base):
+            """Hides the field with a plain attribute."""
+            hidden = 'not a field'
+
+        self.assertEquals(self.scanned_fields(Hider), Hider.fields)
+        self.assertIs(Base.hidden, Hider.fields['hidden'])
+
+
 class SentinelTest(unittest.TestCase):
     """
     Tests of :ref:`xblock.fields.Sentinel`.
@@ -523,3 +1192,8 @@ class SentinelTest(unittest.TestCase):
         self.assertEquals(a_dict[base], True)
         self.assertNotIn(Sentinel('foo'), a_dict)
         self.assertNotIn('base', a_dict)
+
+    def test_copy(self):
+        base = Sentinel('base')
+        self.assertIs(base, copy.copy(base))
+        self.assertIs(base, copy.deepcopy([base])[0])
@@ -25,6 +25,7 @@ particular combination of initial conditions that we want to test)
 """
 
 import copy
+import functools
 from mock import Mock
 
 from xblock.core import XBlock
@@ -391,6 +392,11 @@ class MutableTestCases(UniversalTestCases, MutationProperties):
     def mutate(self, value):
         """Modify the supplied value"""
         value.append('foo')
+
+
+class TrackedMutableTestCases(MutableTestCases):
+    """Set up tests of a mutable field that tracks its own mutations"""
+    field_class = functools.partial(List, track_mutations=True)
 # pylint: enable=E1101
 
 
@@ -429,6 +435,29 @@ class TestMutableWithComputedDefault(MutableTestCases, ComputedDefaultTestCases,
         return ([None] * i for i in xrange(1000))
 
 
+class TestTrackedMutableWithStaticDefault(
+        TrackedMutableTestCases, StaticDefaultTestCases, DefaultValueMutationProperties
+):
+    __test__ = False
+
+
+class TestTrackedMutableWithInitialValue(
+        TrackedMutableTestCases, InitialValueProperties, InitialValueMutationProperties
+):
+    __test__ = False
+    initial_value = [1, 2, 3]
+
+
+class TestTrackedMutableWithComputedDefault(
+        TrackedMutableTestCases, ComputedDefaultTestCases, DefaultValueMutationProperties
+):
+    __test__ = False
+
+    @property
+    def default_iterator(self):
+        return ([None] * i for i in xrange(1000))
+
+
 # ~~~~~~~~~~~~~ Classes for testing noops before other tests ~~~~~~~~~~~~~~~~~~~~
 
 # Allow base classes to leave out class attributes and that they access
@@ -477,12 +506,15 @@ class SaveNoopPrefix(object):
         self.block.save()
 # pylint: enable=E1101
 
+BASE_TEST_CASES = (
+    TestImmutableWithComputedDefault, TestImmutableWithInitialValue, TestImmutableWithStaticDefault,
+    TestMutableWithComputedDefault, TestMutableWithInitialValue, TestMutableWithStaticDefault,
+    TestTrackedMutableWithComputedDefault, TestTrackedMutableWithInitialValue, TestTrackedMutableWithStaticDefault,
+)
+
 for operation_backend in (BlockFirstOperations, FieldFirstOperations):
     for noop_prefix in (None, GetNoopPrefix, GetSaveNoopPrefix, SaveNoopPrefix):
-        for base_test_case in (
-            TestImmutableWithComputedDefault, TestImmutableWithInitialValue, TestImmutableWithStaticDefault,
-            TestMutableWithComputedDefault, TestMutableWithInitialValue, TestMutableWithStaticDefault
-        ):
+        for base_test_case in BASE_TEST_CASES:
 
             test_name = base_test_case.__name__ + "With" + operation_backend.__name__
             test_classes = (operation_backend, base_test_case)
@@ -0,0 +1,40 @@
+"""
+Tests of the least-recently-used cache.
+"""
+
+from xblock.lru import LRUCache
+
+from xblock.test.tools import assert_equals, assert_in, assert_not_in
+
+
+def test_get_and_set():
+    cache = LRUCache()
+    cache['a'] = 1
+    assert_equals(1, cache.get('a'))
+    assert_equals(None, cache.get('b'))
+    assert_equals('missing', cache.get('b', 'missing'))
+    assert_equals(1, len(cache))
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache['a'] = 1
+    cache['b'] = 2
+    # Reading `a` makes `b` the least recently used
+    cache.get('a')
+    cache['c'] = 3
+    assert_in('a', cache)
+    assert_not_in('b', cache)
+    assert_in('c', cache)
+
+
+def test_pop_and_clear():
+    cache = LRUCache()
+    cache['a'] = 1
+    cache['b'] = 2
+    assert_equals(1, cache.pop('a'))
+    assert_equals(None, cache.pop('a'))
+    assert_equals(('b', 2), cache.popitem())
+    cache['c'] = 3
+    cache.clear()
+    assert_equals(0, len(cache))
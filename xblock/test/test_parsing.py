@@ -1,13 +1,14 @@
 # -*- coding: utf-8 -*-
 """Test XML parsing in XBlocks."""
 
+import array
 import re
 import StringIO
 import textwrap
 import unittest
 
 from xblock.core import XBlock
-from xblock.fields import Scope, String, Integer
+from xblock.fields import AppendLog, NumericArray, Scope, String, Integer, ShardedDict
 from xblock.test.tools import blocks_are_equivalent
 from xblock.test.toy_runtime import ToyRuntime
 
@@ -37,6 +38,13 @@ class Specialized(XBlock):
         block.num_children = len(node)
         return block
 
+
+class Stateful(XBlock):
+    """A block with fields that aren't stored as single values."""
+    responses = ShardedDict(scope=Scope.user_state)
+    history = AppendLog(scope=Scope.user_state)
+    scores = NumericArray(scope=Scope.user_state)
+
 # Helpers
 
 
@@ -170,6 +178,33 @@ class ExportTest(XmlTest, unittest.TestCase):
         # you an equivalent block.
         self.assertTrue(blocks_are_equivalent(block, block_imported))
 
+    @XBlock.register_temp_plugin(Stateful)
+    def test_export_sharded_dict(self):
+        block = self.parse_xml_to_block("<stateful/>")
+        block.responses = {'q1': {'answer': 1}}
+        block.save()
+        xml = self.export_xml_for_block(block)
+        block_imported = self.parse_xml_to_block(xml)
+        self.assertEqual({'q1': {'answer': 1}}, dict(block_imported.responses))
+
+    @XBlock.register_temp_plugin(Stateful)
+    def test_export_append_log(self):
+        block = self.parse_xml_to_block("<stateful/>")
+        block.history.extend(['a', 'b'])
+        block.save()
+        xml = self.export_xml_for_block(block)
+        block_imported = self.parse_xml_to_block(xml)
+        self.assertEqual(['a', 'b'], list(block_imported.history))
+
+    @XBlock.register_temp_plugin(Stateful)
+    def test_export_numeric_array(self):
+        block = self.parse_xml_to_block("<stateful/>")
+        block.scores = array.array('d', [1.0, 2.5])
+        block.save()
+        xml = self.export_xml_for_block(block)
+        block_imported = self.parse_xml_to_block(xml)
+        self.assertEqual(array.array('d', [1.0, 2.5]), block_imported.scores)
+
 
 def squish(text):
     """Turn any run of whitespace into one space."""
@@ -3,41 +3,58 @@
 # Allow tests to access private members of classes
 # pylint: disable=W0212
 
+import copy
+import gc
+import threading
+import weakref
+
 from collections import namedtuple
 from datetime import datetime
-from mock import Mock, patch
+from mock import Mock, call, patch
+from StringIO import StringIO
 from unittest import TestCase
 
 from xblock.core import XBlock
-from xblock.fields import BlockScope, Scope, String, ScopeIds, List, UserScope, XBlockMixin, Integer
+from xblock.fields import (
+    BlockScope, Counter, Dict, DictPatch, Scope, ShardedDict, String, ScopeIds, List, UserScope, XBlockMixin, Integer,
+    NO_DEFAULT, NO_VALUE,
+)
 from xblock.exceptions import (
+    KeyValueMultiSaveError,
     NoSuchDefinition,
     NoSuchHandlerError,
     NoSuchServiceError,
     NoSuchUsage,
     NoSuchViewError,
+    XBlockSaveError,
+    XBlocksSaveError,
 )
 from xblock.runtime import (
+    BlockIdentityMap,
+    CachingIdReader,
     DictKeyValueStore,
+    FieldReadProfiles,
     IdReader,
     KeyValueStore,
     KvsFieldData,
+    MemoryIdManager,
     Mixologist,
     ObjectAggregator,
     Runtime,
 )
 from xblock.fragment import Fragment
-from xblock.field_data import DictFieldData, FieldData
+from xblock.structure import BlockStructure
+from xblock.field_data import _KEY_RECIPES, DictFieldData, FieldData, key_recipe
 
 from xblock.test.tools import (
     assert_equals, assert_false, assert_true, assert_raises,
-    assert_raises_regexp, assert_is, assert_is_not, unabc
+    assert_raises_regexp, assert_is, assert_is_not, assert_in, assert_not_in, unabc
 )
 
 
 @unabc("{} shouldn't be used in tests")
 class TestRuntime(Runtime):
-    pass
+    """A Runtime whose abstract methods are stubbed out by ``unabc``."""
 
 
 class TestMixin(object):
@@ -306,6 +323,399 @@ def test_runtime_render():
         runtime.render(tester, 'test_nonexistant_view', [update_string])
 
 
+def test_db_model_key_memo():
+    field_data = KvsFieldData(DictKeyValueStore())
+    runtime = TestRuntime(Mock(), field_data, [TestMixin])
+    tester = runtime.construct_xblock_from_class(TestXBlock, ScopeIds('s0', 'TestXBlock', 'd0', 'u0'))
+
+    key = field_data._key(tester, 'user_state')
+    assert_equals(KeyValueStore.Key(Scope.user_state, 's0', 'u0', 'user_state'), key)
+    assert_is(key, field_data._key(tester, 'user_state'))
+
+    # Keys are rebuilt once the block's scope_ids change
+    tester.scope_ids = ScopeIds('s1', 'TestXBlock', 'd0', 'u0')
+    assert_equals(KeyValueStore.Key(Scope.user_state, 's1', 'u0', 'user_state'), field_data._key(tester, 'user_state'))
+
+    with assert_raises(KeyError):
+        field_data._key(tester, 'not a field')
+
+
+class AliasingFieldData(KvsFieldData):
+    """
+    A KvsFieldData which stores the `alias` of a block under the scope of its `user_state` field
+    """
+    def _getfield(self, block, name):
+        return super(AliasingFieldData, self)._getfield(block, 'user_state' if name == 'alias' else name)
+
+
+def test_db_model_getfield_override():
+    field_data = AliasingFieldData(DictKeyValueStore())
+    runtime = TestRuntime(Mock(), field_data, [TestMixin])
+    tester = runtime.construct_xblock_from_class(TestXBlock, ScopeIds('s0', 'TestXBlock', 'd0', 'u0'))
+    assert_equals(KeyValueStore.Key(Scope.user_state, 's0', 'u0', 'alias'), field_data._key(tester, 'alias'))
+    assert_equals(KeyValueStore.Key(Scope.content, None, 'd0', 'content'), field_data._key(tester, 'content'))
+
+
+def test_key_recipes_forgotten_with_class():
+    block_class = type('TransientBlock', (XBlock,), {'content': String(scope=Scope.content)})
+    assert_equals((Scope.content, None, 'def_id'), key_recipe(block_class, 'content'))
+    assert_in(block_class, _KEY_RECIPES)
+    class_ref = weakref.ref(block_class)
+    del block_class
+    gc.collect()
+    assert_is(None, class_ref())
+
+
+class TestKeyValueStoreBulkDefaults(TestCase):
+    """
+    Tests of the per-key fallbacks for the bulk :class:`.KeyValueStore` methods.
+    """
+    def setUp(self):
+        @unabc("{} shouldn't be used in tests")  # pylint: disable=abstract-method
+        class SingleKeyStore(KeyValueStore):
+            """A store that only implements the single-key methods."""
+            def __init__(self):
+                self.data = {'a': 1, 'b': 2}
+
+            def get(self, key):
+                return self.data[key]
+
+            def has(self, key):
+                return key in self.data
+
+            def delete(self, key):
+                del self.data[key]
+
+        self.kvs = SingleKeyStore()
+
+    def test_get_many(self):
+        self.assertEquals({'a': 1}, self.kvs.get_many(['a', 'c']))
+
+    def test_has_many(self):
+        self.assertEquals({'a': True, 'c': False}, self.kvs.has_many(['a', 'c']))
+
+    def test_lookup(self):
+        self.kvs.get = Mock(wraps=self.kvs.get)
+        self.assertEquals(1, self.kvs.lookup('a'))
+        self.assertEquals(NO_VALUE, self.kvs.lookup('c', False))
+        self.assertEquals(NO_DEFAULT, self.kvs.lookup('c'))
+        # Missing keys are found with has, not by get raising KeyError
+        self.assertEquals(1, self.kvs.get.call_count)
+
+    def test_delete_many(self):
+        self.kvs.delete_many(['a', 'c', 'b'])
+        self.assertEquals({}, self.kvs.data)
+
+
+def test_dict_kvs_delete_many_missing_keys():
+    kvs = DictKeyValueStore({'a': 1, 'b': 2, 'c': 3})
+    kvs.delete_many(['a', 'missing', 'b'])
+    assert_equals({'c': 3}, kvs.db_dict)
+
+
+class RecordingKVS(DictKeyValueStore):
+    """
+    A kvs which records the keys read, checked and deleted one at a time
+    """
+    def __init__(self, storage=None):
+        super(RecordingKVS, self).__init__(storage)
+        self.calls = []
+
+    def get(self, key):
+        self.calls.append(('get', key))
+        return super(RecordingKVS, self).get(key)
+
+    def has(self, key):
+        self.calls.append(('has', key))
+        return super(RecordingKVS, self).has(key)
+
+    def delete(self, key):
+        self.calls.append(('delete', key))
+        return super(RecordingKVS, self).delete(key)
+
+
+def test_dict_kvs_bulk_through_overrides():
+    kvs = RecordingKVS({'a': 1, 'b': 2})
+    assert_equals({'a': 1}, kvs.get_many(['a', 'c']))
+    assert_equals({'a': True, 'c': False}, kvs.has_many(['a', 'c']))
+    kvs.delete_many(['a', 'c'])
+    assert_equals({'b': 2}, kvs.db_dict)
+    assert_equals(
+        [('get', 'a'), ('get', 'c'), ('has', 'a'), ('has', 'c'), ('delete', 'a'), ('delete', 'c')],
+        kvs.calls
+    )
+
+
+def test_db_model_get_many():
+    key_store = Mock(wraps=DictKeyValueStore())
+    field_data = KvsFieldData(key_store)
+    runtime = TestRuntime(Mock(), field_data, [TestMixin])
+    tester = runtime.construct_xblock_from_class(TestXBlock, ScopeIds('s0', 'TestXBlock', 'd0', 'u0'))
+
+    tester.content = 'new content'
+    tester.user_state = 'new user_state'
+    tester.save()
+
+    assert_equals(
+        {'content': 'new content', 'user_state': 'new user_state'},
+        field_data.get_many(tester, ['content', 'user_state', 'settings', 'not a field'])
+    )
+    assert_equals(1, key_store.get_many.call_count)
+    assert_false(key_store.get.called)
+
+
+class ContextDefaultKVS(DictKeyValueStore):
+    """
+    A kvs which gives every field a context default
+    """
+    def default(self, key):
+        return 'context ' + key.field_name
+
+
+def test_db_model_lookup():
+    key_store = Mock(wraps=ContextDefaultKVS())
+    field_data = KvsFieldData(key_store)
+    runtime = TestRuntime(Mock(), field_data, [TestMixin])
+    tester = runtime.construct_xblock_from_class(TestXBlock, ScopeIds('s0', 'TestXBlock', 'd0', 'u0'))
+    tester.content = 'new content'
+    tester.save()
+
+    reader = runtime.construct_xblock_from_class(TestXBlock, ScopeIds('s0', 'TestXBlock', 'd0', 'u0'))
+    key_store.reset_mock()
+
+    # A stored value and a context default are each read with one call to the kvs
+    assert_equals('new content', reader.content)
+    assert_equals('context settings', reader.settings)
+    assert_equals(2, key_store.lookup.call_count)
+    assert_false(key_store.has.called)
+    assert_false(key_store.get.called)
+
+    # Structural fields don't ask for a context default
+    assert_equals(None, reader.parent)
+    assert_equals(NO_VALUE, field_data.lookup(reader, 'parent', False))
+
+
+class UpperCaseKVS(DictKeyValueStore):
+    """
+    A kvs which reads every value upper-cased
+    """
+    def get(self, key):
+        return super(UpperCaseKVS, self).get(key).upper()
+
+
+def test_dict_kvs_lookup_through_overrides():
+    field_data = KvsFieldData(UpperCaseKVS())
+    runtime = TestRuntime(Mock(), field_data, [TestMixin])
+    tester = runtime.construct_xblock_from_class(TestXBlock, ScopeIds('s0', 'TestXBlock', 'd0', 'u0'))
+    tester.content = 'abc'
+    tester.save()
+
+    reader = runtime.construct_xblock_from_class(TestXBlock, ScopeIds('s0', 'TestXBlock', 'd0', 'u0'))
+    assert_equals('ABC', reader.content)
+    assert_equals('ABC', field_data.get(reader, 'content'))
+
+
+class InheritingFieldData(KvsFieldData):
+    """
+    A KvsFieldData which gives every field an inherited default
+    """
+    def default(self, block, name):
+        return 'inherited'
+
+
+def test_db_model_lookup_through_overrides():
+    field_data = InheritingFieldData(DictKeyValueStore())
+    runtime = TestRuntime(Mock(), field_data, [TestMixin])
+    tester = runtime.construct_xblock_from_class(TestXBlock, ScopeIds('s0', 'TestXBlock', 'd0', 'u0'))
+    assert_equals('inherited', tester.content)
+    assert_equals('inherited', field_data.lookup(tester, 'content'))
+    assert_equals(NO_VALUE, field_data.lookup(tester, 'content', False))
+
+
+class PatchingKVS(DictKeyValueStore):
+    """
+    A kvs which applies the patches of Dict fields to the stored dicts, and
+    reads and writes copies of its values, as a store outside the process would
+    """
+    def __init__(self, *args, **kwargs):
+        super(PatchingKVS, self).__init__(*args, **kwargs)
+        self.patches = []
+
+    def lookup(self, key, with_default=True):
+        value = super(PatchingKVS, self).lookup(key, with_default)
+        return copy.deepcopy(value) if isinstance(value, dict) else value
+
+    def set_many(self, other_dict):
+        super(PatchingKVS, self).set_many(copy.deepcopy(other_dict))
+
+    def update_many(self, update_dict):
+        for key, value in update_dict.iteritems():
+            if isinstance(value, DictPatch) and key in self.db_dict:
+                self.patches.append((value.changed, sorted(value.deleted)))
+                stored = self.db_dict[key]
+                stored.update(copy.deepcopy(value.changed))
+                for deleted in value.deleted:
+                    del stored[deleted]
+            else:
+                self.db_dict[key] = copy.deepcopy(value)
+
+
+class PatchedBlock(XBlock):
+    """
+    An XBlock with a Dict field saved in patch mode
+    """
+    attempts = Dict(scope=Scope.user_state, patch=True)
+    history = Dict(scope=Scope.user_state)
+
+
+class TestDictPatches(TestCase):
+    """
+    Tests of saving Dict fields in patch mode.
+    """
+    def setUp(self):
+        self.store = PatchingKVS()
+        self.kvs = Mock(wraps=self.store)
+        self.runtime = TestRuntime(Mock(), KvsFieldData(self.kvs))
+        self.block = self.make_block()
+        self.block.attempts = {'a': 1, 'b': 2, 'c': 3}
+        self.block.save()
+        self.kvs.reset_mock()
+
+    def make_block(self):
+        """Make a PatchedBlock for the same user and usage."""
+        return self.runtime.construct_xblock_from_class(PatchedBlock, ScopeIds('s0', 'patched', 'd0', 'u0'))
+
+    def stored(self):
+        """Return the stored value of the attempts field."""
+        return self.store.db_dict[KvsFieldData(self.store)._key(self.block, 'attempts')]
+
+    def test_changed_keys_written(self):
+        block = self.make_block()
+        block.attempts['a'] = 10
+        block.attempts['d'] = 4
+        del block.attempts['b']
+        block.history['a'] = 1
+        block.save()
+
+        assert_equals([({'a': 10, 'd': 4}, ['b'])], self.store.patches)
+        assert_equals({'a': 10, 'c': 3, 'd': 4}, self.stored())
+        assert_false(self.kvs.set_many.called)
+
+    def test_assigned_value_written_whole(self):
+        block = self.make_block()
+        block.attempts = {'e': 5}
+        block.save()
+
+        assert_equals([], self.store.patches)
+        assert_equals({'e': 5}, self.stored())
+        assert_false(self.kvs.update_many.called)
+
+    def test_patches_written_whole_by_default(self):
+        store = DictKeyValueStore()
+        runtime = TestRuntime(Mock(), KvsFieldData(store))
+        block = runtime.construct_xblock_from_class(PatchedBlock, ScopeIds('s0', 'patched', 'd0', 'u0'))
+        block.attempts['a'] = 1
+        block.save()
+
+        assert_equals([{'a': 1}], store.db_dict.values())
+        assert_is(dict, type(store.db_dict.values()[0]))
+
+
+class ShardedBlock(XBlock):
+    """
+    An XBlock with a ShardedDict field
+    """
+    responses = ShardedDict(scope=Scope.user_state)
+
+
+def test_db_model_sharded_keys():
+    key_store = DictKeyValueStore()
+    runtime = TestRuntime(Mock(), KvsFieldData(key_store))
+    block = runtime.construct_xblock_from_class(ShardedBlock, ScopeIds('s0', 'sharded', 'd0', 'u0'))
+    block.responses['q1'] = 'answer'
+    block.save()
+
+    assert_equals(
+        {
+            KeyValueStore.Key(Scope.user_state, 's0', 'u0', 'responses'): ['q1'],
+            KeyValueStore.Key(Scope.user_state, 's0', 'u0', 'responses/q1'): 'answer',
+        },
+        key_store.db_dict
+    )
+
+
+class CountingBlock(XBlock):
+    """
+    An XBlock with a Counter field
+    """
+    answered = Counter(scope=Scope.user_state_summary)
+    title = String(scope=Scope.content)
+
+
+class TestCounterIncrements(TestCase):
+    """
+    Tests of saving Counter fields with KeyValueStore.incr.
+    """
+    def setUp(self):
+        self.kvs = Mock(wraps=DictKeyValueStore())
+        self.runtime = TestRuntime(Mock(), KvsFieldData(self.kvs))
+
+    def make_block(self, user_id):
+        """Make a CountingBlock for `user_id`."""
+        return self.runtime.construct_xblock_from_class(CountingBlock, ScopeIds(user_id, 'counting', 'd0', 'u0'))
+
+    def test_concurrent_increments_kept(self):
+        first, second = self.make_block('s0'), self.make_block('s1')
+        first.answered += 1
+        second.answered += 1
+        first.save()
+        second.title = u'title'
+        second.save()
+
+        assert_equals(2, self.make_block('s2').answered)
+        assert_equals(2, self.kvs.incr.call_count)
+        assert_equals(1, self.kvs.set_many.call_count)
+
+    def test_locked_increments(self):
+        kvs = DictKeyValueStore()
+        threads = [threading.Thread(target=lambda: [kvs.incr('key', 1) for _ in xrange(1000)]) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert_equals(4000, kvs.db_dict['key'])
+
+    def test_failed_increment(self):
+        block = self.make_block('s0')
+        block.answered += 1
+        block.title = u'title'
+        self.kvs.incr.side_effect = Exception('unavailable')
+        with assert_raises(XBlockSaveError) as save_error:
+            block.save()
+        assert_equals([], save_error.exception.saved_fields)
+        assert_equals(2, len(save_error.exception.dirty_fields))
+        assert_false(self.kvs.set_many.called)
+
+    def test_failed_write_after_increment(self):
+        for side_effect in (Exception('unavailable'), KeyValueMultiSaveError([])):
+            self.kvs.reset_mock()
+            block = self.make_block('s0')
+            block.answered += 1
+            block.title = u'title'
+            self.kvs.set_many.side_effect = side_effect
+            with assert_raises(XBlockSaveError) as save_error:
+                block.save()
+            assert_equals([CountingBlock.answered], save_error.exception.saved_fields)
+            assert_equals([CountingBlock.title], save_error.exception.dirty_fields)
+
+            # Saving again writes the rest, without applying the increment twice
+            self.kvs.set_many.side_effect = None
+            block.save()
+            assert_equals(1, self.kvs.incr.call_count)
+        assert_equals(2, self.make_block('s1').answered)
+        assert_equals(u'title', self.make_block('s1').title)
+
+
 class SerialDefaultKVS(DictKeyValueStore):
     """
     A kvs which gives each call to default the next int (nonsensical but for testing default fn)
@@ -320,6 +730,7 @@ class SerialDefaultKVS(DictKeyValueStore):
 
 
 class TestIntegerXblock(XBlock):
+    """An XBlock with a single Integer field."""
     counter = Integer(scope=Scope.content)
 
 
@@ -465,6 +876,11 @@ class ThirdMixin(XBlockMixin):
     field = Integer(default=3)
 
 
+class SlottedMixin(object):
+    """Test class for a mixin declaring slots of its own."""
+    __slots__ = ('mixin_attr',)
+
+
 class TestMixologist(object):
     """Test that the Mixologist class behaves correctly."""
     def setUp(self):
@@ -520,6 +936,13 @@ class TestMixologist(object):
         assert_equals(4, len(pre_mixed.__bases__))  # 1 for the original class + 3 mixin classes
         assert_equals(4, len(post_mixed.__bases__))
 
+    def test_slotted_mixin(self):
+        mixed = Mixologist([SlottedMixin]).mix(FieldTester)
+        block = mixed(Mock(), DictFieldData({}), Mock())
+        block.mixin_attr = 'slot'
+        block.other_attr = 'dict'
+        assert_equals(('slot', 'dict'), (block.mixin_attr, block.other_attr))
+
 
 @XBlock.needs("i18n")
 @XBlock.wants("secret_service")
@@ -603,12 +1026,15 @@ def test_sub_service():
 
 
 class TestRuntimeGetBlock(TestCase):
+    """Tests of :meth:`.Runtime.get_block`."""
     def setUp(self):
         patcher = patch.object(TestRuntime, 'construct_xblock')
         self.construct_block = patcher.start()
         self.addCleanup(patcher.stop)
 
         self.id_reader = Mock(IdReader)
+        # Resolve usages through the default combined lookup
+        self.id_reader.resolve.side_effect = lambda usage_id: IdReader.resolve(self.id_reader, usage_id)
         self.user_id = Mock()
         self.field_data = Mock(FieldData)
         self.runtime = TestRuntime(self.id_reader, self.field_data)
@@ -643,3 +1069,772 @@ class TestRuntimeGetBlock(TestCase):
         # If we don't have a definition, then the usage doesn't exist
         with self.assertRaises(NoSuchUsage):
             self.runtime.get_block(self.usage_id)
+
+    def test_id_reader_without_resolve(self):
+        self.runtime.id_reader = Mock(spec=['get_definition_id', 'get_block_type'])
+        self.runtime.get_block(self.usage_id)
+
+        self.runtime.id_reader.get_definition_id.assert_called_with(self.usage_id)
+        self.construct_block.assert_called_with(
+            self.runtime.id_reader.get_block_type.return_value,
+            ScopeIds(
+                self.user_id, self.runtime.id_reader.get_block_type.return_value,
+                self.runtime.id_reader.get_definition_id.return_value, self.usage_id
+            )
+        )
+
+        self.runtime.id_reader.get_block_type.side_effect = NoSuchDefinition
+        with self.assertRaises(NoSuchUsage):
+            self.runtime.get_block(self.usage_id)
+
+
+class TestRuntimeIdentityMap(TestCase):
+    """Tests of :class:`BlockIdentityMap` used by :meth:`Runtime.get_block`."""
+    def setUp(self):
+        self.id_manager = MemoryIdManager()
+        self.def_id = self.id_manager.create_definition('test')
+        self.usage_id = self.id_manager.create_usage(self.def_id)
+        self.identity_map = BlockIdentityMap()
+        self.runtime = TestRuntime(self.id_manager, DictFieldData({}), identity_map=self.identity_map)
+        self.runtime.user_id = 'user'
+
+    @XBlock.register_temp_plugin(TestXBlock, 'test')
+    def test_without_identity_map(self):
+        self.runtime.identity_map = None
+        assert_is_not(self.runtime.get_block(self.usage_id), self.runtime.get_block(self.usage_id))
+
+    @XBlock.register_temp_plugin(TestXBlock, 'test')
+    def test_same_block(self):
+        block = self.runtime.get_block(self.usage_id)
+        assert_is(block, self.runtime.get_block(self.usage_id))
+        assert_equals(1, len(self.identity_map))
+
+        # Blocks are remembered per user
+        self.runtime.user_id = 'other user'
+        other_block = self.runtime.get_block(self.usage_id)
+        assert_is_not(block, other_block)
+        assert_equals('other user', other_block.scope_ids.user_id)
+
+        self.identity_map.discard('other user', self.usage_id)
+        assert_is_not(other_block, self.runtime.get_block(self.usage_id))
+
+        self.runtime.user_id = 'user'
+        self.identity_map.clear()
+        assert_is_not(block, self.runtime.get_block(self.usage_id))
+
+    @XBlock.register_temp_plugin(TestXBlock, 'test')
+    def test_blocks_can_be_freed(self):
+        block = self.runtime.get_block(self.usage_id)
+        assert_equals(1, len(self.identity_map))
+        del block
+        assert_equals(0, len(self.identity_map))
+
+
+class TestRuntimeGetBlocks(TestCase):
+    """Tests of :meth:`Runtime.get_blocks`."""
+    def setUp(self):
+        self.id_manager = MemoryIdManager()
+        self.kvs = Mock(wraps=DictKeyValueStore())
+        self.runtime = TestRuntime(self.id_manager, KvsFieldData(self.kvs), [TestMixin])
+        self.runtime.user_id = 'user'
+
+    def create_usage(self, block_type):
+        """Create a usage of a new definition of `block_type`."""
+        return self.id_manager.create_usage(self.id_manager.create_definition(block_type))
+
+    @XBlock.register_temp_plugin(TestXBlock, 'test')
+    @XBlock.register_temp_plugin(FieldTester, 'tester')
+    def test_get_blocks(self):
+        usage_ids = [self.create_usage('test'), self.create_usage('tester'), self.create_usage('test')]
+        with patch.object(self.runtime, 'load_block_type', wraps=self.runtime.load_block_type) as load_block_type:
+            blocks = self.runtime.get_blocks(usage_ids + usage_ids[:1])
+
+        assert_equals(2, load_block_type.call_count)
+        assert_equals(usage_ids + usage_ids[:1], [block.scope_ids.usage_id for block in blocks])
+        assert_equals(['test', 'tester', 'test', 'test'], [block.scope_ids.block_type for block in blocks])
+        assert_equals('user', blocks[0].scope_ids.user_id)
+        assert_true(isinstance(blocks[0], TestMixin))
+        assert_is(blocks[0], blocks[3])
+
+    @XBlock.register_temp_plugin(TestXBlock, 'test')
+    def test_identity_map(self):
+        usage_ids = [self.create_usage('test'), self.create_usage('test')]
+        self.runtime.identity_map = BlockIdentityMap()
+        block = self.runtime.get_block(usage_ids[0])
+        blocks = self.runtime.get_blocks(usage_ids)
+        assert_is(block, blocks[0])
+        assert_is(blocks[1], self.runtime.get_block(usage_ids[1]))
+
+    def test_missing_usage(self):
+        with assert_raises(NoSuchUsage):
+            self.runtime.get_blocks([self.create_usage('test'), 'missing'])
+
+    def test_missing_definition(self):
+        usage_id = self.id_manager.create_usage('missing')
+        with assert_raises_regexp(NoSuchUsage, usage_id):
+            self.runtime.get_blocks([self.create_usage('test'), usage_id])
+
+    @XBlock.register_temp_plugin(TestXBlock, 'test')
+    def test_prefetch(self):
+        usage_ids = [self.create_usage('test'), self.create_usage('test')]
+        blocks = self.runtime.get_blocks(usage_ids)
+        blocks[0].content = 'first'
+        blocks[0].user_state = 'state'
+        blocks[0].save()
+        blocks[1].settings = 'second'
+        blocks[1].save()
+
+        blocks = self.runtime.get_blocks(usage_ids, prefetch=['content', 'settings', 'user_state', 'not a field'])
+        assert_equals(1, self.kvs.get_many.call_count)
+        # Prefetched values are read without going back to storage, and aren't dirty
+        self.kvs.reset_mock()
+        assert_equals(('first', 'state', 'second'), (blocks[0].content, blocks[0].user_state, blocks[1].settings))
+        assert_false(self.kvs.lookup.called)
+        assert_equals({}, blocks[0]._dirty_fields)
+
+        # Fields without stored values are read as usual
+        assert_equals(('s', 'c'), (blocks[0].settings, blocks[1].content))
+
+        # Values the block has already read are kept
+        blocks[1].content = 'changed'
+        self.runtime.prefetch_fields(blocks, ['content'])
+        assert_equals('changed', blocks[1].content)
+
+    @XBlock.register_temp_plugin(TestXBlock, 'test')
+    def test_render_children(self):
+        children = [self.create_usage('test'), self.create_usage('test')]
+        parent = self.runtime.get_block(self.create_usage('test'))
+        parent.children = children
+        with patch.object(self.runtime, 'get_blocks', wraps=self.runtime.get_blocks) as get_blocks:
+            frags = self.runtime.render_children(parent, 'student_view', [u'prefs'])
+        get_blocks.assert_called_once_with(children)
+        assert_equals(2, len(frags))
+
+    @XBlock.register_temp_plugin(TestXBlock, 'test')
+    def test_construct_xblock_from_class(self):
+        usage_ids = [self.create_usage('test'), self.create_usage('test')]
+        with patch.object(
+            self.runtime, 'construct_xblock_from_class', wraps=self.runtime.construct_xblock_from_class
+        ) as construct:
+            blocks = self.runtime.get_blocks(usage_ids)
+        self.assertItemsEqual([call(TestXBlock, block.scope_ids) for block in blocks], construct.call_args_list)
+
+    @XBlock.register_temp_plugin(TestXBlock, 'test')
+    def test_get_block_override(self):
+        usage_ids = [self.create_usage('test'), self.create_usage('test')]
+        runtime = GetBlockRuntime(self.id_manager, KvsFieldData(self.kvs), [TestMixin])
+        parent = runtime.get_block(self.create_usage('test'))
+        parent.children = usage_ids
+        runtime.get_block_calls = []
+        assert_equals(2, len(runtime.render_children(parent, 'student_view', [u'prefs'])))
+        assert_equals(usage_ids, runtime.get_block_calls)
+        assert_equals(usage_ids, [child.scope_ids.usage_id for child in runtime.get_blocks(usage_ids)])
+
+    @XBlock.register_temp_plugin(TestXBlock, 'test')
+    def test_id_reader_without_bulk_methods(self):
+        usage_ids = [self.create_usage('test'), self.create_usage('test')]
+        self.runtime.id_reader = Mock(spec=['get_definition_id', 'get_block_type'])
+        self.runtime.id_reader.get_definition_id.side_effect = self.id_manager.get_definition_id
+        self.runtime.id_reader.get_block_type.side_effect = self.id_manager.get_block_type
+        blocks = self.runtime.get_blocks(usage_ids)
+        assert_equals(usage_ids, [block.scope_ids.usage_id for block in blocks])
+
+    @XBlock.register_temp_plugin(TestXBlock, 'test')
+    def test_construct_xblock_override(self):
+        usage_ids = [self.create_usage('test'), self.create_usage('test')]
+        runtime = ConstructXBlockRuntime(self.id_manager, KvsFieldData(self.kvs), [TestMixin])
+        parent = runtime.get_block(self.create_usage('test'))
+        parent.children = usage_ids
+        runtime.constructed_usage_ids = []
+        assert_equals(2, len(runtime.render_children(parent, 'student_view', [u'prefs'])))
+        assert_equals(usage_ids, runtime.constructed_usage_ids)
+
+    @XBlock.register_temp_plugin(TestXBlock, 'test')
+    def test_child_blocks_not_cached(self):
+        parent = self.runtime.get_block(self.create_usage('test'))
+        parent.children = [self.create_usage('test')]
+        child = self.runtime.get_child_blocks(parent)[0]
+        assert_is_not(child, self.runtime.get_child_blocks(parent)[0])
+
+        self.runtime.cache_child_blocks = True
+        child = self.runtime.get_child_blocks(parent)[0]
+        assert_is(child, self.runtime.get_child_blocks(parent)[0])
+
+
+@unabc("{} shouldn't be used in tests")  # pylint: disable=abstract-method
+class GetBlockRuntime(TestRuntime):
+    """A Runtime overriding :meth:`get_block`, recording the usages it gets."""
+    get_block_calls = []
+
+    def get_block(self, usage_id):
+        self.get_block_calls.append(usage_id)
+        return super(GetBlockRuntime, self).get_block(usage_id)
+
+
+@unabc("{} shouldn't be used in tests")  # pylint: disable=abstract-method
+class ConstructXBlockRuntime(TestRuntime):
+    """A Runtime overriding :meth:`construct_xblock`, recording the usages it constructs."""
+    constructed_usage_ids = []
+
+    def construct_xblock(self, block_type, scope_ids, field_data=None, *args, **kwargs):
+        self.constructed_usage_ids.append(scope_ids.usage_id)
+        return super(ConstructXBlockRuntime, self).construct_xblock(block_type, scope_ids, field_data, *args, **kwargs)
+
+
+class PrefetchingBlock(XBlock):
+    """A block declaring the fields its view and handler read."""
+    has_children = True
+    title = String(scope=Scope.content)
+    attempts = Integer(scope=Scope.user_state, default=0)
+    score = Integer(scope=Scope.user_state, default=0)
+
+    @XBlock.prefetches('title', 'not a field')
+    def student_view(self, context):
+        """Render the title and the children of this block."""
+        frag = Fragment(self.title)
+        for child_frag in self.runtime.render_children(self, 'student_view', context):
+            frag.add_frag_resources(child_frag)
+        return frag
+
+    @XBlock.handler
+    @XBlock.prefetches(Scope.user_state)
+    def submit(self, request, suffix=''):  # pylint: disable=unused-argument
+        """Count an attempt."""
+        self.attempts += 1
+        return self.score
+
+
+class TestRuntimePrefetchDeclared(TestCase):
+    """Tests of reading the fields declared with :meth:`XBlock.prefetches`."""
+    @XBlock.register_temp_plugin(PrefetchingBlock, 'prefetching')
+    def setUp(self):
+        self.id_manager = MemoryIdManager()
+        self.kvs = Mock(wraps=DictKeyValueStore())
+        self.runtime = TestRuntime(self.id_manager, KvsFieldData(self.kvs))
+        self.runtime.user_id = 'user'
+
+        self.child_ids = [self.create_block(u'child {}'.format(index)) for index in range(3)]
+        self.parent_id = self.create_block(u'parent', self.child_ids)
+        self.kvs.reset_mock()
+
+    def create_block(self, title, children=()):
+        """Store a block with `title` and `children`, returning its usage id."""
+        usage_id = self.id_manager.create_usage(self.id_manager.create_definition('prefetching'))
+        block = self.runtime.get_block(usage_id)
+        block.title = title
+        block.children = list(children)
+        block.save()
+        return usage_id
+
+    def looked_up_fields(self):
+        """Return the names of the fields read from the key-value store one at a time."""
+        return [args[0].field_name for args, _ in self.kvs.lookup.call_args_list]
+
+    @XBlock.register_temp_plugin(PrefetchingBlock, 'prefetching')
+    def test_render(self):
+        block = self.runtime.get_block(self.child_ids[0])
+        frag = self.runtime.render(block, 'student_view', {})
+        assert_equals(u'child 0', frag.content)
+        assert_equals(1, self.kvs.get_many.call_count)
+        assert_not_in('title', self.looked_up_fields())
+
+    @XBlock.register_temp_plugin(PrefetchingBlock, 'prefetching')
+    def test_render_children(self):
+        # Remember the children, so that the ones rendered are the ones here
+        self.runtime.cache_child_blocks = True
+        parent = self.runtime.get_block(self.parent_id)
+        children = self.runtime.get_child_blocks(parent)
+        self.kvs.reset_mock()
+        with patch.object(self.runtime, 'prefetch_fields', wraps=self.runtime.prefetch_fields) as prefetch_fields:
+            self.runtime.render(parent, 'student_view', {})
+        prefetch_fields.assert_has_calls([
+            call([parent], ['not a field', 'title']),
+            call(children, ['not a field', 'title']),
+        ])
+        # The children's titles are read together, and not again as each child renders
+        assert_equals(2, self.kvs.get_many.call_count)
+        assert_not_in('title', self.looked_up_fields())
+
+    @XBlock.register_temp_plugin(PrefetchingBlock, 'prefetching')
+    def test_handle(self):
+        block = self.runtime.get_block(self.child_ids[0])
+        block.score = 5
+        block.save()
+        block = self.runtime.get_block(self.child_ids[0])
+        self.kvs.reset_mock()
+
+        assert_equals(5, self.runtime.handle(block, 'submit', Mock()))
+        self.kvs.get_many.assert_called_once_with([
+            KvsFieldData(self.kvs)._key(block, name) for name in ('attempts', 'score')
+        ])
+        assert_equals(1, block.attempts)
+
+    @XBlock.register_temp_plugin(PrefetchingBlock, 'prefetching')
+    def test_no_prefetch_for_read_fields(self):
+        block = self.runtime.get_block(self.child_ids[0])
+        self.runtime.prefetch_fields([block], ['title'])
+        self.kvs.reset_mock()
+        self.runtime.prefetch_fields([block], ['title', 'not a field'])
+        assert_false(self.kvs.get_many.called)
+
+
+class ProfiledBlock(XBlock):
+    """A block whose view reads some of its fields."""
+    title = String(scope=Scope.content)
+    body = String(scope=Scope.content)
+    rarely_read = String(scope=Scope.content)
+    attempts = Integer(scope=Scope.user_state, default=0)
+
+    def student_view(self, context):
+        """Render the title and body, and sometimes another field."""
+        content = self.title + self.body
+        if context.get('rare'):
+            content += self.rarely_read
+        return Fragment(content)
+
+    @XBlock.handler
+    def submit(self, request, suffix=''):  # pylint: disable=unused-argument
+        """Count an attempt."""
+        self.attempts += 1
+        return self.attempts
+
+
+class TestFieldReadProfiles(TestCase):
+    """Tests of learning which fields to prefetch with :class:`FieldReadProfiles`."""
+    @XBlock.register_temp_plugin(ProfiledBlock, 'profiled')
+    def setUp(self):
+        self.id_manager = MemoryIdManager()
+        self.kvs = Mock(wraps=DictKeyValueStore())
+        self.profiles = FieldReadProfiles(decay=0.5, threshold=0.5, min_calls=2)
+        self.runtime = TestRuntime(self.id_manager, KvsFieldData(self.kvs), field_profiles=self.profiles)
+        self.runtime.user_id = 'user'
+
+        self.usage_id = self.id_manager.create_usage(self.id_manager.create_definition('profiled'))
+        block = self.runtime.get_block(self.usage_id)
+        block.title = u'title '
+        block.body = u'body '
+        block.rarely_read = u'rare'
+        block.save()
+
+    def render(self, context=None):
+        """Render a new block for the usage, returning the fragment's content."""
+        block = self.runtime.get_block(self.usage_id)
+        return self.runtime.render(block, 'student_view', context or {}).content
+
+    @XBlock.register_temp_plugin(ProfiledBlock, 'profiled')
+    def test_learning(self):
+        self.render({'rare': True})
+        assert_equals(
+            {('profiled', 'student_view'): {'title': 1.0, 'body': 1.0, 'rarely_read': 1.0}},
+            self.profiles.profiles(),
+        )
+        # Not prefetched until the view has been called min_calls times
+        assert_equals([], self.profiles.fields_to_prefetch('profiled', 'student_view'))
+        for _ in range(3):
+            self.render()
+        assert_equals(
+            ['body', 'title'],
+            sorted(self.profiles.fields_to_prefetch('profiled', 'student_view')),
+        )
+        assert_equals(1.0 / 15, self.profiles.frequencies('profiled', 'student_view')['rarely_read'])
+
+    @XBlock.register_temp_plugin(ProfiledBlock, 'profiled')
+    def test_prefetch(self):
+        for _ in range(2):
+            self.render()
+        self.kvs.reset_mock()
+
+        assert_equals(u'title body ', self.render())
+        assert_equals(1, self.kvs.get_many.call_count)
+        assert_false(self.kvs.lookup.called)
+        # Fields read after being prefetched still count as read
+        assert_equals(1.0, self.profiles.frequencies('profiled', 'student_view')['title'])
+
+    @XBlock.register_temp_plugin(ProfiledBlock, 'profiled')
+    def test_handle(self):
+        block = self.runtime.get_block(self.usage_id)
+        self.runtime.handle(block, 'submit', Mock())
+        assert_equals({'attempts': 1.0}, self.profiles.frequencies('profiled', 'submit'))
+
+    @XBlock.register_temp_plugin(ProfiledBlock, 'profiled')
+    def test_kill_switch(self):
+        for _ in range(2):
+            self.render()
+        self.profiles.enabled = False
+        self.kvs.reset_mock()
+        self.render()
+        assert_false(self.kvs.get_many.called)
+        assert_equals(2, self.profiles._profiles[('profiled', 'student_view')][0])
+
+    @XBlock.register_temp_plugin(ProfiledBlock, 'profiled')
+    def test_dump_and_load(self):
+        for _ in range(2):
+            self.render()
+        dumped = StringIO()
+        self.profiles.dump(dumped)
+        dumped.seek(0)
+        loaded = FieldReadProfiles.load(dumped, min_calls=2)
+        assert_equals(self.profiles.profiles(), loaded.profiles())
+        assert_equals(
+            sorted(self.profiles.fields_to_prefetch('profiled', 'student_view')),
+            sorted(loaded.fields_to_prefetch('profiled', 'student_view')),
+        )
+
+    def test_forgetting(self):
+        self.profiles.record('profiled', 'student_view', ['title'])
+        for _ in range(7):
+            self.profiles.record('profiled', 'student_view', [])
+        assert_equals({}, self.profiles.frequencies('profiled', 'student_view'))
+
+
+class TestCachingIdReader(TestCase):
+    """Tests of :class:`CachingIdReader`."""
+    def setUp(self):
+        self.id_manager = MemoryIdManager()
+        self.source = Mock(wraps=self.id_manager)
+        self.id_reader = CachingIdReader(self.source, maxsize=2)
+        self.def_id = self.id_manager.create_definition('test')
+        self.usage_id = self.id_manager.create_usage(self.def_id)
+
+    def test_memory_id_manager_resolve(self):
+        assert_equals((self.def_id, 'test'), self.id_manager.resolve(self.usage_id))
+        with assert_raises(NoSuchUsage):
+            self.id_manager.resolve('missing')
+        with assert_raises(NoSuchDefinition):
+            self.id_manager.resolve(self.id_manager.create_usage('missing'))
+
+    def test_resolve(self):
+        assert_equals((self.def_id, 'test'), self.id_reader.resolve(self.usage_id))
+        assert_equals((self.def_id, 'test'), self.id_reader.resolve(self.usage_id))
+        assert_equals(self.def_id, self.id_reader.get_definition_id(self.usage_id))
+        assert_equals('test', self.id_reader.get_block_type(self.def_id))
+        assert_equals(1, self.source.resolve.call_count)
+        assert_false(self.source.get_definition_id.called)
+        assert_false(self.source.get_block_type.called)
+        assert_equals((4, 1), (self.id_reader.hits, self.id_reader.misses))
+
+    def test_misses_are_cached(self):
+        for _ in range(2):
+            with assert_raises(NoSuchUsage):
+                self.id_reader.resolve('missing')
+            with assert_raises(NoSuchUsage):
+                self.id_reader.get_definition_id('missing')
+        assert_equals(1, self.source.resolve.call_count)
+        assert_false(self.source.get_definition_id.called)
+
+        usage_id = self.id_manager.create_usage('missing')
+        for _ in range(2):
+            with assert_raises(NoSuchDefinition):
+                self.id_reader.resolve(usage_id)
+        assert_equals(1, self.source.get_block_type.call_count)
+
+    def test_bulk_reads(self):
+        usage_ids = [self.id_manager.create_usage(self.def_id) for _ in range(2)]
+        self.id_reader.get_definition_id(usage_ids[0])
+        assert_equals(
+            dict.fromkeys(usage_ids, self.def_id),
+            self.id_reader.get_definition_ids(usage_ids)
+        )
+        self.source.get_definition_ids.assert_called_once_with(usage_ids[1:])
+        assert_equals({self.def_id: 'test'}, self.id_reader.get_block_types([self.def_id]))
+        assert_equals({self.def_id: 'test'}, self.id_reader.get_block_types([self.def_id]))
+        assert_equals(1, self.source.get_block_types.call_count)
+
+        # A missing id is found, and remembered, by reading the ids one at a time
+        with assert_raises(NoSuchUsage):
+            self.id_reader.get_definition_ids([self.usage_id, 'missing'])
+        with assert_raises(NoSuchUsage):
+            self.id_reader.get_definition_id('missing')
+        assert_equals(1, self.source.get_definition_id.call_args_list.count(call('missing')))
+
+    def test_lru_and_clear(self):
+        usage_ids = [self.id_manager.create_usage(self.def_id) for _ in range(2)]
+        self.id_reader.get_definition_id(self.usage_id)
+        for usage_id in usage_ids:
+            self.id_reader.get_definition_id(usage_id)
+        self.id_reader.get_definition_id(self.usage_id)
+        assert_equals(4, self.source.get_definition_id.call_count)
+
+        self.id_reader.clear()
+        self.id_reader.get_definition_id(usage_ids[1])
+        assert_equals(5, self.source.get_definition_id.call_count)
+
+
+class TreeBlock(XBlock):
+    """A block with children, to test loading trees of blocks."""
+    has_children = True
+
+    def student_view(self, context):
+        """Render the children of this block."""
+        frag = Fragment(u"<tree>")
+        for child_frag in self.runtime.render_children(self, 'student_view', context):
+            frag.add_frag_resources(child_frag)
+        return frag
+
+    @XBlock.handler
+    def rename(self, request, suffix=''):  # pylint: disable=unused-argument
+        """Rename this block, reporting whether the new name was saved."""
+        self.name = request.body
+        try:
+            self.save()
+        except XBlockSaveError:
+            return u'unsaved'
+        return u'saved'
+
+
+class TreeTestCase(TestCase):
+    """A base for tests using a stored tree of blocks."""
+    def setUp(self):
+        self.id_manager = MemoryIdManager()
+        self.kvs = Mock(wraps=DictKeyValueStore())
+        self.runtime = TestRuntime(self.id_manager, KvsFieldData(self.kvs))
+
+        # root -> (a -> (a1, a2), b)
+        self.root_id = self.create_tree(None, 'root', [('a', ['a1', 'a2']), ('b', [])])
+        self.kvs.reset_mock()
+
+    def create_tree(self, parent_id, name, children):
+        """Store a block and its descendants, returning the block's usage id."""
+        def_id = self.id_manager.create_definition('tree', name)
+        usage_id = self.id_manager.create_usage(def_id)
+        block = self.runtime.construct_xblock_from_class(TreeBlock, ScopeIds(None, 'tree', def_id, usage_id))
+        block.parent = parent_id
+        block.children = [
+            self.create_tree(usage_id, child_name, grandchildren)
+            for child_name, grandchildren in (
+                (child, []) if isinstance(child, basestring) else child
+                for child in children
+            )
+        ]
+        block.save()
+        return usage_id
+
+
+class TestRuntimeLoadTree(TreeTestCase):
+    """Tests of :meth:`Runtime.load_tree`."""
+    @XBlock.register_temp_plugin(TreeBlock, 'tree')
+    def test_load_tree(self):
+        root = self.runtime.load_tree(self.root_id)
+        # One bulk read for each level of the tree
+        assert_equals(3, self.kvs.get_many.call_count)
+        self.kvs.reset_mock()
+
+        child_a, child_b = self.runtime.get_child_blocks(root)
+        assert_equals(2, len(self.runtime.get_child_blocks(child_a)))
+        assert_equals([], self.runtime.get_child_blocks(child_b))
+        grandchild = self.runtime.get_child_blocks(child_a)[1]
+        assert_is(child_a, grandchild.get_parent())
+        assert_is(root, grandchild.get_parent().get_parent())
+        assert_is(None, root.get_parent())
+
+        # Rendering saves the blocks, but doesn't read anything more
+        self.runtime.render(root, 'student_view')
+        assert_equals([], [name for name, _, _ in self.kvs.method_calls if name != 'set_many'])
+
+    @XBlock.register_temp_plugin(TreeBlock, 'tree')
+    def test_depth(self):
+        root = self.runtime.load_tree(self.root_id, depth=1)
+        assert_equals(2, self.kvs.get_many.call_count)
+        child_a = self.runtime.get_child_blocks(root)[0]
+        assert_is(None, child_a._child_blocks)
+
+        # Deeper blocks are loaded when they're needed
+        assert_equals(2, len(self.runtime.get_child_blocks(child_a)))
+
+    @XBlock.register_temp_plugin(TreeBlock, 'tree')
+    def test_changed_children(self):
+        root = self.runtime.load_tree(self.root_id)
+        child_a, child_b = self.runtime.get_child_blocks(root)
+        root.children.reverse()
+        assert_equals(
+            [child_b.scope_ids.usage_id, child_a.scope_ids.usage_id],
+            [child.scope_ids.usage_id for child in self.runtime.get_child_blocks(root)]
+        )
+
+
+class TestRuntimeBlockStructure(TreeTestCase):
+    """Tests of using a :class:`BlockStructure` index in a :class:`Runtime`."""
+    @XBlock.register_temp_plugin(TreeBlock, 'tree')
+    def setUp(self):
+        super(TestRuntimeBlockStructure, self).setUp()
+        self.structure = BlockStructure.build(self.runtime, self.root_id)
+        self.runtime.block_structure = self.structure
+        self.kvs.reset_mock()
+
+    def test_build(self):
+        assert_equals(5, len(self.structure))
+        assert_equals(2, len(self.structure.children(self.root_id)))
+        for usage_id in self.structure.descendants(self.root_id):
+            assert_equals('tree', self.structure.block_type(usage_id))
+        leaf_id = list(self.structure.descendants(self.root_id))[1]
+        assert_equals(2, self.structure.depth(leaf_id))
+
+    @XBlock.register_temp_plugin(TreeBlock, 'tree')
+    def test_load_tree(self):
+        root = self.runtime.load_tree(self.root_id)
+        # The structure of the tree is read from the index, not storage
+        assert_false(self.kvs.get_many.called)
+        assert_equals(2, len(self.runtime.get_child_blocks(root)))
+
+    @XBlock.register_temp_plugin(TreeBlock, 'tree')
+    def test_get_parent(self):
+        leaf_id = list(self.structure.descendants(self.root_id))[1]
+        leaf = self.runtime.get_block(leaf_id)
+        parent = leaf.get_parent()
+        assert_equals(self.structure.parent(leaf_id), parent.scope_ids.usage_id)
+        assert_false(self.kvs.lookup.called)
+
+        # A parent set on the block, and not yet saved, is preferred to the index
+        leaf.parent = self.root_id
+        assert_equals(self.root_id, leaf.get_parent().scope_ids.usage_id)
+
+        # Once saved, the new parent is recorded in the index
+        leaf.save()
+        assert_equals(self.root_id, self.structure.parent(leaf_id))
+        assert_equals(self.root_id, leaf.get_parent().scope_ids.usage_id)
+
+    @XBlock.register_temp_plugin(TreeBlock, 'tree')
+    def test_saving_children_updates_index(self):
+        child_a_id, child_b_id = self.structure.children(self.root_id)
+        child_b = self.runtime.get_block(child_b_id)
+        moved_id = self.structure.children(child_a_id)[0]
+        new_id = self.id_manager.create_usage(self.id_manager.create_definition('tree'))
+        child_b.children = [moved_id, new_id]
+        child_b.save()
+
+        assert_equals((moved_id, new_id), self.structure.children(child_b_id))
+        assert_equals(child_b_id, self.structure.parent(moved_id))
+        assert_equals('tree', self.structure.block_type(new_id))
+        assert_equals([self.root_id, child_b_id], self.structure.ancestors(new_id))
+
+    @XBlock.register_temp_plugin(TreeBlock, 'tree')
+    def test_blocks_outside_index(self):
+        self.runtime.block_structure = BlockStructure()
+        root = self.runtime.load_tree(self.root_id)
+        assert_equals(3, self.kvs.get_many.call_count)
+        root.children = list(reversed(root.children))
+        root.save()
+        assert_equals(0, len(self.runtime.block_structure))
+
+
+class TestRuntimeSession(TreeTestCase):
+    """Tests of saving blocks together in a :meth:`Runtime.session`."""
+    @XBlock.register_temp_plugin(TreeBlock, 'tree')
+    def test_session(self):
+        child_a, child_b = self.runtime.get_child_blocks(self.runtime.get_block(self.root_id))
+        with self.runtime.session() as session:
+            child_a.name = u'a'
+            child_a.save()
+            child_b.name = u'b'
+            child_b.save()
+            child_a.tags = [u'changed after saving']
+            child_a.save()
+            with self.runtime.session() as inner_session:
+                assert_is(session, inner_session)
+            assert_equals(2, len(session))
+            assert_false(self.kvs.set_many.called)
+
+        assert_equals(1, self.kvs.set_many.call_count)
+        assert_equals(
+            set([(u'a', u'name'), (u'a', u'tags'), (u'b', u'name')]),
+            set(
+                (value if key.field_name == 'name' else u'a', key.field_name)
+                for key, value in self.kvs.set_many.call_args[0][0].iteritems()
+                if key.field_name in ('name', 'tags')
+            )
+        )
+        assert_equals({}, child_a._dirty_fields)
+        assert_equals(u'b', self.runtime.get_block(child_b.scope_ids.usage_id).name)
+        assert_is(None, self.runtime.active_session)
+
+    @XBlock.register_temp_plugin(TreeBlock, 'tree')
+    def test_render(self):
+        root = self.runtime.load_tree(self.root_id)
+        blocks = [root]
+        for block in blocks:
+            block.name = u'changed'
+            blocks.extend(self.runtime.get_child_blocks(block))
+
+        # Without a session, each block is saved as it finishes rendering
+        self.runtime.render(root, 'student_view', [u'prefs'])
+        assert_equals(5, self.kvs.set_many.call_count)
+
+        for block in blocks:
+            block.name = u'changed again'
+        self.kvs.reset_mock()
+        with self.runtime.session():
+            self.runtime.render(root, 'student_view', [u'prefs'])
+        # Every block in the tree is saved in one call
+        assert_equals(1, self.kvs.set_many.call_count)
+        assert_equals(5, len(self.kvs.set_many.call_args[0][0]))
+
+    @XBlock.register_temp_plugin(TreeBlock, 'tree')
+    def test_parse_xml(self):
+        self.kvs.reset_mock()
+        with self.runtime.session():
+            self.runtime.parse_xml_string(u'<tree><tree/><tree><tree/></tree></tree>', self.id_manager)
+        assert_equals(1, self.kvs.set_many.call_count)
+
+    @XBlock.register_temp_plugin(TreeBlock, 'tree')
+    def test_handle_without_session(self):
+        block = self.runtime.get_block(self.root_id)
+        self.kvs.set_many.side_effect = [KeyValueMultiSaveError([]), None]
+        # Handlers see the errors from their own saves, and the runtime saves again
+        assert_equals(u'unsaved', self.runtime.handle(block, 'rename', Mock(body=u'renamed')))
+        assert_equals(2, self.kvs.set_many.call_count)
+
+        self.kvs.set_many.side_effect = None
+        assert_equals(u'saved', self.runtime.handle(block, 'rename', Mock(body=u'renamed')))
+        assert_equals(u'renamed', self.runtime.get_block(self.root_id).name)
+
+    @XBlock.register_temp_plugin(TreeBlock, 'tree')
+    def test_save_errors(self):
+        child_a, child_b = self.runtime.get_child_blocks(self.runtime.get_block(self.root_id))
+
+        def set_many(update_dict):
+            """Save only the name of child_a."""
+            saved_keys = [key for key in update_dict if key.field_name == 'name' and update_dict[key] == u'a']
+            raise KeyValueMultiSaveError(saved_keys)
+        self.kvs.set_many.side_effect = set_many
+
+        with assert_raises(XBlocksSaveError) as save_error:
+            with self.runtime.session():
+                child_a.name = u'a'
+                child_a.save()
+                child_b.name = u'b'
+                child_b.save()
+        assert_equals(1, len(save_error.exception.errors))
+        block, error = save_error.exception.errors[0]
+        assert_is(child_b, block)
+        assert_in(TreeBlock.name, error.dirty_fields)
+        assert_equals({}, child_a._dirty_fields)
+        assert_in(TreeBlock.name, child_b._dirty_fields)
+
+    @XBlock.register_temp_plugin(TreeBlock, 'tree')
+    def test_exception_in_session(self):
+        root = self.runtime.get_block(self.root_id)
+        child_a, child_b = self.runtime.get_child_blocks(root)
+        with assert_raises(ZeroDivisionError):
+            with self.runtime.session():
+                child_a.name = u'saved'
+                child_a.save()
+                child_b.name = u'unsaved'
+                1 / 0  # pylint: disable=pointless-statement
+                child_b.save()
+        # Blocks saved before the exception are written, and others aren't
+        assert_equals(u'saved', self.runtime.get_block(child_a.scope_ids.usage_id).name)
+        assert_is(None, self.runtime.get_block(child_b.scope_ids.usage_id).name)
+        assert_is(None, self.runtime.active_session)
+
+    @XBlock.register_temp_plugin(TreeBlock, 'tree')
+    def test_failed_save_after_interrupt(self):
+        root = self.runtime.get_block(self.root_id)
+        self.kvs.set_many.side_effect = Exception('unavailable')
+        with patch('xblock.runtime.log') as log:
+            with assert_raises(KeyboardInterrupt):
+                with self.runtime.session():
+                    root.name = u'unsaved'
+                    root.save()
+                    raise KeyboardInterrupt()
+        assert_true(log.exception.called)
+        assert_is(None, self.runtime.active_session)
@@ -0,0 +1,101 @@
+"""
+Tests of the block structure index.
+"""
+from StringIO import StringIO
+
+from xblock.structure import BlockStructure
+
+from xblock.test.tools import assert_equals, assert_in, assert_not_in, assert_raises, assert_is
+
+
+def make_structure():
+    """Make the structure course -> (chapter -> (problem, html), video)."""
+    structure = BlockStructure()
+    structure.set_block('course', 'course', ['chapter', 'video'])
+    structure.set_block('chapter', 'chapter', ['problem', 'html'])
+    structure.set_block('problem', 'problem')
+    structure.set_block('html', 'html')
+    structure.set_block('video', 'video')
+    return structure
+
+
+def test_queries():
+    structure = make_structure()
+    assert_equals(5, len(structure))
+    assert_in('html', structure)
+    assert_not_in('missing', structure)
+    assert_equals('problem', structure.block_type('problem'))
+    assert_is(None, structure.block_type('missing'))
+
+    assert_equals('chapter', structure.parent('html'))
+    assert_is(None, structure.parent('course'))
+    assert_equals(('problem', 'html'), structure.children('chapter'))
+    assert_equals((), structure.children('video'))
+
+    assert_equals(['course', 'chapter'], structure.ancestors('html'))
+    assert_equals(2, structure.depth('html'))
+    assert_equals(0, structure.depth('course'))
+    assert_equals(['chapter', 'problem', 'html', 'video'], list(structure.descendants('course')))
+
+
+def test_children_added_before_their_parent():
+    structure = BlockStructure()
+    structure.set_block('problem', 'problem')
+    structure.set_block('chapter', 'chapter', ['problem'])
+    assert_equals(['chapter'], structure.ancestors('problem'))
+
+
+def test_move_block():
+    structure = make_structure()
+    structure.set_block('chapter', 'chapter', ['problem'])
+    structure.set_block('video', 'video', ['html'])
+    assert_equals(['course', 'video'], structure.ancestors('html'))
+    assert_equals(['html'], list(structure.descendants('video')))
+
+    # A removed child is left in the index, without a parent
+    structure.set_block('course', 'course', ['chapter'])
+    assert_is(None, structure.parent('video'))
+    assert_equals(1, structure.depth('html'))
+
+
+def test_set_parent():
+    structure = make_structure()
+    structure.set_parent('html', 'video')
+    assert_equals(['course', 'video'], structure.ancestors('html'))
+    # The children of the old and new parents are kept
+    assert_equals(('problem', 'html'), structure.children('chapter'))
+    assert_equals((), structure.children('video'))
+
+
+def test_new_children_without_types():
+    structure = make_structure()
+    structure.set_block('video', 'video', ['transcript'])
+    assert_not_in('transcript', structure)
+    assert_equals('video', structure.parent('transcript'))
+    structure.set_block_type('transcript', 'transcript')
+    assert_in('transcript', structure)
+    assert_equals('video', structure.parent('transcript'))
+
+
+def test_dump_and_load():
+    structure = make_structure()
+    output = StringIO()
+    structure.dump(output)
+
+    loaded = BlockStructure.load(StringIO(output.getvalue()))
+    assert_equals(sorted(structure), sorted(loaded))
+    for usage_id in structure:
+        assert_equals(structure.parent(usage_id), loaded.parent(usage_id))
+        assert_equals(structure.children(usage_id), loaded.children(usage_id))
+        assert_equals(structure.block_type(usage_id), loaded.block_type(usage_id))
+
+
+def test_load_unknown_version():
+    output = StringIO()
+    BlockStructure.FORMAT_VERSION = 2
+    try:
+        make_structure().dump(output)
+    finally:
+        BlockStructure.FORMAT_VERSION = 1
+    with assert_raises(ValueError):
+        BlockStructure.load(StringIO(output.getvalue()))